@@ -3,7 +3,23 @@ import pandas as pd
 import requests
 import plotly.express as px
 import qrcode
+import json
+import os
+import tempfile
+import threading
+import zipfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from io import BytesIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import depreciation
+import hierarchy
+import import_data
+import insights
+import labels
+import snapshot
 
 # === 설정 ===
 # 로컬 테스트 시에는 실행된 main.py 주소, 배포 시에는 자동으로 데모 모드로 전환됨
@@ -11,6 +27,19 @@ API_URL = "http://127.0.0.1:8000"
 
 st.set_page_config(page_title="Asset Master Pro X", layout="wide", page_icon="💎")
 
+# === ⏱️ 구간 시간 (ASSET_DASHBOARD_TIMINGS=1 이면 사이드바에 표시) ===
+# 실행(rerun)마다 새로 기록: 느린 화면이 데이터 로드/집계/차트 구성 중 어디에서 오는지 확인용 (서버 쪽은 GET /metrics)
+SHOW_TIMINGS = os.environ.get("ASSET_DASHBOARD_TIMINGS") == "1"
+run_timings = {}
+
+@contextmanager
+def span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run_timings[name] = run_timings.get(name, 0.0) + time.perf_counter() - started
+
 # === ✨ 고급 UI/UX (Premium Anti-Gravity & Glassmorphism) CSS ===
 st.markdown("""
     <style>
@@ -111,26 +140,149 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # === 🔄 데이터 로드 함수 (하이브리드) ===
+# 변경분 페이지 크기. 최초 전체 수신(since=0)은 서버 최대치로 받아 요청 수를 줄임
+PAGE_SIZE = 1000
+INITIAL_PAGE_SIZE = 5000
+
+# === 🌐 HTTP 클라이언트 ===
+# (연결, 응답) 타임아웃: 서버가 꺼져 있으면 바로 로컬 모드로, 느리기만 하면 응답을 기다림
+HTTP_TIMEOUT = (1, 10)
+
+@st.cache_resource
+def http_client():
+    # 세션 간 공유하는 keep-alive 연결 풀
+    # 재시도는 응답 지연/5xx에 한해 지수 백오프 (urllib3 기본: GET/PUT/DELETE 등 멱등 요청만, POST/PATCH 제외)
+    session = requests.Session()
+    retry = Retry(total=3, connect=0, read=2, status=2, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def http_pool():
+    # 서로 독립적인 조회를 동시에 보내기 위한 스레드풀
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="asset-api")
+
+def api_get(path, **kwargs):
+    return http_client().get(f"{API_URL}{path}", timeout=HTTP_TIMEOUT, **kwargs)
+
+def get_json(path, **kwargs):
+    response = api_get(path, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+# === ⚡ 캐시 레이어 ===
+# 자산 프레임은 세션 간 공유 저장소(cache_resource)에 두고 SYNC_TTL초마다 변경분만 동기화.
+# 변경 요청(api_call) 후에는 invalidate_data()로 TTL과 무관하게 다음 재실행에서 즉시 동기화.
+# 파생 데이터는 data_version(서버 버전/파일 mtime) 단위로 메모이즈하므로 데이터가 같으면 재계산 없음.
+SYNC_TTL = 5
+
+@st.cache_resource
+def asset_store():
+    return {"frame": None, "version": 0, "etag": None, "summary": None, "checked": 0.0, "lock": threading.Lock()}
+
+def invalidate_data():
+    asset_store()["checked"] = 0.0
+
+def api_call(method, path, **kwargs):
+    # 변경 요청(PUT/POST/DELETE/PATCH) 공통 경로: 요청 후 캐시 무효화
+    response = http_client().request(method, f"{API_URL}{path}", timeout=HTTP_TIMEOUT, **kwargs)
+    invalidate_data()
+    return response
+
+def merge_changes(frame, pages):
+    # 받은 변경분 페이지 [(upserts 프레임, 삭제 id 목록), ...]를 한 번에 병합
+    # (페이지마다 전체 프레임을 복사하지 않도록 concat/정렬은 한 번)
+    # 같은 id는 마지막 변경분만 남기고, 삭제(tombstone)는 그보다 앞선 페이지의 행에만 적용
+    # (같은 페이지 안의 삭제 후 재생성은 재생성이 이김)
+    parts = [frame.assign(_page=-1)] if not frame.empty else []
+    deleted = {}
+    for page, (upserts, deleted_ids) in enumerate(pages):
+        if not upserts.empty:
+            parts.append(upserts.assign(_page=page))
+        deleted.update(dict.fromkeys(deleted_ids, page))
+    if not parts or (len(parts) == 1 and not frame.empty and not deleted):
+        return frame  # 변경 없음
+    merged = pd.concat(parts, ignore_index=True).drop_duplicates('id', keep='last')
+    if deleted:
+        merged = merged[~(merged['id'].map(deleted) > merged['_page'])]
+    return merged.drop(columns='_page').sort_values('id').reset_index(drop=True)
+
+def sync_assets():
+    # 공유 프레임에 /assets/changes 변경분만 병합 (최초에는 since=0으로 전체 수신)
+    # 변경이 없으면 If-None-Match로 304를 받아 본문 전송 없음
+    # 전체 기준 KPI 집계(summary)는 변경분 조회와 동시에 요청해 함께 저장
+    store = asset_store()
+    with store["lock"]:
+        if store["frame"] is not None and time.monotonic() - store["checked"] < SYNC_TTL:
+            return store["frame"], store["version"]
+        summary_future = http_pool().submit(get_json, "/assets/summary", params={"exclude_status": "임시저장"})
+        frame = store["frame"] if store["frame"] is not None else pd.DataFrame()
+        version, etag = (store["version"], store["etag"]) if store["frame"] is not None else (0, None)
+        limit = INITIAL_PAGE_SIZE if version == 0 else PAGE_SIZE
+        pages = []
+        while True:
+            headers = {"If-None-Match": etag} if etag else {}
+            response = api_get("/assets/changes", params={"since": version, "limit": limit}, headers=headers)
+            if response.status_code == 304:
+                break
+            response.raise_for_status()
+            delta = response.json()
+            # JSON 행(dict)은 바로 프레임으로 바꿔 페이지가 쌓여도 메모리를 적게 씀
+            pages.append((pd.DataFrame(delta["upserts"]), delta["deleted"]))
+            version, etag = delta["version"], response.headers.get("ETag")
+            if not delta["has_more"]:
+                break
+        frame = merge_changes(frame, pages)
+        try:
+            summary = summary_future.result()
+        except Exception:
+            summary = None  # 필요할 때 load_summary에서 다시 조회
+        store.update(frame=frame, version=version, etag=etag, summary=summary, checked=time.monotonic())
+        return frame, version
+
+@st.cache_resource(max_entries=2)
+def read_snapshot(path, stamp):
+    # 새 세그먼트가 추가되면(stamp) 다시 읽음. Arrow 파일을 메모리 맵으로 열어 dtype 추론/날짜 파싱 없음
+    return snapshot.load_frame(path)
+
+@st.cache_resource(max_entries=2)
+def read_local_csv(path, mtime):
+    # 파일이 바뀌면(mtime) 다시 읽음
+    df = pd.read_csv(path)
+    # Ensure 'status' column exists to prevent errors
+    if 'status' not in df.columns:
+        df['status'] = '정상'
+    return df
+
 def load_data():
+    # 반환값: (데이터, 연결성공여부, 데이터 버전 키)
     try:
         # 1. API 연결 시도 (타임아웃 짧게 설정)
-        response = requests.get(f"{API_URL}/assets/", timeout=1)
-        if response.status_code == 200:
-            return pd.DataFrame(response.json()), True # (데이터, 연결성공여부)
+        frame, version = sync_assets()
+        return frame, True, f"api:{version}"
     except:
         pass
     
-    # 2. API 연결 실패 시, 로컬 데이터 파일(local_data.csv) 확인
+    # 2. API 연결 실패 시, 컬럼형 스냅샷(local_snapshot/, export_data.py --format snapshot) 확인
+    try:
+        segments = snapshot.segments(snapshot.SNAPSHOT_DIR)
+        if segments:
+            stamp = os.path.basename(segments[-1])
+            df, version = read_snapshot(snapshot.SNAPSHOT_DIR, stamp)
+            return df, False, f"snapshot:{version}:{stamp}"
+    except Exception:
+        pass
+
+    # 3. 스냅샷이 없으면 로컬 데이터 파일(local_data.csv) 확인
     try:
-        df = pd.read_csv("local_data.csv")
-        # Ensure 'status' column exists to prevent errors
-        if 'status' not in df.columns:
-            df['status'] = '정상'
-        return df, False  # (데이터, 연결실패-로컬모드)
+        mtime = os.path.getmtime("local_data.csv")
+        return read_local_csv("local_data.csv", mtime), False, f"csv:{mtime}"  # (데이터, 연결실패-로컬모드)
     except Exception:
         pass
 
-    # 3. 파일도 없으면 데모 데이터 생성 (Mock Data)
+    # 4. 파일도 없으면 데모 데이터 생성 (Mock Data)
     mock_data = [
         {"id": 1, "name": "MacBook Pro M3", "category": "IT Device", "status": "정상", "owner": "개발팀", "price": 3500000},
         {"id": 2, "name": "Dell Monitor 27", "category": "IT Device", "status": "정상", "owner": "디자인팀", "price": 450000},
@@ -139,13 +291,11 @@ def load_data():
         {"id": 5, "name": "MS Office License", "category": "Software", "status": "정상", "owner": "전사", "price": 150000},
         {"id": 6, "name": "iPad Pro 12.9", "category": "IT Device", "status": "분실", "owner": "영업1팀", "price": 1200000},
     ]
-    return pd.DataFrame(mock_data), False
+    return pd.DataFrame(mock_data), False, "mock"
 
 # 데이터 로딩
-    return pd.DataFrame(mock_data), False
-
-# 데이터 로딩
-raw_df, is_connected = load_data()
+with span("데이터 로드"):
+    raw_df, is_connected, data_version = load_data()
 
 # === 🎨 디자인 시스템 & 헬퍼 ===
 COLOR_MAP = {
@@ -165,7 +315,37 @@ def split_active_draft(df):
     active = df[df['status'] != '임시저장']
     return active, drafts
 
-active_df, draft_df = split_active_draft(raw_df)
+def department_owners(owner):
+    # 소유자 "개발1팀 김민수" -> 부서 "개발1팀"별 소유자 목록 (서버 departments.parse_owner와 같은 규칙)
+    # 고유 소유자 단위로만 문자열 처리 (필터 옵션은 담당자가 아니라 부서 단위)
+    groups = {}
+    for value in owner.dropna().unique():
+        parts = str(value).split(None, 1)
+        if parts:
+            groups.setdefault(parts[0], []).append(str(value))
+    return {dept: tuple(values) for dept, values in groups.items()}
+
+# 파생 프레임/필터 옵션은 데이터 버전별로 한 번만 계산 (cache_resource: 복사 없이 공유)
+@st.cache_resource(max_entries=4)
+def derive_frames(data_version, _raw_df):
+    active, drafts = split_active_draft(_raw_df)
+    dept_owners = department_owners(active['owner']) if not active.empty else {}
+    cats = sorted(active['category'].dropna().astype(str).unique()) if not active.empty else []
+    return active, drafts, dept_owners, cats
+
+@st.cache_resource(max_entries=8)
+def filter_frame(data_version, depts, cats, _active, _dept_owners):
+    # depts가 None이면 전체 부서 (소유자 없는 자산 포함, 서버 필터 생략과 같은 결과)
+    if _active.empty:
+        return _active
+    mask = _active['category'].isin(cats)
+    if depts is not None:
+        mask &= _active['owner'].isin([o for d in depts for o in _dept_owners.get(d, ())])
+    return _active[mask]
+
+with span("파생 프레임"):
+    active_df, draft_df, dept_owners, all_cats = derive_frames(data_version, raw_df)
+    all_depts = sorted(dept_owners)
 
 def format_korean_currency(value):
     if value >= 100000000:
@@ -180,30 +360,11 @@ def format_korean_currency(value):
         return f"{value:,}"
 
 # === 🧠 AI Insight Engine (Rule-Based) ===
+# 규칙 정의/평가는 insights.py (규칙 팩: value, health, aging, concentration, idle)
+INSIGHT_DISPLAY = {"critical": st.error, "warning": st.warning, "info": st.info}
+
 def generate_insights(df):
-    insights = []
-    if df.empty: return ["데이터가 없습니다."]
-    
-    # 1. 고가 자산 경고
-    expensive = df[df['price'] >= 5000000]
-    if not expensive.empty:
-        insights.append(f"💰 **고가 자산 집중**: 500만원 이상 자산이 {len(expensive)}개 감지되었습니다. (총 {format_korean_currency(expensive['price'].sum())})")
-    
-    # 2. 상태 불량 비율
-    issue_ratio = len(df[df['status'] != '정상']) / len(df)
-    if issue_ratio > 0.3:
-        insights.append(f"⚠️ **자산 건전성 경고**: 비정상 자산 비율이 {issue_ratio*100:.1f}%로 높습니다. 점검이 필요합니다.")
-    # 2. 상태 불량 비율
-    issue_ratio = len(df[df['status'] != '정상']) / len(df)
-    if issue_ratio > 0.3:
-        insights.append(f"⚠️ **자산 건전성 경고**: 비정상 자산 비율이 {issue_ratio*100:.1f}%로 높습니다. 점검이 필요합니다.")
-    elif issue_ratio > 0.1:
-        insights.append(f"👀 **관심 필요**: 비정상 자산 비율이 {issue_ratio*100:.1f}%입니다.")
-    
-    if not insights:
-        insights.append("✅ **특이사항 없음**: 현재 자산 상태가 양호합니다.")
-        
-    return insights
+    return insights.evaluate(df, money=format_korean_currency)
 
 # === 🚀 메인 화면 ===
 
@@ -215,22 +376,14 @@ with st.sidebar:
     st.markdown("<h2 style='animation: slideUpFade 0.5s ease-out;'>통합 관리 콘솔</h2>", unsafe_allow_html=True)
     
     st.markdown("### 🔍 통합 필터 (Global Filters)")
-    # 필터 데이터 준비 (전체 데이터 기준)
-    # 필터 데이터 준비 (전체 데이터 기준)
-    all_owners = sorted(active_df['owner'].dropna().astype(str).unique()) if not active_df.empty else []
-    all_cats = sorted(active_df['category'].dropna().astype(str).unique()) if not active_df.empty else []
-    
-    sel_owners = st.multiselect("소유 부서/팀 (Department)", all_owners, default=all_owners)
+    # 필터 옵션은 derive_frames에서 데이터 버전별로 계산됨 (전체 데이터 기준)
+    sel_depts = st.multiselect("소유 부서/팀 (Department)", all_depts, default=all_depts)
     sel_cats = st.multiselect("자산 유형 (Category)", all_cats, default=all_cats)
+    # 전체 선택이면 부서 필터 없음 (None)
+    dept_filter = tuple(sel_depts) if len(sel_depts) < len(all_depts) else None
     
-    # 필터링 적용 (활성 자산만 필터링)
-    if not active_df.empty:
-        df = active_df[
-            (active_df['owner'].isin(sel_owners)) & 
-            (active_df['category'].isin(sel_cats))
-        ]
-    else:
-        df = active_df
+    # 필터링 적용 (활성 자산만 필터링, 동기화된 공유 프레임에서 선택 조합별로 메모이즈)
+    df = filter_frame(data_version, dept_filter, tuple(sel_cats), active_df, dept_owners)
     
     st.markdown("---")
     
@@ -243,6 +396,261 @@ with st.sidebar:
     st.markdown("---")
     st.caption("© 2026 Asset Master Pro X | ver 2.0")
 
+# === 📈 KPI 집계 (서버 집계 테이블 우선, 오프라인 시 로컬 계산) ===
+def summarize_frame(df):
+    # /assets/summary 응답과 같은 형태로 로컬 데이터 집계
+    def group(col):
+        g = df.groupby(df[col].fillna('').astype(str))['price'].agg(['count', 'sum']).sort_values('sum', ascending=False)
+        return [{"key": k, "count": int(c), "price_sum": int(v)} for k, (c, v) in g.iterrows()]
+    result = {f"by_{col}": group(col) for col in ['category', 'status', 'owner']}
+    result["total"] = {"count": len(df), "price_sum": int(df['price'].sum())}
+    return result
+
+@st.cache_data(ttl=SYNC_TTL, max_entries=4)
+def fetch_department_ids(data_version):
+    # 부서명 -> 부서 id (서버 부서 필터는 정수 키 department_id 인덱스를 사용)
+    return {d["name"]: d["id"] for d in get_json("/departments")}
+
+def department_params(depts):
+    # 부서 필터 쿼리 파라미터. 부서 목록을 받지 못하면(오프라인 등) 부서에 속한 소유자 문자열로 필터
+    if is_connected:
+        try:
+            ids = fetch_department_ids(data_version)
+            return {"department_id": [ids[d] for d in depts if d in ids]}
+        except Exception:
+            pass
+    return {"owner": [o for d in depts for o in dept_owners.get(d, ())]}
+
+@st.cache_data(ttl=SYNC_TTL, max_entries=16)
+def fetch_summary(data_version, depts, cats):
+    params = {"exclude_status": "임시저장"}
+    if depts is not None: params.update(department_params(depts))
+    if cats is not None: params["category"] = list(cats)
+    return get_json("/assets/summary", params=params)
+
+@st.cache_data(max_entries=16)
+def local_summary(data_version, depts, cats, _df):
+    return summarize_frame(_df)
+
+@st.cache_data(max_entries=16)
+def book_value_total(data_version, depts, cats, _df):
+    # 현재 장부가 합계 (분류별 상각 정책, depreciation.py). 취득일이 없는 데이터는 취득가 그대로
+    if _df.empty:
+        return 0
+    if 'purchase_date' not in _df.columns:
+        return int(_df['price'].sum())
+    values = depreciation.book_values(_df['price'].to_numpy(), _df['purchase_date'].to_numpy(),
+                                      _df['category'].to_numpy(), pd.Timestamp.now().date())
+    return int(values.sum())
+
+def load_summary(df):
+    # 전체 선택이면 필터 없이 조회 (None)
+    cats = tuple(sel_cats) if len(sel_cats) < len(all_cats) else None
+    if is_connected:
+        prefetched = asset_store()["summary"]
+        if dept_filter is None and cats is None and prefetched is not None:
+            return prefetched
+        try:
+            return fetch_summary(data_version, dept_filter, cats)
+        except Exception:
+            pass
+    return local_summary(data_version, dept_filter, cats, df)
+
+# === 🗺️ 트리맵 계층 (서버 집계 우선, 오프라인 시 같은 형태로 로컬 집계) ===
+# 상위 N개/롤업 노드 구성은 서버와 같은 hierarchy.py 규칙 (그룹 집계만 pandas)
+@st.cache_data(ttl=SYNC_TTL, max_entries=32)
+def fetch_treemap(data_version, depts, cats, path):
+    params = {"exclude_status": "임시저장", "path": list(path), "top": hierarchy.TOP_N}
+    if depts is not None: params.update(department_params(depts))
+    if cats is not None: params["category"] = list(cats)
+    return get_json("/assets/treemap", params=params)
+
+@st.cache_data(max_entries=32)
+def local_treemap(data_version, depts, cats, path, _df):
+    frame = _df.assign(**{c: _df[c].fillna('').astype(str) for c in hierarchy.LEVELS})
+    for col, value in zip(hierarchy.LEVELS, path):
+        frame = frame[frame[col] == value]
+
+    def level_rows(cols):
+        g = frame.groupby(cols, sort=False)['price'].agg(['sum', 'size'])
+        keys = (k if isinstance(k, tuple) else (k,) for k in g.index)
+        return [(k[:-1], k[-1], value, count, 1) for k, value, count in zip(keys, g['sum'], g['size'])]
+
+    return hierarchy.build_tree(level_rows, path)
+
+def load_treemap(df, path):
+    cats = tuple(sel_cats) if len(sel_cats) < len(all_cats) else None
+    if is_connected:
+        try:
+            return fetch_treemap(data_version, dept_filter, cats, tuple(path))
+        except Exception:
+            pass
+    return local_treemap(data_version, dept_filter, cats, tuple(path), df)
+
+def child_labels(tree, path):
+    # 드릴다운 선택지: path 바로 아래의 실제 노드 (롤업 노드 제외)
+    return [n["path"][-1] for n in tree["nodes"]
+            if len(n["path"]) == len(path) + 1 and n["path"][:-1] == list(path) and not n["other"]]
+
+def treemap_figure(tree):
+    nodes = pd.DataFrame(tree["nodes"])
+    # 상태 레벨 이하 노드는 상태 색상, 분류 노드는 중립색
+    status_pos = hierarchy.LEVELS.index("status")
+    nodes['color'] = nodes['path'].map(lambda p: (p[status_pos] or "") if len(p) > status_pos else "")
+    fig = px.treemap(nodes, ids='id', parents='parent', names='label', values='value', branchvalues='total',
+                     color='color', color_discrete_map={**COLOR_MAP, "": "#334155"}, hover_data=['count'],
+                     template="plotly_dark")
+    fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", margin=dict(t=0, l=0, r=0, b=0))
+    fig.update_traces(root_color="rgba(0,0,0,0)")
+    return fig
+
+# === 📋 자산 그리드 (서버 키셋 페이지네이션 + 다음 페이지 미리 조회) ===
+# 브라우저에는 현재 페이지만 전달하고, 자산 선택은 전체 목록 대신 검색 결과로 제한
+GRID_FIELDS = "id,name,category,status,owner,price,purchase_date"
+GRID_PAGE_SIZES = [25, 50, 100]
+GRID_SORTS = {"등록순": "id", "가격 높은순": "-price", "가격 낮은순": "price", "최근 구매순": "-purchase_date",
+              "상태순": "status", "분류순": "category", "소유자순": "owner"}
+SEARCH_LIMIT = 20
+
+def filter_params():
+    # 사이드바 필터 -> 서버 AssetFilter 쿼리 파라미터 (전체 선택이면 생략)
+    params = {"exclude_status": "임시저장"}
+    if dept_filter is not None: params.update(department_params(dept_filter))
+    if len(sel_cats) < len(all_cats): params["category"] = sel_cats
+    return params
+
+def grid_params(sort, size):
+    return {"fields": GRID_FIELDS, "sort": sort, "limit": size, **filter_params()}
+
+def fetch_page(params, cursor):
+    response = api_get("/assets/", params={**params, **({"cursor": cursor} if cursor else {})})
+    response.raise_for_status()
+    return response.json(), response.headers.get("X-Next-Cursor")
+
+@st.cache_resource(max_entries=8)
+def local_order(data_version, depts, cats, sort, _df):
+    # 오프라인: 정렬 결과(행 위치)만 조건별로 한 번 계산
+    # categorical(스냅샷) 열은 범주 순서가 아니라 값 기준으로 정렬해 서버 정렬과 맞춤
+    ascending = not sort.startswith("-")
+    ordered = _df.sort_values([sort.lstrip("-"), 'id'], ascending=ascending, na_position='first' if ascending else 'last',
+                              key=lambda s: s.astype(str) if isinstance(s.dtype, pd.CategoricalDtype) else s)
+    return ordered
+
+def local_page(ordered, size, cursor):
+    start = int(cursor or 0)
+    page = ordered.iloc[start:start + size]
+    return page.to_dict('records'), (str(start + size) if start + size < len(ordered) else None)
+
+def grid_page(key, params, cursor):
+    # 미리 받아 둔 페이지가 있으면 그대로 사용
+    future = st.session_state.setdefault("grid_prefetch", {}).pop((key, cursor), None)
+    if future is not None:
+        try:
+            return future.result()
+        except Exception:
+            pass
+    return fetch_page(params, cursor)
+
+def prefetch_page(key, params, cursor):
+    prefetch = st.session_state.setdefault("grid_prefetch", {})
+    for stale in [k for k in prefetch if k[0] != key]:
+        prefetch.pop(stale).cancel()
+    if (key, cursor) not in prefetch:
+        prefetch[(key, cursor)] = http_pool().submit(fetch_page, params, cursor)
+
+def grid_move(step):
+    st.session_state["grid_page"] = max(0, st.session_state.get("grid_page", 0) + step)
+
+@st.cache_data(ttl=SYNC_TTL, max_entries=64)
+def search_assets(data_version, q):
+    return get_json("/assets/search", params={"q": q, "limit": SEARCH_LIMIT})["items"]
+
+@st.cache_data(ttl=SYNC_TTL, max_entries=64)
+def fetch_asset(data_version, asset_id):
+    return get_json(f"/assets/{asset_id}")
+
+def asset_candidates(q, page_rows):
+    # 검색어가 없으면 현재 페이지, 있으면 검색 결과 (서버: /assets/search, 오프라인: 부분 문자열)
+    if not q:
+        return page_rows
+    if is_connected:
+        try:
+            return search_assets(data_version, q)
+        except Exception:
+            pass
+    cols = [c for c in ('name', 'asset_code', 'owner') if c in raw_df.columns]
+    mask = pd.Series(False, index=raw_df.index)
+    for c in cols:
+        mask |= raw_df[c].fillna('').astype(str).str.contains(q, case=False, regex=False)
+    return raw_df[mask].head(SEARCH_LIMIT).to_dict('records')
+
+def load_item(asset_id):
+    if is_connected:
+        try:
+            return fetch_asset(data_version, asset_id)
+        except Exception:
+            pass
+    match = raw_df[raw_df['id'] == asset_id]
+    return match.iloc[0].to_dict() if not match.empty else None
+
+# === 🏷️ QR 라벨 시트 (서버 생성 우선, 오프라인 시 같은 labels.py로 로컬 생성) ===
+# 라벨 이미지는 디스크 캐시를 공유하므로 다시 출력할 때는 새로 추가/변경된 자산만 렌더링
+LABEL_TIMEOUT = (1, 600)
+LABEL_MEDIA = {"pdf": ("labels.pdf", "application/pdf"), "png": ("labels.zip", "application/zip")}
+
+def fetch_labels(params, fmt, template):
+    response = http_client().get(f"{API_URL}/assets/labels", timeout=LABEL_TIMEOUT,
+                                 params={**params, "format": fmt, "template": template})
+    response.raise_for_status()
+    return response.content
+
+def local_labels(frame, fmt, template):
+    # 자산코드가 있는 행만 라벨 생성 (오프라인/목업 데이터는 자산코드 열이 없을 수 있음). 없으면 None
+    if 'asset_code' not in frame.columns:
+        return None
+    coded = frame[frame['asset_code'].notna() & (frame['asset_code'].astype(str) != "")]
+    names = coded['name'] if 'name' in coded.columns else [""] * len(coded)
+    items = list(zip(coded['asset_code'].astype(str), names))
+    if not items:
+        return None
+    with tempfile.TemporaryDirectory() as workdir:
+        files, _, _ = labels.build_label_sheets(items, os.path.join(workdir, f"labels.{fmt}"), fmt, template)
+        if fmt == "pdf":
+            with open(files[0], "rb") as f:
+                return f.read()
+        buf = BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as archive:
+            for f in files:
+                archive.write(f, os.path.basename(f))
+        return buf.getvalue()
+
+# === 📥 일괄 등록 (import_data.py로 청크 단위 검증 후 /assets/bulk 로 나눠 전송) ===
+# 업로드 파일은 행 전체를 프레임으로 올리지 않고 검증/전송 때 각각 청크 단위로 다시 읽음
+def scan_upload(upload):
+    cached = st.session_state.get("import_scan")
+    if cached is None or cached[0] != upload.file_id:
+        cached = (upload.file_id, import_data.scan(import_data.iter_chunks(upload, upload.name)))
+        st.session_state["import_scan"] = cached
+    return cached[1]
+
+def send_upload(upload, total, progress):
+    report = {"upserted": 0, "errors": []}
+    done = 0
+    for _, chunk in import_data.iter_chunks(upload, upload.name):
+        valid, bad = import_data.normalize_chunk(chunk)
+        done += len(valid) + len(bad)
+        if len(valid):
+            res = api_call("POST", "/assets/bulk", params={"format": "ndjson"}, data=import_data.to_ndjson(valid),
+                           headers={"Content-Type": "application/x-ndjson"})
+            res.raise_for_status()
+            result = res.json()
+            report["upserted"] += result["upserted"]
+            # 서버 오류의 행 번호는 청크 안 순번이므로 스프레드시트 행 번호로 변환
+            rows = valid.index.to_list()
+            report["errors"] += [{**e, "row": rows[e["row"] - 1], "errors": ", ".join(e["errors"])} for e in result["errors"]]
+        progress.progress(min(done / max(total, 1), 1.0), text=f"{done:,} / {total:,}행 처리 중...")
+    return report
+
 # 상단 헤더
 c1, c2 = st.columns([3, 1])
 with c1: st.title("전사 자산 종합 현황판")
@@ -254,12 +662,19 @@ tab1, tab2, tab3 = st.tabs(["📊 운영 지표 분석", "💎 자산 관리/운
 # [TAB 1] 분석
 with tab1:
     if not df.empty:
+        with span("KPI 집계"):
+            kpi = load_summary(df)
+            book_value = book_value_total(data_version, dept_filter, tuple(sel_cats), df)
+        total_count = kpi['total']['count'] or 1
+        normal_count = sum(r['count'] for r in kpi['by_status'] if r['key'] == '정상')
+        depreciated = kpi['total']['price_sum'] - book_value
         col1, col2, col3, col4 = st.columns(4)
         kpis = [
-            ("총 보유 자산 (TOTAL ASSETS)", f"{len(df)}", "EA", "+12 vs last month"),
-            ("총 자산 가치 (TOTAL VALUE)", f"{format_korean_currency(df['price'].sum())}", "KRW", "+5% vs last month"),
-            ("정상 가동률 (ACTIVE RATIO)", f"{len(df[df['status']=='정상'])/len(df)*100:.0f}%", "Health", "-2% vs last month"),
-            ("관리 필요 (ISSUES)", f"{len(df[df['status']!='정상'])}", "Alerts", "+1 new alert")
+            ("총 보유 자산 (TOTAL ASSETS)", f"{kpi['total']['count']}", "EA", "+12 vs last month"),
+            ("총 자산 가치 (BOOK VALUE)", f"{format_korean_currency(book_value)}", "KRW",
+             f"취득가 {format_korean_currency(kpi['total']['price_sum'])} · 상각 -{format_korean_currency(depreciated)}"),
+            ("정상 가동률 (ACTIVE RATIO)", f"{normal_count/total_count*100:.0f}%", "Health", "-2% vs last month"),
+            ("관리 필요 (ISSUES)", f"{kpi['total']['count'] - normal_count}", "Alerts", "+1 new alert")
         ]
         for i, (title, value, unit, trend) in enumerate(kpis):
             with [col1, col2, col3, col4][i]:
@@ -274,35 +689,49 @@ with tab1:
 
         # AI Insight 섹션
         st.markdown("### 🤖 PM's AI 자산 분석 인사이트")
-        insights = generate_insights(df)
-        for insight in insights:
-            st.info(insight, icon="🤖")
+        with span("인사이트"):
+            found = generate_insights(df)
+        for insight in found:
+            INSIGHT_DISPLAY[insight.severity](insight.message, icon="🤖")
 
         # 차트
         c1, c2 = st.columns([2, 1])
         with c1:
             st.markdown("### 🗺️ 자산 계층 구조 (Treemap)")
             # Treemap: 공간 효율적이고 계층 구조 파악에 용이함 (Best Practice #3)
-            fig = px.treemap(df, path=[px.Constant("All Assets"), 'category', 'status', 'name'], values='price',
-                              color='status', color_discrete_map=COLOR_MAP,
-                              template="plotly_dark")
-            fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", margin=dict(t=0, l=0, r=0, b=0))
-            fig.update_traces(root_color="rgba(0,0,0,0)")
-            st.plotly_chart(fig, use_container_width=True)
+            # 집계된 노드(레벨별 상위 N + 기타)만 그리며, 하위 레벨은 드릴다운할 때만 조회
+            tree_path = []
+            with span("트리맵 집계"):
+                tree = load_treemap(df, tree_path)
+            d1, d2 = st.columns(2)
+            drill_cat = d1.selectbox("🔎 분류 드릴다운", ["전체"] + child_labels(tree, []), key="treemap_cat")
+            if drill_cat != "전체":
+                tree_path = [drill_cat]
+                with span("트리맵 집계"):
+                    tree = load_treemap(df, tree_path)
+                drill_stat = d2.selectbox("상태 드릴다운", ["전체"] + child_labels(tree, tree_path), key="treemap_status")
+                if drill_stat != "전체":
+                    tree_path = [drill_cat, drill_stat]
+                    with span("트리맵 집계"):
+                        tree = load_treemap(df, tree_path)
+            with span("트리맵 차트"):
+                fig1 = treemap_figure(tree)
+            st.plotly_chart(fig1, use_container_width=True)
         
         with c2:
             st.markdown("### 📊 유형별 자산 가치 상위 (Bar Chart)")
             # Horizontal Bar Chart: 항목 간 비교가 원형 차트보다 훨씬 명확함 (Best Practice #3)
-            cat_sum = df.groupby('category')['price'].sum().reset_index().sort_values('price', ascending=True)
-            fig2 = px.bar(cat_sum, x='price', y='category', orientation='h', 
-                          text_auto='.2s', color='category', 
-                          template="plotly_dark")
-            fig2.update_layout(paper_bgcolor="rgba(0,0,0,0)", 
-                               plot_bgcolor="rgba(0,0,0,0)",
-                               showlegend=False,
-                               margin=dict(t=0, l=0, r=0, b=0),
-                               xaxis=dict(showgrid=False),
-                               yaxis=dict(showgrid=False))
+            with span("막대 차트"):
+                cat_sum = pd.DataFrame(kpi['by_category']).rename(columns={'key': 'category', 'price_sum': 'price'}).sort_values('price', ascending=True)
+                fig2 = px.bar(cat_sum, x='price', y='category', orientation='h', 
+                              text_auto='.2s', color='category', 
+                              template="plotly_dark")
+                fig2.update_layout(paper_bgcolor="rgba(0,0,0,0)", 
+                                   plot_bgcolor="rgba(0,0,0,0)",
+                                   showlegend=False,
+                                   margin=dict(t=0, l=0, r=0, b=0),
+                                   xaxis=dict(showgrid=False),
+                                   yaxis=dict(showgrid=False))
             st.plotly_chart(fig2, use_container_width=True)
 
 # [TAB 2] 상세 관리
@@ -310,14 +739,90 @@ with tab2:
     col_list, col_detail = st.columns([1.5, 1])
     with col_list:
         st.markdown("### 📋 전체 자산 리스트")
-        st.dataframe(df[['name', 'category', 'status', 'owner', 'price']], use_container_width=True)
+        g1, g2 = st.columns([2, 1])
+        grid_sort = GRID_SORTS[g1.selectbox("정렬", list(GRID_SORTS), key="grid_sort")]
+        grid_size = g2.selectbox("페이지 크기", GRID_PAGE_SIZES, key="grid_size")
+        params = grid_params(grid_sort, grid_size)
+        grid_key = (data_version, json.dumps(params, ensure_ascii=False, sort_keys=True))
+        # 조회 조건이 바뀌면 첫 페이지부터 (페이지별 시작 커서를 쌓아 두고 이전 페이지로 돌아감)
+        if st.session_state.get("grid_key") != grid_key:
+            st.session_state.update(grid_key=grid_key, grid_page=0, grid_cursors=[None])
+        cursors = st.session_state["grid_cursors"]
+        page_no = min(st.session_state["grid_page"], len(cursors) - 1)
+        page_rows, next_cursor = [], None
+        if is_connected:
+            try:
+                page_rows, next_cursor = grid_page(grid_key, params, cursors[page_no])
+                if next_cursor:
+                    prefetch_page(grid_key, params, next_cursor)
+            except Exception:
+                page_rows = None
+        if not is_connected or page_rows is None:
+            ordered = local_order(data_version, dept_filter, tuple(sel_cats), grid_sort, df)
+            page_rows, next_cursor = local_page(ordered, grid_size, cursors[page_no])
+        del cursors[page_no + 1:]
+        cursors.append(next_cursor)
+
+        grid_cols = ['name', 'category', 'status', 'owner', 'price', 'purchase_date']
+        st.dataframe(pd.DataFrame(page_rows).reindex(columns=grid_cols), use_container_width=True, hide_index=True)
+        p1, p2, p3 = st.columns([1, 2, 1])
+        p1.button("◀ 이전", key="grid_prev", on_click=grid_move, args=(-1,), disabled=page_no == 0)
+        p2.caption(f"{page_no + 1} 페이지 · 필터 결과 {len(df)}건")
+        p3.button("다음 ▶", key="grid_next", on_click=grid_move, args=(1,), disabled=next_cursor is None)
+
+        # 현재 필터 결과 전체를 한 번의 요청으로 상태 전환 (팀 오프보딩, 연간 폐기 등)
+        with st.expander(f"📦 일괄 상태 변경 (현재 필터 결과 {len(df)}건)"):
+            batch_stat = st.selectbox("변경할 상태", ["보관중", "반납(퇴사)", "폐기", "매각", "분실", "수리중", "정상"], key="batch_status")
+            confirm = st.checkbox(f"{len(df)}건을 '{batch_stat}' 상태로 변경합니다", key="batch_confirm")
+            if st.button("일괄 적용", key="btn_batch_status", disabled=not confirm or df.empty):
+                # id 목록 대신 필터 조건을 보내 서버에서 현재 데이터 기준으로 대상 선정 (요청 크기/바인드 파라미터 수 일정)
+                batch_filter = {k: v if isinstance(v, list) else [v] for k, v in filter_params().items()}
+                if any(v == [] for v in batch_filter.values()):
+                    st.warning("선택한 부서에 해당하는 자산이 없습니다.")
+                elif is_connected:
+                    res = api_call("PATCH", "/assets/status", json={"status": batch_stat, "filter": batch_filter})
+                    if res.status_code == 200:
+                        result = res.json()
+                        st.toast(f"✅ {result['updated']}건 변경 완료" + (f" (무효 {len(result['invalid_ids'])}건)" if result['invalid_ids'] else ""))
+                        st.rerun()
     
+        # 현재 필터 결과의 자산코드마다 QR 라벨 1장 (실사 점검용 인쇄)
+        with st.expander(f"🏷️ QR 라벨 출력 (현재 필터 결과 {len(df)}건)"):
+            l1, l2 = st.columns(2)
+            label_fmt = l1.selectbox("형식", list(LABEL_MEDIA), key="label_format", format_func=str.upper)
+            label_tpl = l2.selectbox("템플릿", list(labels.TEMPLATES), key="label_template")
+            label_key = (grid_key[0], grid_key[1], label_fmt, label_tpl)
+            if st.button("라벨 시트 생성", key="btn_labels", disabled=df.empty):
+                with st.spinner("라벨 생성 중..."):
+                    content = None
+                    if is_connected:
+                        try:
+                            content = fetch_labels(filter_params(), label_fmt, label_tpl)
+                        except Exception:
+                            content = None
+                    if content is None:
+                        content = local_labels(df, label_fmt, label_tpl)
+                if content is None:
+                    st.session_state.pop("label_sheet", None)
+                    st.warning("자산코드가 있는 자산이 없어 라벨을 만들 수 없습니다.")
+                else:
+                    st.session_state["label_sheet"] = (label_key, content)
+            sheet = st.session_state.get("label_sheet")
+            if sheet and sheet[0] == label_key:
+                filename, mime = LABEL_MEDIA[label_fmt]
+                st.download_button("⬇️ 라벨 다운로드", sheet[1], file_name=filename, mime=mime, key="label_download")
+
     with col_detail:
         st.markdown("### 🔍 상세 정보 및 액션")
-        if not df.empty:
-            # 인덱스 초기화 이슈 방지를 위해 리스트로 변환
-            sel_idx = st.selectbox("자산 선택", df.index)
-            item = df.loc[sel_idx]
+        # 자산 선택: 검색어 입력 시 검색 결과, 없으면 현재 페이지의 자산 중에서
+        query = st.text_input("🔎 자산 검색 (이름/코드/소유자)", key="asset_query").strip()
+        candidates = {int(c['id']): c for c in asset_candidates(query, page_rows)}
+        def candidate_label(i):
+            owner = candidates[i].get('owner')
+            return f"{candidates[i]['name']} · {owner if isinstance(owner, str) and owner else '미지정'} (#{i})"
+        sel_id = st.selectbox("자산 선택", list(candidates), key="asset_select", format_func=candidate_label)
+        item = load_item(sel_id) if sel_id is not None else None
+        if item is not None:
             
             # --- 상세 카드 표시 ---
             st.markdown(f"""
@@ -338,7 +843,7 @@ with tab2:
                 new_stat = st.selectbox("상태 변경", ["정상", "수리중", "보관중", "폐기", "분실"], index=0 if item['status'] not in ["정상", "수리중", "보관중", "폐기", "분실"] else ["정상", "수리중", "보관중", "폐기", "분실"].index(item['status']))
                 if st.button("상태 업데이트", key="btn_update_status"):
                     if is_connected: # API Call logic same as before but generalized
-                         requests.put(f"{API_URL}/assets/{item['id']}/status?status={new_stat}")
+                         api_call("PUT", f"/assets/{item['id']}/status", params={"status": new_stat})
                          st.toast("✅ 상태가 업데이트 되었습니다.")
                          st.rerun()
 
@@ -346,7 +851,7 @@ with tab2:
                 # 2. 반납 (Return) - 즉시 보관 처리
                 if st.button("↩️ 반납 처리 (Return Asset)"):
                     if is_connected:
-                        requests.put(f"{API_URL}/assets/{item['id']}/status?status=보관중")
+                        api_call("PUT", f"/assets/{item['id']}/status", params={"status": "보관중"})
                         st.toast(f"✅ {item['name']} 자산이 반납(보관중) 처리되었습니다.")
                         st.rerun()
                 
@@ -369,7 +874,7 @@ with tab2:
                              "price": edit_price
                          }
                          if is_connected:
-                             requests.put(f"{API_URL}/assets/{item['id']}", json=payload)
+                             api_call("PUT", f"/assets/{item['id']}", json=payload)
                              st.toast("✅ 정보가 수정되었습니다.")
                              st.rerun()
 
@@ -377,21 +882,21 @@ with tab2:
                 # 4. 삭제 (Delete)
                 if st.button("🗑️ 자산 삭제 (Delete)", type="primary"):
                     if is_connected:
-                        requests.delete(f"{API_URL}/assets/{item['id']}")
+                        api_call("DELETE", f"/assets/{item['id']}")
                         st.toast("🗑️ 자산이 삭제되었습니다.")
                         st.rerun()
 
 
 # [TAB 3] 등록 및 임시보관함
 with tab3:
-    t1, t2 = st.tabs(["신규 등록", "📂 임시 보관함 (Drafts)"])
+    t1, t2, t3 = st.tabs(["신규 등록", "📂 임시 보관함 (Drafts)", "📥 일괄 등록 (Excel/CSV)"])
     
     with t1:
         st.subheader("➕ 신규 자산 등록")
         with st.form("reg_form"):
             c1, c2 = st.columns(2)
             name = c1.text_input("자산명 (Asset Name)")
-            cat = c1.selectbox("분류 (Category)", ["IT Device", "Furniture", "Vehicle", "Software", "Others"])
+            cat = c1.selectbox("분류 (Category)", list(depreciation.POLICIES))
             owner = c2.text_input("소유자/팀 (Owner)")
             price = c2.number_input("가격 (Price)", step=10000)
             
@@ -402,24 +907,21 @@ with tab3:
             
             if submit_final or submit_draft:
                 status = "임시저장" if submit_draft else "정상"
+                # 자산코드는 서버가 분류/구매연도 시퀀스에서 채번 (예: IT-24013)
                 payload = {
-                    "asset_code": f"TEMP-{pd.Timestamp.now().strftime('%H%M%S')}",
                     "name": name,
                     "category": cat,
                     "owner": owner,
                     "purchase_date": str(pd.Timestamp.now().date()),
-                    "price": int(price)
+                    "price": int(price),
+                    "status": status
                 }
                 
                 if is_connected:
-                    # Create Asset logic
-                    res = requests.post(f"{API_URL}/assets/", json=payload)
-                    # If it's a draft, we might need to update status immediately if Backend defaults to 'Normal'
+                    # Create Asset logic (초기 상태까지 요청 한 번으로 등록)
+                    res = api_call("POST", "/assets/", json=payload)
                     if res.status_code == 200:
-                        new_id = res.json()['id']
-                        if status == '임시저장':
-                            requests.put(f"{API_URL}/assets/{new_id}/status?status=임시저장")
-                        st.success(f"{'임시 저장' if submit_draft else '등록'} 완료!")
+                        st.success(f"{'임시 저장' if submit_draft else '등록'} 완료! ({res.json()['asset_code']})")
                         st.rerun()
     
     with t2:
@@ -430,8 +932,45 @@ with tab3:
                     st.write(f"가격: {format_korean_currency(row['price'])}")
                     if st.button("🚀 정식 등록 (Publish)", key=f"pub_{row['id']}"):
                         if is_connected:
-                            requests.put(f"{API_URL}/assets/{row['id']}/status?status=정상")
+                            api_call("PUT", f"/assets/{row['id']}/status", params={"status": "정상"})
                             st.toast("✅ 정식 자산으로 등록되었습니다.")
                             st.rerun()
         else:
             st.info("임시 저장된 자산이 없습니다.")
+
+    with t3:
+        st.subheader("📥 구매 내역 일괄 등록")
+        st.caption(f"첫 행은 헤더 (자산코드, 자산명, 분류, 소유자, 구매일, 가격). {import_data.CHUNK_SIZE:,}행 단위로 검증 후 전송하며, 같은 자산코드는 덮어쓰고 자산코드가 비어 있으면 서버에서 채번합니다.")
+        upload = st.file_uploader("XLSX / CSV 파일", type=["xlsx", "csv"], key="import_file")
+        if upload is not None:
+            with st.spinner("파일 검증 중..."):
+                scan = scan_upload(upload)
+            m1, m2, m3 = st.columns(3)
+            m1.metric("전체 행", f"{scan['total']:,}")
+            m2.metric("등록 가능", f"{scan['valid']:,}")
+            m3.metric("오류", f"{scan['failed']:,}")
+            if scan["missing"]:
+                st.error(f"필수 컬럼을 찾을 수 없습니다: {', '.join(scan['missing'])}")
+            if scan["failed"]:
+                st.markdown(f"**오류 미리보기** (앞 {len(scan['errors'])}건, 오류 행은 제외하고 등록)")
+                st.dataframe(scan["errors"], use_container_width=True, hide_index=True)
+            if not is_connected:
+                st.warning("API 서버에 연결되어 있지 않아 등록할 수 없습니다.")
+            if st.button(f"🚀 {scan['valid']:,}건 등록", key="btn_import", disabled=not is_connected or scan['valid'] == 0):
+                progress = st.progress(0.0, text="전송 준비 중...")
+                try:
+                    report = send_upload(upload, scan["total"], progress)
+                except Exception as e:
+                    st.error(f"전송 중 오류로 중단되었습니다: {e}")
+                else:
+                    progress.progress(1.0, text="완료")
+                    st.success(f"✅ {report['upserted']:,}건 등록/갱신 완료")
+                    if report["errors"]:
+                        st.markdown(f"**서버에서 거부된 행** ({len(report['errors'])}건)")
+                        st.dataframe(pd.DataFrame(report["errors"]), use_container_width=True, hide_index=True)
+
+# 구간 시간 (모든 구간이 끝난 뒤 사이드바에 추가)
+if SHOW_TIMINGS:
+    with st.sidebar.expander("⏱️ 구간별 시간", expanded=True):
+        st.dataframe(pd.DataFrame({"구간": list(run_timings), "ms": [round(v * 1000, 1) for v in run_timings.values()]}),
+                     hide_index=True, use_container_width=True)
@@ -0,0 +1,69 @@
+"""인사이트 엔진 벤치마크: 기존 마스크 복사 방식 vs 열 단위 단일 패스 규칙 엔진
+
+사용법: python benchmarks/bench_insights.py [--sizes 100000 1000000]
+API 응답과 같은 문자열 열(object) 프레임과 categorical 프레임 각각에 대해 시간을 잰다.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import insights
+
+STATUSES = ["정상"] * 6 + ["수리중", "보관중", "분실", "폐기", "매각", "반납(퇴사)"]
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    owners = np.array([f"{team}{i % 9 + 1}팀 사용자{i}" for i, team in enumerate(["개발", "영업", "인사", "재무"] * 250)])
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "name": "MacBook Pro",
+        "category": rng.choice(["IT기기", "가구", "차량", "소프트웨어"], n),
+        "status": rng.choice(STATUSES, n),
+        "owner": rng.choice(owners, n),
+        "purchase_date": (np.datetime64("2026-01-01") - rng.integers(0, 3650, n).astype("timedelta64[D]")).astype(str),
+        "price": rng.integers(10000, 10000000, n),
+    })
+
+
+def legacy(df):
+    # 기존 app.generate_insights: 규칙마다 필터링 복사본 생성, 비정상 비율 블록 중복
+    out = []
+    expensive = df[df['price'] >= 5000000]
+    if not expensive.empty:
+        out.append((len(expensive), expensive['price'].sum()))
+    for _ in range(2):
+        issue_ratio = len(df[df['status'] != '정상']) / len(df)
+        out.append(issue_ratio)
+    return out
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(sizes):
+    for n in sizes:
+        df = make_frame(n)
+        cat_df = df.astype({c: "category" for c in ("category", "status", "owner")})
+        old = best_of(lambda: legacy(df))
+        new = best_of(lambda: insights.evaluate(df))
+        cat = best_of(lambda: insights.evaluate(cat_df))
+        print(f"{n:>8} rows | legacy (2 rules) {old * 1000:8.1f} ms | engine ({len(insights.RULES)} rules) "
+              f"{new * 1000:8.1f} ms | engine, categorical input {cat * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    run(parser.parse_args().sizes)
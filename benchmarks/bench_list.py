@@ -0,0 +1,79 @@
+"""목록 응답 직렬화 벤치마크: ORM + Pydantic 경로 vs Core select + orjson 고속 경로
+
+사용법: python benchmarks/bench_list.py [--sizes 10000 100000]
+임시 SQLite 파일에 자산을 채운 뒤 같은 페이지를 두 경로로 만들어 시간을 비교한다.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ASSET_DB_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_list.db")
+
+import json
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert
+import crud
+import database
+import main
+
+
+def fill(n):
+    with database.engine.begin() as conn:
+        conn.execute(delete(database.Asset))
+        rows = [{
+            "asset_code": f"IT-{i:07d}", "name": f"MacBook Pro {i % 50}", "category": "IT기기",
+            "status": "정상", "owner": f"개발{i % 8}팀 김민수", "purchase_date": date(2024, 1, 1) - timedelta(days=i % 1000),
+            "price": 1000 * (i % 5000),
+        } for i in range(n)]
+        conn.execute(insert(database.Asset), rows)
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def legacy_path(n):
+    # 기존 read_assets: ORM 객체 -> AssetResponse 검증 -> jsonable_encoder -> json
+    with database.SessionLocal() as db:
+        assets = crud.list_assets(db, [], n)
+        payload = [main.AssetResponse.model_validate(a) for a in assets]
+        return json.dumps(jsonable_encoder(payload), ensure_ascii=False).encode()
+
+
+def fast_path(n, fields=main.LIST_FIELDS):
+    with database.SessionLocal() as db:
+        rows, _ = crud.list_asset_rows(db, fields, [], n)
+        return main.dumps(rows)
+
+
+def run(sizes):
+    client = TestClient(main.app)
+    results = []
+    for n in sizes:
+        fill(n)
+        legacy = best_of(lambda: legacy_path(n))
+        fast = best_of(lambda: fast_path(n))
+        grid = best_of(lambda: fast_path(n, ["id", "name", "status", "price"]))
+        http = best_of(lambda: client.get(f"/assets/?limit={n}"))
+        ndjson = best_of(lambda: client.get(f"/assets/?limit={n}&format=ndjson"))
+        results.append((n, legacy, fast, grid, http, ndjson))
+        print(f"{n:>8} rows | ORM+Pydantic {legacy * 1000:8.1f} ms | Core+orjson {fast * 1000:8.1f} ms "
+              f"({legacy / fast:4.1f}x) | 4 fields {grid * 1000:8.1f} ms | "
+              f"HTTP json {http * 1000:8.1f} ms | HTTP ndjson {ndjson * 1000:8.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    run(parser.parse_args().sizes)
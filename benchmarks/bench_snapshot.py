@@ -0,0 +1,65 @@
+"""오프라인 콜드 로드 벤치마크: local_data.csv (read_csv) vs Arrow 스냅샷 (메모리 맵)
+
+사용법: python benchmarks/bench_snapshot.py [--sizes 100000 1000000] [--deltas 5]
+임시 디렉터리에 같은 자산을 CSV와 스냅샷(base + 변경분 deltas개)으로 기록한 뒤 로드 시간을 비교한다.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import snapshot
+
+
+def rows(start, n, version=1):
+    return [(
+        i, f"IT-{i:07d}", f"MacBook Pro {i % 50}", ["IT기기", "가구", "차량", "소프트웨어"][i % 4],
+        ["정상", "수리중", "보관중"][i % 3], f"개발{i % 40}팀 사용자{i % 997}" if i % 7 else None,
+        date(2024, 1, 1) - timedelta(days=i % 1500), 1000 * (i % 5000), datetime(2026, 1, 1), version,
+    ) for i in range(start, start + n)]
+
+
+def chunks(start, n, size=100000):
+    for offset in range(0, n, size):
+        yield rows(start + offset, min(size, n - offset))
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(sizes, deltas):
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "snap")
+            snapshot.write_segment(chunks(1, n), 1, path, base=True)
+            csv_path = os.path.join(tmp, "local_data.csv")
+            snapshot.load_frame(path)[0].to_csv(csv_path, index=False)
+
+            csv = best_of(lambda: pd.read_csv(csv_path))
+            base = best_of(lambda: snapshot.load_frame(path))
+            # 변경분: 매번 기존 1000건 갱신 + 신규 1000건, 일부 삭제
+            for d in range(deltas):
+                changed = rows(1 + d * 1000, 1000, d + 2) + rows(n + 1 + d * 1000, 1000, d + 2)
+                snapshot.write_segment([changed], d + 2, path, deleted=list(range(n - d * 10, n - d * 10 - 10, -1)))
+            merged = best_of(lambda: snapshot.load_frame(path))
+            print(f"{n:>8} rows | read_csv {csv * 1000:8.1f} ms | snapshot {base * 1000:7.1f} ms "
+                  f"({csv / base:5.1f}x) | snapshot + {deltas} deltas {merged * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--deltas", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.deltas)
@@ -0,0 +1,323 @@
+"""통합 벤치마크: API 엔드포인트, 대시보드 계산(app.py), 내보내기를 행 수별 픽스처에서 측정
+
+사용법: python benchmarks/bench_suite.py [--sizes 10000 100000 1000000] [--output bench_results.json]
+                                         [--baseline benchmarks/baseline.json] [--update-baseline]
+임시 SQLite 파일에 seed_data.py로 자산을 채우고(작은 크기부터 차례로 추가) 프로세스 안에서
+FastAPI TestClient와 app.py 함수를 직접 호출한다. 항목별로 처리량, p50/p99 지연, 최대 메모리를 재고
+JSON으로 저장한 뒤 기준값과 비교해 느려진 항목을 표시한다 (회귀가 있으면 종료 코드 1).
+기준값과 측정 환경(CPU 수, 플랫폼, DB 모드)이 다르면 절대값 비교가 의미 없으므로 경고만 하고 통과시킨다.
+최대 메모리는 tracemalloc 기준 (Python/NumPy 할당, Arrow 메모리 맵과 SQLite 페이지 캐시는 제외).
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+DB_DIR = tempfile.mkdtemp(prefix="asset_bench_")
+# 픽스처를 채우고 자산을 등록하므로 ASSET_DB_URL 설정과 무관하게 항상 임시 파일 사용
+os.environ["ASSET_DB_URL"] = f"sqlite:///{DB_DIR}/bench_suite.db"
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+import database
+import export_data
+import main
+import seed_data
+import snapshot
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+SEED = 42
+
+# 항목별 반복 상한과 시간 예산 (초). 예산을 넘기면 그때까지의 반복으로 집계 (최소 1회)
+MAX_ITERATIONS = {"api": 200, "dashboard": 20, "export": 5}
+CASE_BUDGET = 10.0
+
+# 회귀 판정: p50 지연 또는 최대 메모리가 기준보다 이 비율 이상 늘고, 절대 차이도 아래 값 이상일 때
+TIME_TOLERANCE = 0.30
+MEMORY_TOLERANCE = 0.20
+MIN_TIME_DELTA_MS = 2.0
+MIN_MEMORY_DELTA_MB = 1.0
+
+# 이 환경 값이 기준값과 다르면 회귀 판정을 하지 않음 (경고만)
+COMPARABLE_ENVIRONMENT = ("cpu_count", "platform", "db_async")
+
+
+# === 픽스처 ===
+def asset_count():
+    with database.engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(database.Asset)).scalar()
+
+
+def grow_fixture(n):
+    """DB 자산 수를 n개까지 채움 (이미 있는 만큼은 다시 만들지 않음)"""
+    missing = n - asset_count()
+    if missing > 0:
+        seed_data.seed_database(missing, seed=SEED + n, log=lambda _: None)
+
+
+def load_app(client):
+    """app.py를 Streamlit 없이(bare mode) 가져오고 API 호출을 TestClient로 연결
+
+    app 모듈이 처음 실행될 때는 로컬 파일로 화면을 그리므로, 연결은 import 이후에 바꿈.
+    """
+    import streamlit  # noqa: F401  (bare mode 경고 로거를 먼저 만들어 두고 수준을 낮춤)
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+    import app
+    app.api_get = lambda path, timeout=None, **kwargs: client.get(path, **kwargs)
+
+    def get_json(path, **kwargs):
+        response = client.get(path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    app.get_json = get_json
+    return app
+
+
+# === 측정 항목 (함수 반환값: 한 번에 처리한 행 수) ===
+def api_cases(client, n, rng):
+    ids = rng.integers(1, n, size=1000)
+    names = list({name for _, items in seed_data.CATALOG.values() for name, _, _ in items})
+    state = {"i": 0}
+
+    def pick(values):
+        state["i"] += 1
+        return values[state["i"] % len(values)]
+
+    def get(path, **params):
+        response = client.get(path, params=params)
+        response.raise_for_status()
+        return response
+
+    def create():
+        body = {"name": "벤치마크 노트북", "category": "IT기기", "owner": "개발1팀 김민수",
+                "purchase_date": "2025-03-02", "price": 1500000}
+        client.post("/assets/", json=body).raise_for_status()
+        return 1
+
+    return {
+        "api_list_first_page": lambda: len(get("/assets/", limit=100).json()),
+        "api_list_keyset": lambda: len(get("/assets/", limit=100, after_id=int(pick(ids))).json()),
+        "api_list_sorted": lambda: len(get("/assets/", limit=100, sort="-price").json()),
+        "api_list_filtered": lambda: len(get("/assets/", limit=100, category="가구", status="수리중").json()),
+        "api_list_10k": lambda: len(get("/assets/", limit=10000, fields="id,name,status,price").json()),
+        "api_create": create,
+        "api_search": lambda: len(get("/assets/search", q=pick(names).split()[0]).json()["items"]),
+        "api_summary": lambda: get("/assets/summary", exclude_status="임시저장").json()["total"]["count"],
+        "api_treemap": lambda: len(get("/assets/treemap", exclude_status="임시저장").json()["nodes"]),
+    }
+
+
+def dashboard_cases(app, workdir, selected):
+    # 오프라인 모드 입력: 같은 데이터를 스냅샷/CSV로 한 번 기록해 둠 (측정하는 경우만)
+    snap_dir = os.path.join(workdir, "snapshot")
+    csv_path = os.path.join(workdir, "local_data.csv")
+    stamp = None
+    if selected("load_data_snapshot"):
+        export_data.export_snapshot(snap_dir, full=True)
+        stamp = os.path.basename(snapshot.segments(snap_dir)[-1])
+    if selected("load_data_csv"):
+        export_data.export_assets(csv_path, "csv")
+    frame = {}
+
+    def load_api():
+        # 공유 저장소를 비워 매번 전체 동기화 (/assets/changes 페이지 수신 + 병합)
+        app.asset_store().update(frame=None, version=0, etag=None, checked=0.0)
+        df, connected, version = app.load_data()
+        assert connected, "API 동기화 실패"
+        frame.update(raw=df, version=version, active=app.split_active_draft(df)[0])
+        return len(df)
+
+    def on_active(fn):
+        # 필터 전체 선택 상태의 활성 자산 프레임에 대한 계산 (캐시 데코레이터 없이 원 함수 호출)
+        def case():
+            fn(frame["active"])
+            return len(frame["active"])
+        return case
+
+    if not selected("load_data_api"):
+        load_api()  # 대시보드 계산의 입력 프레임 (load_data_api를 재는 경우 그 준비 실행이 채움)
+    version = lambda: frame["version"]
+    return {
+        "load_data_api": load_api,
+        "load_data_snapshot": lambda: len(app.read_snapshot.__wrapped__(snap_dir, stamp)[0]),
+        "load_data_csv": lambda: len(app.read_local_csv.__wrapped__(csv_path, 0)),
+        "derive_frames": lambda: len(app.derive_frames.__wrapped__(version(), frame["raw"])[0]),
+        "generate_insights": on_active(app.generate_insights),
+        "summarize_frame": on_active(app.summarize_frame),
+        "local_treemap": on_active(lambda df: app.local_treemap.__wrapped__(version(), None, None, (), df)),
+        "book_value_total": on_active(lambda df: app.book_value_total.__wrapped__(version(), None, None, df)),
+    }
+
+
+def export_cases(workdir):
+    def export(fmt):
+        return export_data.export_assets(os.path.join(workdir, f"export.{fmt}"), fmt)
+
+    return {
+        "export_csv": lambda: export("csv"),
+        "export_parquet": lambda: export("parquet"),
+        "export_snapshot": lambda: export_data.export_snapshot(os.path.join(workdir, "export_snapshot"), full=True)[0],
+    }
+
+
+# === 측정 ===
+def measure(fn, max_iterations, budget=CASE_BUDGET):
+    """첫 실행은 tracemalloc으로 최대 메모리만 재는 준비 실행 (추적 비용이 지연에 섞이지 않도록 분리)
+
+    이후 max_iterations회 또는 budget초까지 반복해 지연 분포를 잼.
+    """
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies, rows = [], 0
+    started = time.perf_counter()
+    while len(latencies) < max_iterations and (not latencies or time.perf_counter() - started < budget):
+        t = time.perf_counter()
+        rows += fn() or 0
+        latencies.append(time.perf_counter() - t)
+    total = sum(latencies)
+    return {
+        "iterations": len(latencies),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "mean_ms": round(total / len(latencies) * 1000, 3),
+        "ops_per_s": round(len(latencies) / total, 2),
+        "rows_per_s": round(rows / total, 1),
+        "peak_mb": round(peak / 2 ** 20, 2),
+    }
+
+
+def run_size(client, app, n, only=None, log=print):
+    started = time.perf_counter()
+    grow_fixture(n)
+    log(f"== {n:,} rows (fixture {time.perf_counter() - started:.1f}s)")
+    results = []
+    selected = lambda name: not only or any(key in name for key in only)
+    with tempfile.TemporaryDirectory(dir=DB_DIR) as workdir:
+        groups = [
+            ("api", api_cases(client, n, np.random.default_rng(SEED))),
+            ("dashboard", dashboard_cases(app, workdir, selected)),
+            ("export", export_cases(workdir)),
+        ]
+        for group, cases in groups:
+            for name, fn in cases.items():
+                if not selected(name):
+                    continue
+                result = {"case": name, "group": group, "rows": n, **measure(fn, MAX_ITERATIONS[group])}
+                results.append(result)
+                log(f"  {name:<22} p50 {result['p50_ms']:>10.2f} ms | p99 {result['p99_ms']:>10.2f} ms | "
+                    f"{result['ops_per_s']:>9.2f} ops/s | {result['rows_per_s']:>12,.0f} rows/s | "
+                    f"peak {result['peak_mb']:>8.2f} MB")
+    return results
+
+
+def run(sizes, only=None, log=print):
+    # 요청마다 새 이벤트 루프를 띄우지 않도록 TestClient는 하나를 열어 두고 공유 (비동기 엔진 연결이 루프에 묶임)
+    with TestClient(main.app) as client:
+        app = load_app(client)
+        return [result for n in sorted(sizes) for result in run_size(client, app, n, only, log)]
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "db_async": os.environ.get("ASSET_DB_ASYNC", "1") != "0",
+    }
+
+
+# === 기준값 비교 ===
+def environment_mismatch(current, baseline):
+    """회귀 판정에 영향을 주는 환경 값 중 기준값과 다른 것 {키: (기준, 현재)}"""
+    return {k: (baseline.get(k), current.get(k)) for k in COMPARABLE_ENVIRONMENT if baseline.get(k) != current.get(k)}
+
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """(항목, 행 수)가 같은 기준값과 비교해 회귀 목록 반환 (기준에 없는 항목은 건너뜀)"""
+    base = {(r["case"], r["rows"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        ref = base.get((result["case"], result["rows"]))
+        if ref is None:
+            continue
+        checks = [("p50_ms", time_tolerance, MIN_TIME_DELTA_MS), ("peak_mb", memory_tolerance, MIN_MEMORY_DELTA_MB)]
+        for metric, tolerance, min_delta in checks:
+            before, after = ref[metric], result[metric]
+            if after > before * (1 + tolerance) and after - before >= min_delta:
+                regressions.append({"case": result["case"], "rows": result["rows"], "metric": metric,
+                                    "baseline": before, "current": after,
+                                    "change": round(after / before - 1, 3) if before else None})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--only", nargs="+", help="이름에 이 문자열이 들어간 항목만 측정 (예: api_list load_data)")
+    parser.add_argument("--output", default="bench_results.json", help="결과 JSON 경로")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="비교할 기준값 JSON 경로")
+    parser.add_argument("--update-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE, help="p50 지연 회귀 허용 비율")
+    args = parser.parse_args()
+
+    try:
+        report = {"environment": environment(), "results": run(args.sizes, args.only)}
+    finally:
+        database.engine.dispose()
+        shutil.rmtree(DB_DIR, ignore_errors=True)
+
+    baseline, mismatch = None, {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["baseline"] = baseline["environment"]
+        report["regressions"] = compare(report["results"], baseline, args.tolerance)
+        mismatch = environment_mismatch(report["environment"], baseline["environment"])
+        if mismatch:
+            report["environment_mismatch"] = {k: list(v) for k, v in mismatch.items()}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Saved {len(report['results'])} results to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+    elif baseline is None:
+        print(f"No baseline at {args.baseline} (run with --update-baseline to create one)")
+    elif mismatch:
+        for key, (before, after) in mismatch.items():
+            print(f"WARNING environment differs from baseline: {key} {before!r} -> {after!r}")
+        for r in report["regressions"]:
+            print(f"  (not gated) {r['case']} @ {r['rows']:,} rows: {r['metric']} {r['baseline']} -> {r['current']}")
+        print("Skipped regression gate (re-record the baseline on this machine with --update-baseline).")
+    elif report["regressions"]:
+        for r in report["regressions"]:
+            print(f"REGRESSION {r['case']} @ {r['rows']:,} rows: {r['metric']} {r['baseline']} -> {r['current']}")
+        sys.exit(1)
+    else:
+        print("No regressions against baseline.")
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+import codes
+import database
+import departments
+import history
+import summary
+import valuation
+
+# 한 트랜잭션에서 처리할 행 수 (executemany 단위)
+CHUNK_SIZE = 5000
+
+# asset_code 충돌 시 덮어쓸 컬럼 (상태/생성일은 유지)
+UPSERT_FIELDS = ["name", "category", "owner", "department_id", "person_id", "purchase_date", "price"]
+
+
+# === 입력 파서 (한 줄씩 읽어 메모리 사용량 일정) ===
+def iter_ndjson(stream):
+    """NDJSON 텍스트 스트림을 (행 번호, dict 또는 None, 오류 메시지) 로 변환"""
+    row_no = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        row_no += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_no, None, f"JSON 파싱 실패: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield row_no, None, "JSON 객체가 아닙니다"
+            continue
+        yield row_no, record, None
+
+
+def iter_csv(stream):
+    """헤더가 있는 CSV 텍스트 스트림을 (행 번호, dict, None) 으로 변환"""
+    reader = csv.DictReader(stream)
+    for row_no, record in enumerate(reader, start=1):
+        yield row_no, record, None
+
+
+def open_text(binary_file):
+    """업로드된 바이너리 파일을 UTF-8(BOM 허용) 텍스트 스트림으로 감쌈"""
+    return io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+
+
+# === 업서트 ===
+def _upsert_stmt(db):
+    table = database.Asset.__table__
+    stmt = database.insert_for(db)(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.asset_code],
+        set_={field: stmt.excluded[field] for field in UPSERT_FIELDS},
+    )
+
+
+def _record_changes(db, rows):
+    # 덮어쓸 기존 행을 한 번에 읽어 집계/감가상각 테이블 증감을 계산 (상태는 업서트 시 유지됨)
+    Asset = database.Asset
+    existing = {
+        r.asset_code: summary.asset_values(r)
+        for r in db.execute(
+            select(Asset.asset_code, Asset.category, Asset.status, Asset.owner, Asset.price, Asset.purchase_date,
+                   Asset.department_id)
+            .where(Asset.asset_code.in_([row["asset_code"] for row in rows]))
+        )
+    }
+    changes = []
+    for row in rows:
+        old = existing.get(row["asset_code"])
+        new = dict(row, status=old["status"] if old else "정상")
+        changes.append((old, new))
+    summary.apply_changes(db, changes)
+    valuation.apply_changes(db, changes)
+
+
+def _flush(db, chunk, report):
+    try:
+        # asset_code가 없는 행은 (분류, 구매연도)별 번호 블록을 한 번에 임대해 채번
+        # (임대 실패(잠금 대기 초과 등)도 청크 행별 오류로 보고)
+        codes.assign_codes(db.get_bind(), [row for _, row in chunk])
+        # 같은 청크 안에서 asset_code가 중복되면 마지막 행만 반영
+        rows = list({row["asset_code"]: row for _, row in chunk}.values())
+        departments.assign(db, rows)  # 청크의 고유 소유자 단위로 부서/담당자 id 조회 (처음 보는 값만 추가)
+        _record_changes(db, rows)
+        db.execute(_upsert_stmt(db), rows)
+        history.record_where(db, "upsert", database.Asset.asset_code.in_([row["asset_code"] for row in rows]))
+        db.commit()
+        report["upserted"] += len(rows)
+    except SQLAlchemyError as e:
+        db.rollback()
+        message = str(e.orig) if getattr(e, "orig", None) else str(e)
+        for row_no, row in chunk:
+            report["errors"].append({"row": row_no, "asset_code": row["asset_code"], "errors": [message]})
+
+
+def bulk_upsert(db, records, model, chunk_size=CHUNK_SIZE):
+    """(행 번호, dict, 파싱오류) 이터레이터를 검증 후 asset_code 기준으로 청크 단위 업서트
+
+    model: 행 검증에 사용할 Pydantic 모델 (main.AssetCreate)
+    반환값: {"received", "upserted", "failed", "errors": [{"row", "asset_code", "errors"}]}
+    """
+    report = {"received": 0, "upserted": 0, "failed": 0, "errors": []}
+    chunk = []
+    for row_no, record, parse_error in records:
+        report["received"] += 1
+        if parse_error:
+            report["errors"].append({"row": row_no, "asset_code": None, "errors": [parse_error]})
+            continue
+        try:
+            item = model.model_validate(record)
+        except ValidationError as e:
+            errors = [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+            report["errors"].append({"row": row_no, "asset_code": record.get("asset_code"), "errors": errors})
+            continue
+        chunk.append((row_no, item.model_dump()))
+        if len(chunk) >= chunk_size:
+            _flush(db, chunk, report)
+            chunk = []
+    if chunk:
+        _flush(db, chunk, report)
+    report["failed"] = len(report["errors"])
+    return report
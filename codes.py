@@ -0,0 +1,94 @@
+import re
+from datetime import date
+from sqlalchemy import case, select, update
+import database
+
+# 자산코드 채번 (예: IT-24013 = 분류 접두어 + 구매 연도 두 자리 + 일련번호 3자리 이상)
+# (접두어, 연도) 시퀀스 행을 UPDATE ... RETURNING 한 문장으로 올려 번호 블록을 임대하므로 동시 등록에도
+# 같은 번호가 두 번 나가지 않음 (unique 위반 후 재시도 없음). 임대는 별도의 짧은 트랜잭션으로 바로 커밋해
+# 등록 트랜잭션이 시퀀스 행 잠금을 오래 잡지 않음 (대신 롤백된 등록의 번호는 건너뜀)
+
+CATEGORY_PREFIXES = {"IT기기": "IT", "가구": "FUR", "소프트웨어": "SW", "차량": "CAR", "기타": "ETC"}
+DEFAULT_PREFIX = "ETC"
+
+# 한 번에 임대할 수 있는 최대 번호 수 (API)
+MAX_LEASE = 100000
+
+CODE_PATTERN = re.compile(rf"^({'|'.join(CATEGORY_PREFIXES.values())})-(\d{{2}})(\d{{3,}})$")
+
+
+def prefix_for(category):
+    return CATEGORY_PREFIXES.get(category, DEFAULT_PREFIX)
+
+
+def year_of(purchase_date):
+    if isinstance(purchase_date, str):
+        purchase_date = date.fromisoformat(purchase_date)
+    return (purchase_date or date.today()).year
+
+
+def format_code(prefix, year, seq):
+    return f"{prefix}-{year % 100:02d}{seq:03d}"
+
+
+def parse_code(code):
+    """채번 형식 코드 -> (접두어, 연도, 일련번호). 형식이 다르면 None (연도는 2000년대로 해석)"""
+    match = CODE_PATTERN.match(code or "")
+    if not match:
+        return None
+    return match[1], 2000 + int(match[2]), int(match[3])
+
+
+def _existing_max(conn, prefix, year):
+    # 시퀀스 도입 전 코드(seed, 수동 입력)와 겹치지 않도록 처음 한 번만 기존 최대 번호를 찾음
+    head = f"{prefix}-{year % 100:02d}"
+    Asset = database.Asset
+    found = conn.execute(select(Asset.asset_code).where(Asset.asset_code.like(f"{head}%"))).scalars()
+    return max((parsed[2] for parsed in map(parse_code, found) if parsed and parsed[1] == year), default=0)
+
+
+def _advance(conn, prefix, year, next_value):
+    """시퀀스 행을 next_value 식으로 갱신하고 갱신 후 값을 반환 (행이 없으면 기존 최대 번호 다음으로 생성)"""
+    table = database.AssetCodeSequence.__table__
+    stmt = (update(table).where(table.c.prefix == prefix, table.c.year == year)
+            .values(next_value=next_value).returning(table.c.next_value))
+    value = conn.execute(stmt).scalar()
+    if value is None:
+        start = _existing_max(conn, prefix, year) + 1
+        conn.execute(database.insert_for(conn)(table).values(prefix=prefix, year=year, next_value=start)
+                     .on_conflict_do_nothing(index_elements=[table.c.prefix, table.c.year]))
+        value = conn.execute(stmt).scalar()
+    return value
+
+
+def lease(engine, prefix, year, count=1):
+    """(prefix, year) 시퀀스에서 연속 번호 count개를 임대하고 첫 번호를 반환
+
+    engine: 호출자 세션의 엔진 (db.get_bind(), 비동기 세션이면 run_sync 안에서 이벤트 루프를 막지 않음)
+    별도 트랜잭션으로 커밋하므로 호출자는 자기 세션에서 쓰기를 시작하기 전에 호출 (SQLite 쓰기 잠금).
+    """
+    table = database.AssetCodeSequence.__table__
+    with engine.begin() as conn:
+        return _advance(conn, prefix, year, table.c.next_value + count) - count
+
+
+def assign_codes(engine, rows):
+    """asset_code가 비어 있는 행을 (접두어, 연도) 그룹마다 블록 하나씩 임대해 채우고,
+    직접 지정한 채번 형식 코드는 시퀀스가 그 번호를 건너뛰도록 반영 (rows를 직접 수정)"""
+    table = database.AssetCodeSequence.__table__
+    missing, explicit = {}, {}
+    for row in rows:
+        if not row.get("asset_code"):
+            key = (prefix_for(row.get("category")), year_of(row.get("purchase_date")))
+            missing.setdefault(key, []).append(row)
+        elif parsed := parse_code(row["asset_code"]):
+            explicit[parsed[:2]] = max(explicit.get(parsed[:2], 0), parsed[2])
+    if explicit:
+        with engine.begin() as conn:
+            for (prefix, year), seq in explicit.items():
+                _advance(conn, prefix, year, case((table.c.next_value > seq, table.c.next_value), else_=seq + 1))
+    for (prefix, year), members in missing.items():
+        start = lease(engine, prefix, year, len(members))
+        for i, row in enumerate(members):
+            row["asset_code"] = format_code(prefix, year, start + i)
+    return rows
@@ -0,0 +1,28 @@
+import os
+import tempfile
+import pytest
+
+# 테스트는 저장소의 assets.db 대신 임시 SQLite 파일을 사용
+os.environ.setdefault("ASSET_DB_URL", f"sqlite:///{tempfile.mkdtemp()}/test_assets.db")
+
+
+# API 테스트는 비동기 세션(기본)과 동기 세션(ASSET_DB_ASYNC=0) 두 모드로 모두 실행
+@pytest.fixture(params=["async", "sync"])
+def client(request):
+    from fastapi.testclient import TestClient
+    import database
+    import main
+
+    if request.param == "async" and database.async_engine is None:
+        pytest.skip("ASSET_DB_ASYNC=0")
+    database.Base.metadata.drop_all(bind=database.engine)
+    with database.engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS assets_fts")
+    database.init_db()
+    if request.param == "sync":
+        main.app.dependency_overrides[main.get_db] = main.get_sync_db
+    try:
+        with TestClient(main.app) as c:
+            yield c
+    finally:
+        main.app.dependency_overrides.clear()
@@ -0,0 +1,209 @@
+from sqlalchemy import and_, func, or_, select, update
+import codes
+import database
+import departments
+import history
+import summary
+import valuation
+
+# 동기 Session 기준 DB 로직. API에서는 main.run_db를 통해
+# 비동기 세션(run_sync) 또는 스레드풀(동기 세션)에서 실행됨
+
+
+# 반납(퇴사), 폐기, 매각, 분실, 보관중 시 사용자 정보 초기화
+OWNER_CLEARING_STATUSES = ["반납(퇴사)", "폐기", "매각", "분실", "보관중"]
+
+
+def status_values(status):
+    """상태 전환 시 함께 바뀌는 컬럼 (단건/일괄 공용 규칙)"""
+    values = {"status": status}
+    if status in OWNER_CLEARING_STATUSES:
+        values["owner"] = ""  # 소유자 정보 제거
+        values["department_id"] = values["person_id"] = None
+    return values
+
+
+def get_asset(db, asset_id):
+    return db.query(database.Asset).filter(database.Asset.id == asset_id).first()
+
+
+def create_asset(db, data):
+    # asset_code를 생략하면 분류/구매연도 시퀀스에서 채번 (세션에서 쓰기 전에 임대)
+    data = codes.assign_codes(db.get_bind(), [dict(data)])[0]
+    if data.get("status"):
+        data = dict(data, **status_values(data["status"]))
+    departments.assign(db, [data])
+    db_asset = database.Asset(**data)
+    db.add(db_asset)
+    db.flush()
+    after = summary.asset_values(db_asset)
+    summary.record_change(db, new=after)
+    valuation.record_change(db, new=after)
+    history.record(db, db_asset, "create")
+    db.commit()
+    db.refresh(db_asset)
+    return db_asset
+
+
+def list_assets(db, clauses, limit, after_id=None, skip=0):
+    query = db.query(database.Asset).filter(*clauses).order_by(database.Asset.id)
+    if after_id is not None:
+        query = query.filter(database.Asset.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+
+# 정렬 가능한 컬럼 (모두 (컬럼, id) 복합 인덱스가 있어 키셋 페이지네이션이 인덱스 탐색으로 처리됨)
+SORTABLE_FIELDS = ["id", "price", "purchase_date", "status", "category", "owner", "department_id"]
+
+
+def _after_key(column, descending, value, last_id):
+    # (정렬값, id) 다음 행 조건. NULL은 오름차순에서 맨 앞, 내림차순에서 맨 뒤
+    Asset = database.Asset
+    if not descending:
+        if value is None:
+            return or_(and_(column.is_(None), Asset.id > last_id), column.is_not(None))
+        return or_(column > value, and_(column == value, Asset.id > last_id))
+    if value is None:
+        return and_(column.is_(None), Asset.id < last_id)
+    return or_(column < value, and_(column == value, Asset.id < last_id), column.is_(None))
+
+
+def list_asset_query(fields, clauses, after_id=None, skip=0, sort=None, after=None):
+    """목록 고속 경로의 Core select (limit 미적용)
+
+    sort: SORTABLE_FIELDS 중 하나 (앞에 "-"면 내림차순), after: 이전 페이지 마지막 (정렬값, id)
+    반환값: (select, 키 컬럼 수). 행 앞쪽 키 컬럼은 sort가 없으면 id, 있으면 (정렬값, id), 나머지가 fields
+    """
+    Asset = database.Asset
+    if sort is None:
+        stmt = select(Asset.id, *[getattr(Asset, f) for f in fields]).where(*clauses).order_by(Asset.id)
+        if after_id is not None:
+            stmt = stmt.where(Asset.id > after_id)
+        elif skip:
+            stmt = stmt.offset(skip)
+        return stmt, 1
+
+    descending = sort.startswith("-")
+    column = getattr(Asset, sort.lstrip("-"))
+    order = [column.desc().nulls_last(), Asset.id.desc()] if descending else [column.asc().nulls_first(), Asset.id]
+    stmt = select(column, Asset.id, *[getattr(Asset, f) for f in fields]).where(*clauses).order_by(*order)
+    if after is not None:
+        stmt = stmt.where(_after_key(column, descending, *after))
+    elif skip:
+        stmt = stmt.offset(skip)
+    return stmt, 2
+
+
+def _row_key(row, width):
+    return row[0] if width == 1 else tuple(row[:2])
+
+
+def list_asset_rows(db, fields, clauses, limit, after_id=None, skip=0, sort=None, after=None):
+    """ORM 객체 대신 Core select로 필요한 컬럼만 조회 (목록 응답 고속 경로)
+
+    반환값: (요청 컬럼 dict 목록, 마지막 행 키). 키는 sort가 없으면 id, 있으면 (정렬값, id)
+    """
+    stmt, width = list_asset_query(fields, clauses, after_id, skip, sort, after)
+    rows = db.execute(stmt.limit(limit)).all()
+    return [dict(zip(fields, row[width:])) for row in rows], (_row_key(rows[-1], width) if rows else None)
+
+
+def page_end_key(db, clauses, limit, after_id=None, skip=0, sort=None, after=None):
+    """list_asset_rows와 같은 조건의 limit번째 행 키 (행이 limit개보다 적으면 None). 키 컬럼만 읽음"""
+    stmt, width = list_asset_query([], clauses, after_id, skip, sort, after)
+    skipped = skip if (after_id if sort is None else after) is None else 0
+    row = db.execute(stmt.offset(skipped + limit - 1).limit(1)).first()
+    return _row_key(row, width) if row else None
+
+
+def update_status(db, asset_id, status):
+    asset = get_asset(db, asset_id)
+    if not asset:
+        return None
+
+    before = summary.asset_values(asset)
+    for field, value in status_values(status).items():
+        setattr(asset, field, value)
+
+    after = summary.asset_values(asset)
+    summary.record_change(db, before, after)
+    valuation.record_change(db, before, after)
+    history.record(db, asset, "status")
+    db.commit()
+    return asset
+
+
+def batch_update_status(db, status, clauses):
+    """조건에 맞는 자산을 UPDATE 한 번으로 전환하고 변경된 id 목록을 반환
+
+    변경 이벤트는 UPDATE에서 표시한 row_version(history.PENDING_VERSION)으로 골라 기록 (id 목록 바인드 없음)
+    """
+    Asset = database.Asset
+    values = status_values(status)
+    group_cols = [Asset.category, Asset.status, Asset.owner, Asset.purchase_date, Asset.department_id]
+
+    # 집계 테이블 증감은 변경 전 그룹별 합계로 계산 (행 단위 로드 없음)
+    groups = db.execute(
+        select(*group_cols, func.count(), func.coalesce(func.sum(Asset.price), 0)).where(*clauses).group_by(*group_cols)
+    ).all()
+    changes = []
+    for category, old_status, owner, purchase_date, department_id, count, price_sum in groups:
+        old = {"category": category, "status": old_status, "owner": owner, "purchase_date": purchase_date,
+               "department_id": department_id, "price": price_sum, "count": count}
+        changes.append((old, dict(old, **values)))
+
+    affected = db.execute(
+        update(Asset).where(*clauses).values(**values, row_version=history.PENDING_VERSION).returning(Asset.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    summary.apply_changes(db, changes)
+    valuation.apply_changes(db, changes)
+    if affected:
+        history.record_where(db, "status", Asset.row_version == history.PENDING_VERSION)
+    db.commit()
+    return sorted(affected)
+
+
+def update_asset(db, asset_id, data):
+    # 자산코드를 바꿀 때만 시퀀스에 반영 (채번 형식 코드로 바꾸면 그 번호를 건너뜀). 시퀀스 갱신은 별도
+    # 트랜잭션이므로 세션에서 읽기 전에, 현재 코드는 짧은 별도 연결로 확인
+    Asset = database.Asset
+    with db.get_bind().connect() as conn:
+        current = conn.execute(select(Asset.id, Asset.asset_code).where(Asset.id == asset_id)).first()
+    if current is None:
+        return None
+    if data.get("asset_code") != current.asset_code:
+        codes.assign_codes(db.get_bind(), [data])
+    departments.assign(db, [data])
+    asset = get_asset(db, asset_id)
+    if not asset:
+        return None
+
+    before = summary.asset_values(asset)
+    # Pydantic 모델에서 값 복사 (id 제외)
+    for field, value in data.items():
+        setattr(asset, field, value)
+
+    after = summary.asset_values(asset)
+    summary.record_change(db, before, after)
+    valuation.record_change(db, before, after)
+    history.record(db, asset, "update")
+    db.commit()
+    db.refresh(asset)
+    return asset
+
+
+def delete_asset(db, asset_id):
+    asset = get_asset(db, asset_id)
+    if not asset:
+        return False
+
+    before = summary.asset_values(asset)
+    summary.record_change(db, old=before)
+    valuation.record_change(db, old=before)
+    history.record(db, asset, "delete")
+    db.delete(asset)
+    db.commit()
+    return True
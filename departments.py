@@ -0,0 +1,115 @@
+from sqlalchemy import bindparam, func, select, update
+import database
+
+# 부서/담당자 차원 (departments, people 테이블)
+# 소유자 문자열("개발1팀 김민수")은 표시/검색용으로 그대로 두고, 모든 쓰기 경로에서 같은 규칙으로 파싱한
+# 정수 키(assets.department_id, person_id)를 함께 기록. 부서별 필터/집계는 문자열 대신 정수 키 인덱스로 처리
+# (assets: ix_assets_department_id_id, 대시보드 집계: asset_summary.department_id)
+
+
+def parse_owner(owner):
+    """"개발1팀 김민수" -> ("개발1팀", "김민수"), "재무팀" -> ("재무팀", None), 빈 값 -> (None, None)
+
+    첫 단어를 부서로 봄 (insights.py 부서 규칙과 동일)
+    """
+    parts = (owner or "").split(None, 1)
+    if not parts:
+        return None, None
+    return parts[0], (parts[1].strip() if len(parts) > 1 else None)
+
+
+def _department_ids(db, names):
+    D = database.Department.__table__
+    found = dict(db.execute(select(D.c.name, D.c.id).where(D.c.name.in_(names))).all())
+    missing = [name for name in names if name not in found]
+    if missing:
+        # 동시에 같은 부서를 추가해도 충돌 없이 한 행만 남음
+        db.execute(database.insert_for(db)(D).on_conflict_do_nothing(index_elements=[D.c.name]),
+                   [{"name": name} for name in missing])
+        found.update(db.execute(select(D.c.name, D.c.id).where(D.c.name.in_(missing))).all())
+    return found
+
+
+def _person_ids(db, keys):
+    # keys: {(부서 id, 담당자명)}. 해당 부서들의 담당자를 한 번에 읽고 없는 담당자만 추가
+    P = database.Person.__table__
+    departments = sorted({d for d, _ in keys})
+
+    def fetch():
+        rows = db.execute(select(P.c.department_id, P.c.name, P.c.id).where(P.c.department_id.in_(departments)))
+        return {(d, name): i for d, name, i in rows}
+
+    found = fetch()
+    missing = sorted(keys - found.keys())
+    if missing:
+        db.execute(database.insert_for(db)(P).on_conflict_do_nothing(index_elements=[P.c.department_id, P.c.name]),
+                   [{"department_id": d, "name": name} for d, name in missing])
+        found = fetch()
+    return found
+
+
+def resolve(db, owners):
+    """소유자 문자열 목록 -> {owner: (department_id, person_id)} (처음 보는 부서/담당자는 추가, 빈 값은 제외)
+
+    db: Session 또는 Connection. 호출자 트랜잭션 안에서 실행 (커밋은 호출자가 수행)
+    """
+    parsed = {owner: parse_owner(owner) for owner in set(owners) if owner}
+    parsed = {owner: p for owner, p in parsed.items() if p[0]}
+    if not parsed:
+        return {}
+    department_ids = _department_ids(db, sorted({d for d, _ in parsed.values()}))
+    person_ids = _person_ids(db, {(department_ids[d], p) for d, p in parsed.values() if p})
+    return {owner: (department_ids[d], person_ids.get((department_ids[d], p))) for owner, (d, p) in parsed.items()}
+
+
+def assign(db, rows):
+    """owner가 있는 행(dict)에 department_id/person_id를 채움 (rows를 직접 수정, 소유자가 없으면 None)"""
+    targets = [row for row in rows if "owner" in row]
+    ids = resolve(db, [row["owner"] for row in targets])
+    for row in targets:
+        row["department_id"], row["person_id"] = ids.get(row["owner"], (None, None))
+    return rows
+
+
+def backfill(db):
+    """차원 테이블 도입 전 자산의 owner 문자열을 파싱해 department_id/person_id와
+    집계 테이블(asset_summary)의 department_id를 채움 (소유자 문자열 단위 UPDATE, owner 인덱스 사용)
+
+    부서 id가 없는 소유 자산만 대상이므로 매 시작마다 실행해도 됨 (일부만 변환된 DB도 이어서 변환).
+    남은 자산이 없으면 department_id 인덱스 탐색 한 번 (100만 건 기준 약 0.2초)
+    """
+    Asset, S = database.Asset.__table__, database.AssetSummary.__table__
+    owners = db.execute(
+        select(Asset.c.owner).where(Asset.c.department_id.is_(None), Asset.c.owner != "").distinct()
+    ).scalars().all()
+    ids = resolve(db, owners)
+    if ids:
+        rows = [{"owner_key": owner, "dept": d, "person": p} for owner, (d, p) in ids.items()]
+        db.execute(update(Asset).where(Asset.c.owner == bindparam("owner_key"), Asset.c.department_id.is_(None))
+                   .values(department_id=bindparam("dept"), person_id=bindparam("person")), rows)
+        db.execute(update(S).where(S.c.owner == bindparam("owner_key")).values(department_id=bindparam("dept")), rows)
+    db.commit()
+
+
+def read_departments(db, status=None, category=None, exclude_status=None):
+    """부서별 건수/금액 (asset_summary의 department_id 그룹, 자산이 없는 부서는 0). 부서명 순"""
+    D, t = database.Department.__table__, database.AssetSummary.__table__
+    conds = [t.c.department_id.is_not(None)]
+    if status:
+        conds.append(t.c.status.in_(status))
+    if category:
+        conds.append(t.c.category.in_(category))
+    if exclude_status:
+        conds.append(t.c.status.notin_(exclude_status))
+    totals = (select(t.c.department_id, func.sum(t.c.count).label("count"), func.sum(t.c.price_sum).label("price_sum"))
+              .where(*conds).group_by(t.c.department_id).subquery())
+    people = (select(database.Person.department_id, func.count().label("people"))
+              .group_by(database.Person.department_id).subquery())
+    rows = db.execute(
+        select(D.c.id, D.c.name, func.coalesce(totals.c.count, 0), func.coalesce(totals.c.price_sum, 0),
+               func.coalesce(people.c.people, 0))
+        .select_from(D.outerjoin(totals, totals.c.department_id == D.c.id)
+                     .outerjoin(people, people.c.department_id == D.c.id))
+        .order_by(D.c.name)
+    ).all()
+    return [{"id": i, "name": name, "count": c, "price_sum": s, "people": n} for i, name, c, s, n in rows]
@@ -0,0 +1,106 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+
+# 감가상각 엔진 (DB 의존 없음: API의 valuation 테이블과 대시보드 로컬 계산에서 공용)
+# 월 단위 상각, 취득 월의 장부가 = 취득가. 월 인덱스는 1970-01 기준 경과 월 수
+
+STRAIGHT_LINE = "straight_line"          # 정액법: 내용연수 동안 균등 상각, 잔존가치 0
+DECLINING_BALANCE = "declining_balance"  # 정률법: 매월 같은 비율로 상각, 내용연수 종료 시 잔존가치
+
+# 분류별 (상각 방법, 내용연수(년)). 등록되지 않은 분류는 "기타" 정책 적용
+POLICIES = {
+    "IT기기": (STRAIGHT_LINE, 4),
+    "가구": (STRAIGHT_LINE, 8),
+    "차량": (DECLINING_BALANCE, 5),
+    "소프트웨어": (STRAIGHT_LINE, 5),
+    "기타": (STRAIGHT_LINE, 5),
+}
+DEFAULT_CATEGORY = "기타"
+
+# 정률법 잔존가치 비율 (취득가 대비)
+SALVAGE_RATE = 0.05
+
+MAX_LIFE_MONTHS = max(years for _, years in POLICIES.values()) * 12
+
+
+def month_index(dates):
+    """날짜 배열(문자열/date/datetime64)을 월 인덱스 배열로 변환. 결측은 -1"""
+    values = pd.to_datetime(pd.Series(dates), errors="coerce", format="ISO8601")
+    months = values.to_numpy(dtype="datetime64[M]")
+    return np.where(np.isnat(months), -1, months.astype(np.int64))
+
+
+def policy(category):
+    """분류 -> (정률법 여부, 내용연수(월))"""
+    method, years = POLICIES.get(category, POLICIES[DEFAULT_CATEGORY])
+    return method == DECLINING_BALANCE, years * 12
+
+
+def policy_arrays(categories):
+    """분류 배열 -> (정률법 여부, 내용연수(월)) 배열. 고유 분류 단위로만 사전 조회"""
+    codes, uniques = pd.factorize(pd.Series(categories, dtype=object).fillna(""))
+    policies = [policy(c) for c in uniques]
+    declining = np.array([d for d, _ in policies], dtype=bool)
+    life = np.array([months for _, months in policies], dtype=np.int64)
+    return declining[codes], life[codes]
+
+
+def remaining_ratio(declining, life, elapsed):
+    """경과 월 수에 따른 장부가/취득가 비율 (elapsed < 0 이면 취득 전이므로 0)"""
+    m = np.minimum(np.maximum(elapsed, 0), life)
+    straight = 1 - m / life
+    declining_ratio = SALVAGE_RATE ** (m / life)
+    return np.where(elapsed < 0, 0.0, np.where(declining, declining_ratio, straight))
+
+
+def book_values(prices, purchase_dates, categories, as_of):
+    """자산 배열 전체의 as_of 시점 장부가 (취득일이 없으면 상각하지 않고 취득가)"""
+    prices = np.asarray(prices, dtype=np.float64)
+    purchased = month_index(purchase_dates)
+    declining, life = policy_arrays(categories)
+    elapsed = month_index([as_of])[0] - purchased
+    ratio = remaining_ratio(declining, life, elapsed)
+    return np.where(purchased < 0, prices, prices * ratio)
+
+
+def month_of(value):
+    """date/datetime/ISO 문자열 하나 -> 월 인덱스 (결측/형식 오류는 -1). 소량 변경용 (pandas 미사용)"""
+    if value is None or value == "":
+        return -1
+    if isinstance(value, str):
+        try:
+            value = date.fromisoformat(value[:10])
+        except ValueError:
+            return -1
+    return (value.year - 1970) * 12 + value.month - 1
+
+
+def asset_schedule(category, price):
+    """자산 한 건(또는 같은 분류/취득월 그룹 합계 가격)의 월간 장부가 증감 (schedule_deltas와 같은 계산)
+
+    반환값: (취득월 기준 경과 월 목록, 장부가 증감 목록). 경과 0월이 취득(+취득가), 이후는 상각액
+    """
+    declining, life = policy(category)
+    offsets = np.arange(life + 1)
+    book = price * np.diff(remaining_ratio(declining, life, offsets), prepend=0.0)
+    return offsets.tolist(), book.tolist()
+
+
+def schedule_deltas(categories, purchase_months, prices):
+    """자산(또는 같은 분류/취득월 그룹)별 월간 장부가 증감표
+
+    취득 월에는 +취득가, 이후 월에는 상각액(음수). 취득가에 선형이므로 그룹 합계 가격을 넣어도 됨.
+    반환값: (행 번호, 월 인덱스, 취득가 증감, 장부가 증감) 배열 (증감이 0인 칸은 제외)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    purchase_months = np.asarray(purchase_months, dtype=np.int64)
+    declining, life = policy_arrays(categories)
+    offsets = np.arange(MAX_LIFE_MONTHS + 1)
+    ratio = remaining_ratio(declining[:, None], life[:, None], offsets[None, :])
+    book = prices[:, None] * np.diff(ratio, axis=1, prepend=0.0)
+    cost = np.zeros_like(book)
+    cost[:, 0] = prices
+
+    rows, cols = np.nonzero(book)
+    return rows, purchase_months[rows] + offsets[cols], cost[rows, cols], book[rows, cols]
@@ -1,21 +1,166 @@
-import pandas as pd
-import sqlite3
-
-def export_to_csv():
-    # Connect to the SQLite database
-    conn = sqlite3.connect('assets.db')
-    
-    # Read the data into a DataFrame
+import argparse
+import csv
+import io
+from sqlalchemy import func, select, Integer, BigInteger, Date, DateTime, Boolean
+import database
+import snapshot
+
+# 한 번에 DB 커서에서 꺼내 쓰는 행 수 (메모리 사용량은 이 값에만 비례)
+CHUNK_SIZE = 10000
+
+FORMATS = ("csv", "parquet", "xlsx")
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def export_columns():
+    return list(database.Asset.__table__.columns)
+
+
+def iter_chunks(conn, stmt=None, chunk_size=CHUNK_SIZE):
+    """서버측 커서(stream_results)로 chunk_size 행씩 읽어 row 리스트를 반환"""
+    if stmt is None:
+        stmt = select(*export_columns()).order_by(database.Asset.id)
+    result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+    for partition in result.partitions():
+        yield partition
+
+
+# === 포맷별 writer (모두 청크 단위로 기록, 반환값은 기록한 행 수) ===
+def iter_csv_bytes(chunks, counter=None):
+    """CSV를 청크 단위 bytes로 생성 (HTTP 스트리밍 응답용)"""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow([c.name for c in export_columns()])
+    for rows in chunks:
+        writer.writerows(rows)
+        if counter is not None:
+            counter[0] += len(rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def write_csv(chunks, path):
+    counter = [0]
+    with open(path, "wb") as f:
+        for data in iter_csv_bytes(chunks, counter):
+            f.write(data)
+    return counter[0]
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    def arrow_type(column):
+        if isinstance(column.type, (Integer, BigInteger)):
+            return pa.int64()
+        if isinstance(column.type, DateTime):
+            return pa.timestamp("us")
+        if isinstance(column.type, Date):
+            return pa.date32()
+        if isinstance(column.type, Boolean):
+            return pa.bool_()
+        return pa.string()
+
+    return pa.schema([(c.name, arrow_type(c)) for c in export_columns()])
+
+
+def write_parquet(chunks, path):
+    """청크 하나를 Parquet row group 하나로 기록"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema()
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+            count += len(rows)
+    return count
+
+
+def write_xlsx(chunks, path):
+    """openpyxl write-only 모드: 행을 바로 디스크로 흘려보내 메모리에 시트를 쌓지 않음"""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("assets")
+    ws.append([c.name for c in export_columns()])
+    count = 0
+    for rows in chunks:
+        for row in rows:
+            ws.append(list(row))
+        count += len(rows)
+    wb.save(path)
+    return count
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet, "xlsx": write_xlsx}
+
+
+def export_assets(path, fmt="csv", stmt=None, chunk_size=CHUNK_SIZE):
+    with database.engine.connect() as conn:
+        return WRITERS[fmt](iter_chunks(conn, stmt, chunk_size), path)
+
+
+# === 오프라인 스냅샷 (snapshot.py) ===
+def export_snapshot(path=snapshot.SNAPSHOT_DIR, full=False, chunk_size=CHUNK_SIZE):
+    """스냅샷 버전 이후 변경분만 delta 세그먼트로 추가 (스냅샷이 없거나 full이면 base를 새로 씀)
+
+    반환값: (기록한 행 수, 세그먼트 종류 "base" | "delta" | "none")
+    버전을 먼저 읽고 데이터를 읽으므로 그 사이 변경은 이번과 다음 delta에 중복될 수 있으나 로드 시 병합됨.
+    """
+    Asset, E = database.Asset, database.AssetEvent
+    columns = [getattr(Asset, name) for name in snapshot.SCHEMA.names]
+    since = None if full else snapshot.read_version(path)
+    if since is not None and snapshot.delta_count(path) >= snapshot.MAX_DELTAS:
+        since = None
+
+    with database.engine.connect() as conn:
+        version = conn.execute(select(func.max(E.id))).scalar() or 0
+        if since is None:
+            stmt = select(*columns).order_by(Asset.id)
+            return snapshot.write_segment(iter_chunks(conn, stmt, chunk_size), version, path, base=True), "base"
+        if version == since:
+            return 0, "none"
+        deleted = conn.execute(
+            select(E.asset_id).where(E.id > since, E.id <= version, E.event_type == "delete")
+        ).scalars().all()
+        stmt = select(*columns).where(Asset.row_version > since).order_by(Asset.id)
+        return snapshot.write_segment(iter_chunks(conn, stmt, chunk_size), version, path, deleted=deleted), "delta"
+
+
+def run_export(path, fmt="csv", full=False):
     try:
-        df = pd.read_sql_query("SELECT * FROM assets", conn)
-        
-        # Save to CSV
-        df.to_csv('local_data.csv', index=False)
-        print(f"Successfully exported {len(df)} records to local_data.csv")
+        if fmt == "snapshot":
+            count, kind = export_snapshot(path, full=full)
+            print(f"Successfully wrote {kind} snapshot segment with {count} records to {path}")
+            return
+        count = export_assets(path, fmt)
+        print(f"Successfully exported {count} records to {path}")
     except Exception as e:
         print(f"Error exporting data: {e}")
-    finally:
-        conn.close()
+
+
+def export_to_csv(path="local_data.csv"):
+    run_export(path, "csv")
+
 
 if __name__ == "__main__":
-    export_to_csv()
+    parser = argparse.ArgumentParser(description="자산 데이터 내보내기")
+    parser.add_argument("--format", choices=FORMATS + ("snapshot",), default="csv",
+                        help="snapshot: 오프라인 모드용 Arrow 스냅샷 (기존 스냅샷이 있으면 변경분만 추가)")
+    parser.add_argument("--output", help=f"저장 경로 (기본: local_data.<format>, snapshot은 {snapshot.SNAPSHOT_DIR}/)")
+    parser.add_argument("--full", action="store_true", help="snapshot을 변경분 대신 전체로 다시 씀")
+    args = parser.parse_args()
+
+    default = snapshot.SNAPSHOT_DIR if args.format == "snapshot" else f"local_data.{args.format}"
+    run_export(args.output or default, args.format, full=args.full)
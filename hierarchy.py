@@ -0,0 +1,73 @@
+import json
+from collections import defaultdict
+
+# 트리맵 계층 노드 구성 (DB 의존 없음: API의 /assets/treemap과 대시보드 로컬 계산에서 공용)
+# 분류 -> 상태 -> 자산명. 레벨마다 부모별 상위 top개 노드만 남기고 나머지는 롤업 노드 하나로 합침
+# (응답 크기 = 노드 수). 그룹 집계만 호출자가 제공 (서버: SQL, 대시보드: pandas)
+
+LEVELS = ("category", "status", "name")
+TOP_N = 10
+ROOT_LABEL = "All Assets"
+EMPTY_LABEL = "(미지정)"
+
+
+def other_label(members):
+    # 실제 분류명("기타" 분류 등)과 겹치지 않는 롤업 라벨
+    return f"그 외 {members}개"
+
+
+def node_id(path):
+    # 라벨에 구분자가 섞여도 충돌하지 않도록 경로 자체를 id로 사용 (롤업은 마지막 원소 null)
+    return json.dumps(path, ensure_ascii=False)
+
+
+def _node(path, parent, label, value, count, other=False):
+    return {"id": node_id(path), "parent": parent, "label": label,
+            "value": int(value), "count": int(count), "path": path, "other": other}
+
+
+def level_nodes(path, rows, top, expanded):
+    """한 레벨의 그룹 행 -> 부모별 상위 top개 노드 + 롤업 노드 (같은 부모 안에서 값 큰 순, 롤업은 마지막)
+
+    rows: (부모 키 튜플, 키, 값, 건수, 묶인 그룹 수). 키가 None인 행은 호출자가 이미 합친 나머지
+    expanded: 펼칠 부모 경로 집합 (롤업 노드 아래는 펼치지 않음)
+    """
+    children = defaultdict(list)
+    for parent, key, value, count, members in rows:
+        parent_path = path + list(parent)
+        if tuple(parent_path) in expanded:
+            children[tuple(parent_path)].append((key, value or 0, count, members))
+
+    nodes = []
+    for parent_path, items in children.items():
+        parent_path = list(parent_path)
+        parent = node_id(parent_path)
+        ranked = sorted((i for i in items if i[0] is not None), key=lambda i: (-i[1], i[0]))
+        rest = ranked[top:] + [i for i in items if i[0] is None]
+        for key, value, count, _ in ranked[:top]:
+            nodes.append(_node(parent_path + [key], parent, key or EMPTY_LABEL, value, count))
+        if rest:
+            nodes.append(_node(parent_path + [None], parent, other_label(sum(i[3] for i in rest)),
+                               sum(i[1] for i in rest), sum(i[2] for i in rest), other=True))
+    nodes.sort(key=lambda n: (n["parent"], n["other"], -n["value"]))
+    return nodes
+
+
+def build_tree(level_rows, path=(), depth=2, top=TOP_N):
+    """path 노드 아래 depth 레벨까지의 노드 목록 (id/parent/label/value/count/path/other)
+
+    level_rows(cols): cols(LEVELS 앞부분)로 그룹핑한 행 목록 (level_nodes의 rows 형식)
+    path: 드릴다운 위치 (예: ["IT기기"] 이면 IT기기 아래 상태 -> 자산명). path 조건 필터도 호출자가 적용
+    """
+    path = list(path)
+    levels = LEVELS[len(path):len(path) + depth]
+    root = _node(path, "", path[-1] if path else ROOT_LABEL, 0, 0)
+    nodes, expanded = [root], {tuple(path)}
+    for k in range(len(levels)):
+        level = level_nodes(path, level_rows(list(levels[:k + 1])), top, expanded)
+        nodes.extend(level)
+        expanded = {tuple(n["path"]) for n in level if not n["other"]}
+        if k == 0:
+            root["value"] = sum(n["value"] for n in level)
+            root["count"] = sum(n["count"] for n in level)
+    return {"levels": list(LEVELS), "path": path, "top": top, "nodes": nodes}
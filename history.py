@@ -0,0 +1,117 @@
+from datetime import datetime
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.orm import aliased
+import database
+
+# 이벤트에 스냅샷으로 남기는 자산 컬럼
+EVENT_FIELDS = ["asset_code", "name", "category", "status", "owner", "purchase_date", "price"]
+
+# 조건 일괄 변경에서 바뀐 행 표시용 row_version (UPDATE에서 함께 설정 -> record_where(row_version == PENDING_VERSION))
+# 바뀐 id 목록을 바인드 변수로 넘기지 않으므로 행 수와 무관하게 파라미터 수 일정. 이벤트 기록 때 실제 값으로 바뀌어
+# 같은 트랜잭션 밖에서는 보이지 않음
+PENDING_VERSION = -1
+
+
+def record(db, asset, event_type, changed_at=None):
+    """ORM 자산 한 건의 현재 상태를 이벤트로 추가하고 row_version을 갱신 (커밋은 호출자가 수행)"""
+    event = database.AssetEvent(
+        asset_id=asset.id, event_type=event_type, changed_at=changed_at or datetime.now(),
+        **{field: getattr(asset, field) for field in EVENT_FIELDS},
+    )
+    db.add(event)
+    if event_type != "delete":
+        db.flush()
+        asset.row_version = event.id
+
+
+def _sync_row_versions(db, *clauses):
+    # row_version = 해당 자산의 마지막 이벤트 id ((asset_id, changed_at) 인덱스로 자산별 탐색)
+    E, Asset = database.AssetEvent, database.Asset
+    latest = select(func.max(E.id)).where(E.asset_id == Asset.id).scalar_subquery()
+    db.execute(update(Asset).where(*clauses).values(row_version=latest)
+               .execution_options(synchronize_session=False))
+
+
+def record_where(db, event_type, *clauses, changed_at=None):
+    """조건에 맞는 자산들의 현재 상태를 INSERT ... SELECT 한 번으로 이벤트에 추가 (일괄 경로용)"""
+    Asset = database.Asset
+    source = select(
+        Asset.id, literal(event_type), literal(changed_at or datetime.now()),
+        *[getattr(Asset, field) for field in EVENT_FIELDS],
+    ).where(*clauses)
+    db.execute(insert(database.AssetEvent).from_select(
+        ["asset_id", "event_type", "changed_at", *EVENT_FIELDS], source))
+    _sync_row_versions(db, *clauses)
+
+
+def backfill(db):
+    """이력 테이블 도입 전 자산에 생성 이벤트를 채우고, row_version이 없는 자산을 보정"""
+    Asset = database.Asset
+    if db.query(database.AssetEvent).first() is not None:
+        if db.query(Asset.id).filter(Asset.row_version.is_(None)).first() is not None:
+            _sync_row_versions(db, Asset.row_version.is_(None))
+            db.commit()
+        return
+    source = select(
+        Asset.id, literal("create"), func.coalesce(Asset.created_at, datetime.now()),
+        *[getattr(Asset, field) for field in EVENT_FIELDS],
+    )
+    db.execute(insert(database.AssetEvent).from_select(
+        ["asset_id", "event_type", "changed_at", *EVENT_FIELDS], source))
+    _sync_row_versions(db)
+    db.commit()
+
+
+def state_as_of(db, as_of, limit, after_id=0):
+    """as_of 시점의 자산 상태를 asset_id 순으로 limit개 자산씩 재구성
+
+    자산별 마지막 이벤트는 (asset_id, changed_at) 인덱스 탐색으로 찾으므로 전체 로그를 읽지 않음.
+    반환값: (자산 dict 목록, 다음 페이지 커서 또는 None)
+    """
+    E = database.AssetEvent
+    latest = aliased(E)
+    page = (
+        select(E.asset_id).where(E.asset_id > after_id)
+        .group_by(E.asset_id).order_by(E.asset_id).limit(limit).subquery()
+    )
+    latest_id = (
+        select(latest.id)
+        .where(latest.asset_id == page.c.asset_id, latest.changed_at <= as_of)
+        .order_by(latest.changed_at.desc(), latest.id.desc())
+        .limit(1).scalar_subquery()
+    )
+    pairs = db.execute(select(page.c.asset_id, latest_id)).all()
+    event_ids = [event_id for _, event_id in pairs if event_id is not None]
+
+    events = db.execute(
+        select(E).where(E.id.in_(event_ids), E.event_type != "delete").order_by(E.asset_id)
+    ).scalars().all() if event_ids else []
+    assets = [dict({field: getattr(e, field) for field in EVENT_FIELDS}, id=e.asset_id) for e in events]
+    cursor = pairs[-1][0] if len(pairs) == limit else None
+    return assets, cursor
+
+
+def current_version(db):
+    """가장 최근 변경의 버전 (모든 변경은 이벤트를 남기므로 이벤트 id 최댓값)"""
+    return db.execute(select(func.max(database.AssetEvent.id))).scalar() or 0
+
+
+def changes_since(db, since, limit, fields):
+    """since 이후 변경된 자산(upserts)과 삭제된 자산 id(tombstones)를 반환
+
+    upserts는 row_version 순으로 limit개까지, fields 컬럼만 dict로 (ORM 객체 없이 Core select).
+    클라이언트는 deleted를 먼저 지우고 upserts를 반영.
+    반환값: (upserts, deleted, 새 버전, has_more)
+    """
+    Asset, E = database.Asset, database.AssetEvent
+    rows = db.execute(
+        select(Asset.row_version, *[getattr(Asset, f) for f in fields])
+        .where(Asset.row_version > since).order_by(Asset.row_version).limit(limit)
+    ).all()
+    upserts = [dict(zip(fields, row[1:])) for row in rows]
+    has_more = len(rows) == limit
+    version = rows[-1][0] if has_more else current_version(db)
+    deleted = db.execute(
+        select(E.asset_id).where(E.id > since, E.id <= version, E.event_type == "delete").order_by(E.id)
+    ).scalars().all()
+    return upserts, deleted, version, has_more
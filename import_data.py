@@ -0,0 +1,199 @@
+import pandas as pd
+import depreciation
+
+# 구매 내역 스프레드시트(XLSX/CSV) 일괄 등록용 청크 리더와 검증/정규화 (DB 의존 없음)
+# 파일 전체를 프레임으로 올리지 않고 CHUNK_SIZE 행씩 읽어, 청크마다 열 단위(벡터) 연산으로 검증한 뒤
+# /assets/bulk (NDJSON) 로 보낼 행과 오류 행을 나눔. 행 번호는 스프레드시트 기준 (헤더 = 1행)
+
+CHUNK_SIZE = 2000
+
+# 검증 결과에 보관할 오류 행 수 (미리보기용, 건수는 전체 집계)
+ERROR_PREVIEW = 500
+
+FIELDS = ["asset_code", "name", "category", "owner", "purchase_date", "price"]
+# asset_code는 비어 있으면 서버가 (분류, 구매연도)별 번호 블록으로 채번 (codes.py)
+REQUIRED = ["name", "category", "purchase_date", "price"]
+
+# 헤더 별칭 (소문자/공백 제거 후 비교) -> 표준 컬럼명
+COLUMN_ALIASES = {
+    "assetcode": "asset_code", "asset_code": "asset_code", "code": "asset_code",
+    "자산코드": "asset_code", "자산관리번호": "asset_code", "관리번호": "asset_code",
+    "name": "name", "assetname": "name", "자산명": "name", "품명": "name", "품목": "name",
+    "category": "category", "분류": "category", "구분": "category",
+    "owner": "owner", "소유자": "owner", "사용자": "owner", "소유자/팀": "owner", "부서": "owner",
+    "purchase_date": "purchase_date", "purchasedate": "purchase_date", "date": "purchase_date",
+    "구매일": "purchase_date", "구입일": "purchase_date", "취득일": "purchase_date",
+    "price": "price", "가격": "price", "금액": "price", "구매가": "price", "취득가": "price", "단가": "price",
+}
+
+# 분류 별칭 (소문자 비교) -> 감가상각 정책 분류 (depreciation.POLICIES)
+CATEGORY_ALIASES = {
+    **{c.lower(): c for c in depreciation.POLICIES},
+    "it device": "IT기기", "it": "IT기기", "it 기기": "IT기기", "전산": "IT기기", "전산장비": "IT기기",
+    "furniture": "가구", "집기": "가구",
+    "vehicle": "차량", "car": "차량",
+    "software": "소프트웨어", "sw": "소프트웨어", "license": "소프트웨어", "라이선스": "소프트웨어",
+    "others": "기타", "other": "기타", "etc": "기타",
+}
+
+# 엑셀 날짜 일련번호 기준일과 유효 범위 (1954 ~ 2119년)
+EXCEL_EPOCH = "1899-12-30"
+EXCEL_SERIAL_RANGE = (20000, 80000)
+
+
+# === 청크 리더 (반환: (시작 행 번호, 원본 헤더 그대로의 DataFrame) 이터레이터) ===
+def iter_xlsx_chunks(source, chunk_size=CHUNK_SIZE):
+    """openpyxl read-only 모드로 첫 시트를 행 단위 스트리밍 (셀 객체/시트 전체를 메모리에 두지 않음)"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(h) if h is not None else "" for h in next(rows, ())]
+        start, chunk = 2, []
+        for row in rows:
+            if any(v is not None and v != "" for v in row):
+                chunk.append(row[:len(header)])
+            else:
+                chunk.append(None)  # 빈 행은 행 번호만 차지
+            if len(chunk) >= chunk_size:
+                yield start, _frame(header, chunk, start)
+                start, chunk = start + len(chunk), []
+        if chunk:
+            yield start, _frame(header, chunk, start)
+    finally:
+        wb.close()
+
+
+def iter_csv_chunks(source, chunk_size=CHUNK_SIZE):
+    """CSV는 pandas chunksize로 읽음 (모든 값은 문자열로 받아 정규화에서 변환, 빈 줄도 행 번호 유지)"""
+    start = 2
+    for chunk in pd.read_csv(source, dtype=str, encoding="utf-8-sig", keep_default_na=False,
+                             skip_blank_lines=False, chunksize=chunk_size):
+        chunk.index = range(start, start + len(chunk))
+        yield start, chunk
+        start += len(chunk)
+
+
+def iter_chunks(source, filename, chunk_size=CHUNK_SIZE):
+    """파일 확장자에 맞는 청크 리더 (같은 업로드 파일을 검증/전송에 두 번 읽도록 처음으로 되감음)"""
+    if hasattr(source, "seek"):
+        source.seek(0)
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return iter_xlsx_chunks(source, chunk_size)
+    if filename.lower().endswith(".csv"):
+        return iter_csv_chunks(source, chunk_size)
+    raise ValueError("지원하지 않는 파일 형식입니다 (xlsx, csv)")
+
+
+def _frame(header, rows, start):
+    width = len(header)
+    filled = [row + (None,) * (width - len(row)) if row is not None else (None,) * width for row in rows]
+    return pd.DataFrame(filled, columns=header, index=range(start, start + len(rows)))
+
+
+# === 검증/정규화 (청크 단위 벡터 연산) ===
+def _text(values):
+    return values.astype("string").str.strip().replace("", pd.NA)
+
+
+def _dates(values):
+    """문자열(2024-03-02, 2024.3.2, 2024/03/02), 날짜 셀, 엑셀 일련번호를 모두 날짜로. 실패는 NaT"""
+    text = _text(values).str.replace(r"[./]", "-", regex=True)
+    parsed = pd.to_datetime(text, errors="coerce", format="ISO8601")
+    serial = pd.to_numeric(values, errors="coerce")
+    serial = serial.where(serial.between(*EXCEL_SERIAL_RANGE))
+    return parsed.fillna(pd.to_datetime(serial, unit="D", origin=EXCEL_EPOCH)).dt.date
+
+
+def _prices(values):
+    """"1,250,000", "1250000원", 1250000.0 -> 정수. 음수/소수/변환 실패는 NA"""
+    text = _text(values).str.replace(r"[,\s원₩]", "", regex=True)
+    numbers = pd.to_numeric(text, errors="coerce")
+    valid = (numbers >= 0) & (numbers == numbers.round())
+    return numbers.where(valid).astype("Int64")
+
+
+MESSAGES = {
+    "name": "자산명 누락",
+    "category": "분류를 인식할 수 없음",
+    "purchase_date": "구매일 형식 오류",
+    "price": "가격은 0 이상의 정수",
+    "duplicate": "파일 안에서 자산코드 중복 (뒤의 행 사용)",
+}
+
+
+def _columns(frame):
+    renamed = frame.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip().lower().replace(" ", ""), str(c).strip()))
+    return renamed.loc[:, ~renamed.columns.duplicated()]
+
+
+def missing_columns(frame):
+    """헤더에서 찾지 못한 필수 컬럼 (별칭 적용 후)"""
+    return [c for c in REQUIRED if c not in _columns(frame).columns]
+
+
+def normalize_chunk(frame):
+    """원본 청크 -> (유효 행 DataFrame[FIELDS], 오류 DataFrame[row, asset_code, errors])
+
+    행 번호는 frame.index (리더가 스프레드시트 행 번호로 설정). 빈 행은 결과에서 제외.
+    """
+    raw = _columns(frame).reindex(columns=FIELDS)
+    raw = raw[~raw.apply(_text).isna().all(axis=1)]
+
+    category_text = _text(raw["category"])
+    out = pd.DataFrame({
+        "asset_code": _text(raw["asset_code"]),
+        "name": _text(raw["name"]),
+        "category": category_text.str.lower().map(CATEGORY_ALIASES),
+        "owner": _text(raw["owner"]).fillna(""),
+        "purchase_date": _dates(raw["purchase_date"]),
+        "price": _prices(raw["price"]),
+    }, index=raw.index)
+
+    flags = out[REQUIRED].isna()
+    flags["duplicate"] = out["asset_code"].notna() & out["asset_code"].duplicated(keep="last")
+    bad = flags.any(axis=1)
+
+    # 오류 메시지도 열 단위로 이어 붙임 (인식 못한 분류는 원래 값을 함께 표시)
+    text = pd.Series("", index=out.index, dtype="string")
+    for key in flags.columns:
+        message = MESSAGES[key]
+        if key == "category":
+            message = message + (" (" + category_text + ")").fillna("")
+        text = text.mask(flags[key], text + ", " + message)
+    errors = pd.DataFrame({
+        "row": out.index[bad],
+        "asset_code": out["asset_code"][bad].astype(object).where(out["asset_code"][bad].notna(), None).to_numpy(),
+        "errors": text[bad].str.removeprefix(", ").to_numpy(dtype=object),
+    })
+    return out[~bad], errors
+
+
+def to_ndjson(valid):
+    """유효 행 -> /assets/bulk NDJSON 본문 (bytes)"""
+    body = valid.assign(purchase_date=valid["purchase_date"].astype(str), price=valid["price"].astype("int64"),
+                        asset_code=valid["asset_code"].astype(object).where(valid["asset_code"].notna(), None))
+    return body.to_json(orient="records", lines=True, force_ascii=False).encode("utf-8")
+
+
+def scan(chunks, preview=ERROR_PREVIEW):
+    """업로드 전 검증: 청크를 한 번 훑어 {"total", "valid", "failed", "missing", "errors"} 반환
+
+    errors는 앞쪽 preview건만 담은 오류 DataFrame (행 수와 무관하게 메모리 일정)
+    """
+    result = {"total": 0, "valid": 0, "failed": 0, "missing": [], "errors": []}
+    kept = 0
+    for start, chunk in chunks:
+        if start == 2:
+            result["missing"] = missing_columns(chunk)
+        valid, bad = normalize_chunk(chunk)
+        result["total"] += len(valid) + len(bad)
+        result["valid"] += len(valid)
+        result["failed"] += len(bad)
+        if kept < preview and len(bad):
+            result["errors"].append(bad.head(preview - kept))
+            kept += len(result["errors"][-1])
+    result["errors"] = (pd.concat(result["errors"], ignore_index=True) if result["errors"]
+                        else pd.DataFrame(columns=["row", "asset_code", "errors"]))
+    return result
@@ -0,0 +1,177 @@
+from dataclasses import dataclass, field
+from datetime import date
+import numpy as np
+import pandas as pd
+
+# 규칙 기반 자산 인사이트 엔진
+# 프레임을 한 번만 열 단위 배열(Columns)로 변환하고, 등록된 규칙은 모두 그 배열에 대한
+# NumPy 집계(sum/bincount)로만 평가 (행 필터링 복사본을 만들지 않음)
+
+SEVERITY_ORDER = {"critical": 0, "warning": 1, "info": 2}
+
+
+@dataclass(frozen=True)
+class Insight:
+    rule: str
+    severity: str  # "critical" | "warning" | "info"
+    message: str
+
+
+@dataclass(frozen=True)
+class Rule:
+    """측정 함수 + 단계별 (임계값, 심각도, 메시지). 측정값이 임계값을 넘는 첫 단계만 표시"""
+    name: str
+    pack: str
+    measure: object
+    levels: tuple
+    params: dict = field(default_factory=dict)
+
+
+RULES = []
+
+
+def rule(pack, levels, **params):
+    """측정 함수를 규칙으로 등록. levels: ((임계값, 심각도, 메시지 템플릿), ...) 큰 임계값부터
+
+    측정 함수는 (Columns, **params)를 받아 (측정값, 메시지 변수 dict) 또는 None(평가 불가)을 반환.
+    """
+    def register(measure):
+        RULES.append(Rule(measure.__name__, pack, measure, tuple(levels), params))
+        return measure
+    return register
+
+
+class Columns:
+    """인사이트 평가에 쓰는 열을 한 번만 변환해 둔 배열 묶음 (문자열 열은 categorical 코드)"""
+
+    def __init__(self, df, today=None, money=None):
+        self.n = len(df)
+        self.today = np.datetime64(today or date.today(), "D")
+        self.money = money or (lambda v: f"{v:,}")
+        self.price = pd.to_numeric(df["price"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+        self.status_codes, self.status_labels = self._codes(df, "status")
+        self.dept_codes, self.dept_labels = self._departments(*self._codes(df, "owner"))
+        self.purchase_date = self._dates(df, "purchase_date")
+
+    def _codes(self, df, col):
+        # categorical이면 코드를 그대로, 아니면 factorize로 (코드, 고유값) 생성. 결측은 코드 -1
+        if col not in df.columns:
+            return None, []
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values.cat.codes.to_numpy(), [str(c) for c in values.cat.categories]
+        codes, uniques = pd.factorize(values)
+        return codes, [str(u) for u in uniques]
+
+    def _dates(self, df, col):
+        # 문자열 날짜는 고유값만 파싱 (자산 수보다 날짜 종류가 훨씬 적음)
+        if col not in df.columns:
+            return None
+        values = df[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values.to_numpy(dtype="datetime64[D]")
+        codes, uniques = pd.factorize(values)
+        parsed = pd.to_datetime(pd.Series(uniques), errors="coerce", format="ISO8601").to_numpy(dtype="datetime64[D]")
+        return np.append(parsed, np.datetime64("NaT", "D"))[codes]  # 코드 -1(결측)은 NaT
+
+    def _departments(self, owner_codes, owner_labels):
+        # 소유자 "개발1팀 김민수" -> 부서 "개발1팀" (고유 라벨 단위로만 문자열 처리 후 코드 재매핑)
+        if owner_codes is None:
+            return None, []
+        depts = [label.split(" ")[0] for label in owner_labels]
+        labels = sorted(set(depts) | {""})
+        index = {d: i for i, d in enumerate(labels)}
+        mapping = np.array([index[d] for d in depts] + [index[""]], dtype=np.int64)
+        return mapping[owner_codes], labels  # 코드 -1(결측)은 마지막 항목("")으로 매핑
+
+    def status_mask(self, status):
+        # 해당 상태 라벨이 없으면 빈 마스크 (문자열 비교 없이 코드 비교)
+        if self.status_codes is None or status not in self.status_labels:
+            return np.zeros(self.n, dtype=bool)
+        return self.status_codes == self.status_labels.index(status)
+
+
+# === 기본 규칙 팩 (value / health) ===
+@rule("value", [(0, "info", "💰 **고가 자산 집중**: {min_price}원 이상 자산이 {count}개 감지되었습니다. (총 {total})")],
+      min_price=5000000)
+def high_value(cols, min_price):
+    mask = cols.price >= min_price
+    count = int(mask.sum())
+    return count, {"count": count, "total": cols.money(int(cols.price[mask].sum())), "min_price": cols.money(min_price)}
+
+
+@rule("health", [
+    (0.3, "warning", "⚠️ **자산 건전성 경고**: 비정상 자산 비율이 {ratio:.1f}%로 높습니다. 점검이 필요합니다."),
+    (0.1, "info", "👀 **관심 필요**: 비정상 자산 비율이 {ratio:.1f}%입니다."),
+], normal_status="정상")
+def issue_ratio(cols, normal_status):
+    if cols.status_codes is None:
+        return None
+    ratio = 1 - cols.status_mask(normal_status).mean()
+    return ratio, {"ratio": ratio * 100}
+
+
+# === 노후 자산 팩 (purchase_date 기준) ===
+@rule("aging", [
+    (0.4, "warning", "🕰️ **노후 자산 과다**: 구매 후 {years}년 이상 지난 자산이 {count}개({ratio:.1f}%, 총 {total})입니다. 교체 예산을 검토하세요."),
+    (0.15, "info", "🕰️ **노후 자산**: 구매 후 {years}년 이상 지난 자산이 {count}개({ratio:.1f}%)입니다."),
+], years=5)
+def aging(cols, years):
+    if cols.purchase_date is None:
+        return None
+    mask = (cols.today - cols.purchase_date) >= np.timedelta64(365 * years, "D")  # NaT 비교는 False
+    count = int(mask.sum())
+    ratio = count / cols.n
+    return ratio, {"years": years, "count": count, "ratio": ratio * 100, "total": cols.money(int(cols.price[mask].sum()))}
+
+
+# === 부서 편중 팩 (부서별 자산 가치 비중) ===
+@rule("concentration", [
+    (0.5, "warning", "🏢 **부서 편중**: '{dept}'에 전체 자산 가치의 {share:.1f}%({total})가 집중되어 있습니다."),
+    (0.35, "info", "🏢 **부서 비중**: '{dept}'의 자산 가치 비중이 {share:.1f}%로 가장 큽니다."),
+], min_depts=3)
+def dept_concentration(cols, min_depts):
+    if cols.dept_codes is None:
+        return None
+    # 부서별 가치 합계를 bincount 한 번으로 계산, 미배정("")은 제외
+    sums = np.bincount(cols.dept_codes, weights=cols.price, minlength=len(cols.dept_labels))
+    sums[cols.dept_labels.index("")] = 0
+    if np.count_nonzero(sums) < min_depts:
+        return None
+    top = int(sums.argmax())
+    share = sums[top] / sums.sum()
+    return share, {"dept": cols.dept_labels[top], "share": share * 100, "total": cols.money(int(sums[top]))}
+
+
+# === 유휴 자산 팩 (보관중 상태) ===
+@rule("idle", [
+    (0.2, "warning", "📦 **유휴 자산 과다**: 보관중 자산이 {count}개({ratio:.1f}%, 총 {total})입니다. 재배치 또는 매각을 검토하세요."),
+    (0.05, "info", "📦 **유휴 자산**: 보관중 자산 {count}개(총 {total})가 사용되지 않고 있습니다."),
+], idle_status="보관중")
+def idle_storage(cols, idle_status):
+    if cols.status_codes is None:
+        return None
+    mask = cols.status_mask(idle_status)
+    count = int(mask.sum())
+    ratio = count / cols.n
+    return ratio, {"count": count, "ratio": ratio * 100, "total": cols.money(int(cols.price[mask].sum()))}
+
+
+def evaluate(df, rules=None, today=None, money=None):
+    """등록된 규칙(또는 지정한 규칙 목록)을 평가해 심각도 순 Insight 목록을 반환"""
+    if df.empty:
+        return [Insight("empty", "info", "데이터가 없습니다.")]
+    cols = Columns(df, today=today, money=money)
+    results = []
+    for r in RULES if rules is None else rules:
+        measured = r.measure(cols, **r.params)
+        if measured is None:
+            continue
+        value, values = measured
+        for threshold, severity, message in r.levels:
+            if value > threshold:
+                results.append(Insight(r.name, severity, message.format(**values)))
+                break
+    if not results:
+        results.append(Insight("ok", "info", "✅ **특이사항 없음**: 현재 자산 상태가 양호합니다."))
+    return sorted(results, key=lambda i: SEVERITY_ORDER[i.severity])
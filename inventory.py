@@ -0,0 +1,167 @@
+from datetime import datetime
+from sqlalchemy import Column, MetaData, String, Table, case, func, insert, literal, select, update
+import database
+
+# 재고 실사 대사: 현장에서 스캔한 asset_code 목록과 자산 대장을 집합 연산(조인)으로 비교
+# 업로드마다 스캔 코드를 임시 테이블에 청크 단위로 넣고, INSERT ... SELECT 한 번으로 실사 스캔 테이블에 추가
+# (이미 스캔된 코드 제외). 분류는 스캔 테이블과 assets를 asset_code 인덱스로 조인해 한 번에 계산
+#   found        대장에 있고 현장에 있어야 하는 상태
+#   wrong_status 대장에 있지만 현장에 없어야 하는 상태 (폐기, 매각, 분실, 임시저장 등)
+#   unknown      대장에 없는 코드
+#   missing      현장에 있어야 하는데 스캔되지 않은 자산 (assets 기준 안티 조인)
+
+# 현장에 있어야 하는 상태 (스캔되지 않으면 missing)
+EXPECTED_STATUSES = ["정상", "수리중", "보관중", "반납(퇴사)"]
+RESULTS = ("found", "wrong_status", "unknown", "missing")
+
+# 임시 테이블에 한 번에 넣을 코드 수 (executemany 단위)
+CHUNK_SIZE = 10000
+
+# 업로드 응답에 코드까지 담아 보여 줄 확인 필요 항목 수 (wrong_status, unknown)
+ISSUE_PREVIEW = 100
+
+# 스캔 파일의 헤더로 보고 건너뛸 값 (소문자)
+HEADER_VALUES = {"asset_code", "code", "자산코드", "자산관리번호"}
+
+# 업로드 한 번 동안만 쓰는 임시 테이블 (연결별로 존재, 트랜잭션 안에서 만들고 지움)
+_temp = MetaData()
+SCAN_BATCH = Table("inventory_scan_batch", _temp, Column("asset_code", String), prefixes=["TEMPORARY"])
+
+
+def iter_codes(stream):
+    """스캔 내보내기 텍스트(한 줄에 코드 하나, 또는 첫 열이 코드인 CSV) -> asset_code 이터레이터"""
+    for line in stream:
+        code = line.split(",", 1)[0].strip().strip('"').strip()
+        if code and code.lower() not in HEADER_VALUES:
+            yield code
+
+
+def create_audit(db, name):
+    audit = database.InventoryAudit(name=name)
+    db.add(audit)
+    db.commit()
+    return {"id": audit.id, "name": audit.name, "created_at": audit.created_at, "batches": audit.batches}
+
+
+def _audit(db, audit_id):
+    t = database.InventoryAudit.__table__
+    row = db.execute(select(t).where(t.c.id == audit_id)).first()
+    return dict(row._mapping) if row else None
+
+
+def _result():
+    # 스캔 행(assets 외부 조인)의 분류
+    A = database.Asset.__table__
+    return case((A.c.id.is_(None), "unknown"), (A.c.status.in_(EXPECTED_STATUSES), "found"),
+                else_="wrong_status").label("result")
+
+
+def _scanned_assets():
+    S, A = database.InventoryScan.__table__, database.Asset.__table__
+    return S.outerjoin(A, A.c.asset_code == S.c.asset_code)
+
+
+def _not_scanned(audit_id, status=None):
+    # 현장에 있어야 하는 자산 중 이 실사에서 스캔되지 않은 자산 (코드가 없는 자산은 스캔할 수 없으므로 제외)
+    S, A = database.InventoryScan.__table__, database.Asset.__table__
+    scanned = select(S.c.asset_code).where(S.c.audit_id == audit_id, S.c.asset_code == A.c.asset_code).exists()
+    return [(A.c.status if status is None else status).in_(EXPECTED_STATUSES), A.c.asset_code.is_not(None), ~scanned]
+
+
+def _counts(db, *clauses):
+    result = _result()
+    rows = db.execute(select(result, func.count()).select_from(_scanned_assets()).where(*clauses).group_by(result))
+    counts = dict.fromkeys(RESULTS[:3], 0)
+    counts.update(dict(rows.all()))
+    return counts
+
+
+def summarize(db, audit_id):
+    """실사 전체 분류별 건수 (스캔 조인 1회 + 미스캔 안티 조인 1회)"""
+    S, A = database.InventoryScan.__table__, database.Asset.__table__
+    counts = _counts(db, S.c.audit_id == audit_id)
+    counts["missing"] = db.execute(select(func.count()).select_from(A).where(*_not_scanned(audit_id))).scalar()
+    counts["scanned"] = counts["found"] + counts["wrong_status"] + counts["unknown"]
+    counts["expected"] = counts["found"] + counts["missing"]
+    return counts
+
+
+def read_audit(db, audit_id):
+    audit = _audit(db, audit_id)
+    if audit is None:
+        return None
+    return dict(audit, summary=summarize(db, audit_id))
+
+
+def add_scans(db, audit_id, codes, chunk_size=CHUNK_SIZE):
+    """스캔 코드 이터레이터를 실사에 이어 붙이고 이번 업로드의 변경분과 전체 건수를 반환 (한 트랜잭션)
+
+    반환값: {"audit_id", "batch", "received", "distinct", "new", "already_scanned",
+             "diff": 이번 업로드로 처음 스캔된 코드의 분류별 건수, "issues": 확인 필요 코드 미리보기, "summary"}
+    실사가 없으면 None
+    """
+    if _audit(db, audit_id) is None:
+        return None
+    S, A, B = database.InventoryScan.__table__, database.Asset.__table__, SCAN_BATCH
+    audits = database.InventoryAudit.__table__
+    conn = db.connection()
+    # 임시 테이블 생성도 트랜잭션에 포함되므로 중간에 실패하면 롤백과 함께 사라짐
+    SCAN_BATCH.create(conn)
+    received, chunk = 0, []
+    for code in codes:
+        chunk.append({"asset_code": code})
+        if len(chunk) >= chunk_size:
+            conn.execute(B.insert(), chunk)
+            received, chunk = received + len(chunk), []
+    if chunk:
+        conn.execute(B.insert(), chunk)
+        received += len(chunk)
+
+    batch = conn.execute(update(audits).where(audits.c.id == audit_id)
+                         .values(batches=audits.c.batches + 1).returning(audits.c.batches)).scalar()
+    scanned = select(S.c.asset_code).where(S.c.audit_id == audit_id, S.c.asset_code == B.c.asset_code).exists()
+    new = conn.execute(insert(S).from_select(
+        ["audit_id", "asset_code", "batch", "scanned_at"],
+        select(literal(audit_id), B.c.asset_code, literal(batch), literal(datetime.now()))
+        .where(~scanned).group_by(B.c.asset_code),
+    )).rowcount
+    distinct = conn.execute(select(func.count(B.c.asset_code.distinct()))).scalar()
+    SCAN_BATCH.drop(conn)
+
+    this_batch = [S.c.audit_id == audit_id, S.c.batch == batch]
+    result = _result()
+    issues = db.execute(
+        select(S.c.asset_code, result, A.c.id, A.c.name, A.c.status).select_from(_scanned_assets())
+        .where(*this_batch, result != "found").order_by(S.c.asset_code).limit(ISSUE_PREVIEW)
+    ).all()
+    report = {
+        "audit_id": audit_id, "batch": batch, "received": received, "distinct": distinct, "new": new,
+        "already_scanned": distinct - new, "diff": _counts(db, *this_batch),
+        "issues": [dict(row._mapping) for row in issues], "summary": summarize(db, audit_id),
+    }
+    db.commit()
+    return report
+
+
+def list_items(db, audit_id, result, limit, after=None):
+    """분류별 코드 목록 (asset_code 순 키셋 페이지네이션, after: 이전 페이지 마지막 코드)
+
+    missing은 자산 대장 행, 나머지는 스캔 행 기준 (대장에 있으면 자산 정보 포함). 실사가 없으면 None
+    """
+    if _audit(db, audit_id) is None:
+        return None
+    S, A = database.InventoryScan.__table__, database.Asset.__table__
+    asset_cols = [A.c.id, A.c.name, A.c.category, A.c.status, A.c.owner]
+    if result == "missing":
+        # 상태 조건을 식(status || '')으로 감싸 상태 인덱스 대신 asset_code 인덱스 순서로 읽게 함
+        # (미스캔 자산 전체를 정렬하지 않고 limit개를 채우면 멈춤. 100만 건 기준 페이지당 1.5초 -> 0.06초)
+        stmt = (select(A.c.asset_code, *asset_cols).where(*_not_scanned(audit_id, status=A.c.status + ""))
+                .order_by(A.c.asset_code))
+        if after is not None:
+            stmt = stmt.where(A.c.asset_code > after)
+    else:
+        stmt = (select(S.c.asset_code, *asset_cols, S.c.batch, S.c.scanned_at).select_from(_scanned_assets())
+                .where(S.c.audit_id == audit_id, _result() == result).order_by(S.c.asset_code))
+        if after is not None:
+            stmt = stmt.where(S.c.asset_code > after)
+    return [dict(row._mapping) for row in db.execute(stmt.limit(limit))]
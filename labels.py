@@ -0,0 +1,220 @@
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+# 실사용 점검용 QR 라벨 시트 생성 (DB 의존 없음: API와 대시보드 오프라인 모드에서 공용)
+# 라벨 1장 = asset_code QR + 문구. 렌더링한 라벨은 (라벨 내용 + 템플릿) 해시를 이름으로 디스크에 캐시하고,
+# 캐시에 없는 라벨만 프로세스 풀로 나눠 렌더링한 뒤 시트(PDF 다중 페이지 또는 페이지별 PNG)로 배치
+
+LABEL_CACHE_DIR = os.environ.get("ASSET_LABEL_CACHE", "label_cache")
+
+# 렌더링 방식이 바뀌면 올려서 기존 캐시를 무효화
+RENDER_VERSION = 1
+
+FORMATS = ("pdf", "png")
+
+# 캐시에 없는 라벨이 이 수 미만이면 프로세스 풀 없이 현재 프로세스에서 렌더링 (풀 기동 비용이 더 큼)
+POOL_THRESHOLD = 200
+RENDER_BATCH = 256
+# 렌더링 프로세스 수 (기본: CPU 수)
+POOL_WORKERS = int(os.environ.get("ASSET_LABEL_WORKERS", "0")) or None
+
+# 한글 자산명을 찍을 글꼴 (LABEL_FONT 환경 변수 > 알려진 경로 > Pillow 기본 글꼴)
+FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "C:/Windows/Fonts/malgun.ttf",
+    "/System/Library/Fonts/AppleSDGothicNeo.ttc",
+)
+
+
+@dataclass(frozen=True)
+class Template:
+    """라벨 크기와 A4 시트 배치 (단위 mm, 해상도 dpi)"""
+    name: str
+    width: float
+    height: float
+    cols: int
+    rows: int
+    show_name: bool = True
+    margin: float = 10
+    dpi: int = 300
+    page: tuple = (210, 297)
+
+
+TEMPLATES = {
+    "standard": Template("standard", 63.5, 33.9, 3, 8),
+    "small": Template("small", 38.1, 21.2, 5, 13, show_name=False),
+}
+DEFAULT_TEMPLATE = "standard"
+
+
+def _px(mm, dpi):
+    return int(round(mm / 25.4 * dpi))
+
+
+@functools.lru_cache(maxsize=None)
+def _font_path():
+    return os.environ.get("LABEL_FONT") or next((p for p in FONT_CANDIDATES if os.path.exists(p)), None)
+
+
+@functools.lru_cache(maxsize=32)
+def _font(size):
+    # 라벨마다 글꼴 후보 탐색/TTF 파싱을 반복하지 않도록 크기별로 한 번만 로드 (프로세스별 캐시)
+    path = _font_path()
+    if path:
+        return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size)
+
+
+def cache_key(code, name, template):
+    """라벨 내용과 템플릿이 같으면 같은 키 (자산명이 찍히지 않는 템플릿은 이름 변경에 무관)"""
+    payload = [RENDER_VERSION, code, name if template.show_name else None, asdict(template)]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def cache_path(key, cache_dir):
+    return os.path.join(cache_dir, key[:2], f"{key}.png")
+
+
+def render_label(code, name, template):
+    """라벨 1장 이미지 (흑백 1비트). 왼쪽 QR, 오른쪽 자산코드와 자산명"""
+    width, height = _px(template.width, template.dpi), _px(template.height, template.dpi)
+    pad = _px(1.5, template.dpi)
+    image = Image.new("1", (width, height), 1)
+
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=1, border=0)
+    qr.add_data(code)
+    qr.make(fit=True)
+    side = height - 2 * pad
+    image.paste(qr.make_image().get_image().convert("1").resize((side, side), Image.NEAREST), (pad, pad))
+
+    draw = ImageDraw.Draw(image)
+    x = side + 2 * pad
+    size = max(height // (5 if template.show_name else 4), 8)
+    draw.text((x, pad), code, font=_font(size), fill=0)
+    if template.show_name and name:
+        font = _font(int(size * 0.8))
+        text = name
+        while text and draw.textlength(text, font=font) > width - x - pad:
+            text = text[:-1]
+        draw.text((x, pad + int(size * 1.4)), text if text == name else text[:-1] + "…", font=font, fill=0)
+    return image
+
+
+def _render_batch(batch, template, cache_dir):
+    # 프로세스 풀 작업 단위: 렌더링해 캐시에 저장 (임시 파일에 쓰고 이름을 바꿔 반쯤 쓴 파일을 남기지 않음)
+    for key, code, name in batch:
+        target = cache_path(key, cache_dir)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        render_label(code, name, template).save(tmp, "PNG")
+        os.replace(tmp, target)
+    return len(batch)
+
+
+# === 렌더링 프로세스 풀 ===
+# 프로세스 전체에서 하나를 두고 처음 필요할 때 생성 (API는 lifespan 종료 시 shutdown_pool).
+# 스레드가 여럿인 서버 프로세스를 fork하면 잠금 상태까지 복제되어 교착될 수 있으므로 spawn으로 시작
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _render_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def render_labels(items, template, cache_dir=None):
+    """(asset_code, 자산명) 목록의 라벨을 캐시에 준비하고 라벨별 캐시 경로 목록을 반환
+
+    반환값: (경로 목록, 새로 렌더링한 수). 같은 내용의 라벨은 한 번만 렌더링.
+    """
+    cache_dir = cache_dir or LABEL_CACHE_DIR
+    keys = [cache_key(code, name, template) for code, name in items]
+    missing = {}
+    for key, (code, name) in zip(keys, items):
+        if key not in missing and not os.path.exists(cache_path(key, cache_dir)):
+            missing[key] = (key, code, name)
+    todo = list(missing.values())
+
+    if len(todo) < POOL_THRESHOLD:
+        _render_batch(todo, template, cache_dir)
+    else:
+        batches = [todo[i:i + RENDER_BATCH] for i in range(0, len(todo), RENDER_BATCH)]
+        list(_render_pool().map(_render_batch, batches, [template] * len(batches), [cache_dir] * len(batches)))
+    return [cache_path(key, cache_dir) for key in keys], len(todo)
+
+
+def iter_pages(paths, template):
+    """캐시된 라벨을 시트 페이지 이미지로 배치 (한 페이지씩 생성해 메모리는 페이지 1장 분량)"""
+    dpi = template.dpi
+    page_size = (_px(template.page[0], dpi), _px(template.page[1], dpi))
+    label_w, label_h = _px(template.width, dpi), _px(template.height, dpi)
+    # 여백 안에서 라벨 사이 간격을 균등 배분
+    gap_x = (page_size[0] - 2 * _px(template.margin, dpi) - template.cols * label_w) // max(template.cols - 1, 1)
+    gap_y = (page_size[1] - 2 * _px(template.margin, dpi) - template.rows * label_h) // max(template.rows - 1, 1)
+    per_page = template.cols * template.rows
+
+    for start in range(0, len(paths), per_page):
+        page = Image.new("1", page_size, 1)
+        for i, path in enumerate(paths[start:start + per_page]):
+            row, col = divmod(i, template.cols)
+            with Image.open(path) as label:
+                page.paste(label, (_px(template.margin, dpi) + col * (label_w + max(gap_x, 0)),
+                                   _px(template.margin, dpi) + row * (label_h + max(gap_y, 0))))
+        yield page
+
+
+def write_sheets(paths, template, output, fmt="pdf"):
+    """시트 기록. pdf는 output 파일 하나에 페이지를 이어 붙이고, png는 output-001.png ... 로 페이지별 저장
+
+    반환값: 기록한 파일 경로 목록
+    """
+    written = []
+    stem = os.path.splitext(output)[0]
+    for n, page in enumerate(iter_pages(paths, template), 1):
+        if fmt == "pdf":
+            page.save(output, "PDF", resolution=template.dpi, append=n > 1)
+            if n == 1:
+                written.append(output)
+        else:
+            target = f"{stem}-{n:03d}.png"
+            page.save(target, "PNG", dpi=(template.dpi, template.dpi), optimize=True)
+            written.append(target)
+    return written
+
+
+def build_label_sheets(items, output, fmt="pdf", template=DEFAULT_TEMPLATE, cache_dir=None):
+    """(asset_code, 자산명) 목록 -> 라벨 시트 파일. 반환값: (파일 경로 목록, 라벨 수, 새로 렌더링한 수)
+
+    asset_code가 없는(결측 포함) 자산은 QR을 만들 수 없으므로 제외.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    if template not in TEMPLATES:
+        raise ValueError(f"template must be one of {', '.join(TEMPLATES)}")
+    spec = TEMPLATES[template]
+    items = [(code, name if isinstance(name, str) else "") for code, name in items if isinstance(code, str) and code]
+    if not items:
+        return [], 0, 0
+    paths, rendered = render_labels(items, spec, cache_dir)
+    return write_sheets(paths, spec, output, fmt), len(items), rendered
@@ -1,14 +1,64 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.encoders import jsonable_encoder
+from starlette.background import BackgroundTask
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
+from contextlib import asynccontextmanager
+import base64
+import os
+import shutil
+import tempfile
+import json
+import zipfile
+import zlib
 import database
+import crud
+import bulk_upsert
+import codes
+import departments
+import export_data
+import history
+import inventory
+import labels
+import metrics
+import search
+import summary
+import treemap
+import valuation
+
+# 빠른 JSON 인코더 (orjson 미설치 시 표준 json)
+try:
+    import orjson
+
+    def dumps(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def dumps(obj):
+        return json.dumps(jsonable_encoder(obj), ensure_ascii=False, separators=(",", ":")).encode()
 
 # DB 초기화
 database.init_db()
+with database.SessionLocal() as _db:
+    departments.backfill(_db)  # 집계 재구축보다 먼저 (부서 id를 집계 테이블에 함께 기록)
+    summary.rebuild_if_empty(_db)
+    valuation.rebuild_if_empty(_db)
+    history.backfill(_db)
 
-app = FastAPI(title="기업 자산관리 API", description="FastAPI + SQLite")
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    labels.shutdown_pool()
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+
+app = FastAPI(title="기업 자산관리 API", description="FastAPI + SQLite", lifespan=lifespan)
+# 라우트별 지연/응답 크기/요청당 쿼리 수 계측 (GET /metrics)
+app.add_middleware(metrics.MetricsMiddleware)
 
 # === 데이터 검증 모델 (Pydantic) ===
 class AssetCreate(BaseModel):
@@ -19,79 +69,440 @@ class AssetCreate(BaseModel):
     purchase_date: date
     price: int
 
+# 등록 시 초기 상태 지정 (임시저장 등록을 요청 한 번으로 처리, 생략 시 기본값 "정상")
+# asset_code를 생략하면 서버에서 채번 (codes.py)
+class AssetRegister(AssetCreate):
+    asset_code: Optional[str] = None
+    status: Optional[str] = None
+
+# 대량 등록 행 (asset_code 생략 시 분류/구매연도별 번호 블록으로 채번)
+class AssetImport(AssetCreate):
+    asset_code: Optional[str] = None
+
+# 자산코드 블록 임대 결과 (start ~ start + count - 1)
+class CodeLease(BaseModel):
+    prefix: str
+    year: int
+    start: int
+    count: int
+    codes: List[str]
+
 class AssetResponse(AssetCreate):
     id: int
     status: str
     class Config:
         from_attributes = True
 
+# 목록 조회 시 fields= 로 선택 가능한 컬럼 (기본: AssetResponse 컬럼 순서)
+LIST_FIELDS = list(AssetResponse.model_fields)
+PROJECTABLE_FIELDS = LIST_FIELDS + ["created_at", "row_version", "department_id", "person_id"]
+
+def parse_fields(fields):
+    if not fields:
+        return LIST_FIELDS
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [n for n in names if n not in PROJECTABLE_FIELDS]
+    if unknown or not names:
+        raise HTTPException(status_code=400, detail=f"unknown fields: {', '.join(unknown)}")
+    return names
+
+# 재고 실사 생성 (스캔 목록은 POST /audits/{id}/scans 로 여러 번 이어 올림)
+class AuditCreate(BaseModel):
+    name: str
+
+class AssetChanges(BaseModel):
+    version: int
+    has_more: bool
+    upserts: List[AssetResponse]
+    deleted: List[int]
+
+# === 조회 필터 (쿼리 파라미터/요청 본문 공용) ===
+class AssetFilter(BaseModel):
+    status: Optional[List[str]] = None
+    category: Optional[List[str]] = None
+    owner: Optional[List[str]] = None
+    department_id: Optional[List[int]] = None
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    purchased_from: Optional[date] = None
+    purchased_to: Optional[date] = None
+    exclude_status: Optional[List[str]] = None
+
+    def clauses(self):
+        Asset = database.Asset
+        conds = []
+        if self.status:
+            conds.append(Asset.status.in_(self.status))
+        if self.category:
+            conds.append(Asset.category.in_(self.category))
+        if self.owner:
+            conds.append(Asset.owner.in_(self.owner))
+        if self.department_id:
+            conds.append(Asset.department_id.in_(self.department_id))
+        if self.min_price is not None:
+            conds.append(Asset.price >= self.min_price)
+        if self.max_price is not None:
+            conds.append(Asset.price <= self.max_price)
+        if self.purchased_from is not None:
+            conds.append(Asset.purchase_date >= self.purchased_from)
+        if self.purchased_to is not None:
+            conds.append(Asset.purchase_date <= self.purchased_to)
+        if self.exclude_status:
+            conds.append(Asset.status.notin_(self.exclude_status))
+        return conds
+
+# === 일괄 상태 전환 요청 (ids 또는 filter 중 하나 이상 필요) ===
+class StatusBatch(BaseModel):
+    status: str
+    ids: Optional[List[int]] = None
+    filter: Optional[AssetFilter] = None
+
+def asset_filter_params(status: Optional[List[str]] = Query(None), category: Optional[List[str]] = Query(None),
+                        owner: Optional[List[str]] = Query(None), min_price: Optional[int] = None,
+                        max_price: Optional[int] = None, purchased_from: Optional[date] = None,
+                        purchased_to: Optional[date] = None, exclude_status: Optional[List[str]] = Query(None),
+                        department_id: Optional[List[int]] = Query(None)):
+    return AssetFilter(status=status, category=category, owner=owner, min_price=min_price, max_price=max_price,
+                       purchased_from=purchased_from, purchased_to=purchased_to, exclude_status=exclude_status,
+                       department_id=department_id)
+
+# === 정렬 키셋 커서 (마지막 행의 (정렬값, id)를 불투명 문자열로 전달) ===
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(dumps(list(key))).decode().rstrip("=")
+
+def decode_cursor(cursor, sort):
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if value is not None and sort.lstrip("-") == "purchase_date":
+            value = date.fromisoformat(value)
+        return value, int(last_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
 # === DB 세션 의존성 ===
-def get_db():
+# 비동기 모드(기본)에서는 AsyncSession, ASSET_DB_ASYNC=0 이면 기존 동기 Session
+async def get_async_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+def get_sync_db():
     db = database.SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+get_db = get_async_db if database.DB_ASYNC else get_sync_db
+
+async def run_db(db, fn, *args, **kwargs):
+    """crud의 동기 DB 로직을 세션 종류에 맞게 실행 (비동기: run_sync, 동기: 스레드풀)"""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+# === ETag (조건부 요청) ===
+# 모든 변경은 이력 이벤트를 남기므로 최신 이벤트 id가 바뀌지 않았으면 같은 응답
+async def etag_or_304(request, db):
+    version = await run_db(db, history.current_version)
+    query = zlib.crc32(str(request.query_params).encode())
+    etag = f'W/"{version}-{query:x}"'
+    if request.headers.get("if-none-match") == etag:
+        return etag, Response(status_code=304, headers={"ETag": etag})
+    return etag, None
+
 # === API 엔드포인트 ===
 
-# 1. 자산 등록
+# 1. 자산 등록 (status를 함께 보내면 해당 상태로 등록, 소유자 초기화 규칙 동일)
 @app.post("/assets/", response_model=AssetResponse)
-def create_asset(asset: AssetCreate, db: Session = Depends(get_db)):
-    db_asset = database.Asset(**asset.dict())
-    db.add(db_asset)
-    db.commit()
-    db.refresh(db_asset)
-    return db_asset
-
-# 2. 전체 자산 조회
+async def create_asset(asset: AssetRegister, db=Depends(get_db)):
+    return await run_db(db, crud.create_asset, asset.dict(exclude_none=True))
+
+# 1-1. 대량 등록/업서트 (NDJSON 또는 CSV 스트리밍 본문)
+# 본문은 디스크로 스풀링하며 받고, asset_code 기준으로 청크 단위 트랜잭션 업서트
+# 파싱/검증이 CPU를 쓰므로 이벤트 루프 대신 스레드풀에서 동기 세션으로 처리
+@app.post("/assets/bulk")
+async def bulk_upsert_assets(request: Request, format: Optional[str] = None):
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        text = bulk_upsert.open_text(spool)
+        records = bulk_upsert.iter_csv(text) if format == "csv" else bulk_upsert.iter_ndjson(text)
+        with database.SessionLocal() as db:
+            return await run_in_threadpool(bulk_upsert.bulk_upsert, db, records, AssetImport)
+
+# 1-2. 자산코드 블록 임대 (외부에서 라벨/코드를 먼저 만들 때). 시퀀스를 한 문장으로 올려 동시 요청에도 겹치지 않음
+@app.post("/assets/codes", response_model=CodeLease)
+def lease_codes(category: str, purchase_date: Optional[date] = None, count: int = Query(1, ge=1, le=codes.MAX_LEASE)):
+    prefix, year = codes.prefix_for(category), codes.year_of(purchase_date)
+    start = codes.lease(database.engine, prefix, year, count)
+    return CodeLease(prefix=prefix, year=year, start=start, count=count,
+                     codes=[codes.format_code(prefix, year, start + i) for i in range(count)])
+
+# 2. 전체 자산 조회 (id 키셋 페이지네이션 + 서버측 필터)
+# 다음 페이지 커서는 X-Next-Cursor 헤더로 전달 (after_id에 그대로 넘기면 됨)
+# skip은 하위 호환용이며 after_id가 있으면 무시
+# as_of를 주면 변경 이력에서 해당 시점의 상태를 재구성 (필터/skip/fields 미적용)
+# 그 외에는 Core select로 필요한 컬럼(fields=id,name,...)만 읽고 Pydantic 검증 없이 바로 직렬화
+# format=ndjson 이면 DB 커서에서 읽는 대로 한 줄에 한 건씩 스트리밍 (목록 전체를 메모리에 올리지 않음)
+# sort=price, sort=-purchase_date 처럼 정렬하면 X-Next-Cursor는 불투명 토큰이며 cursor=로 넘김
 @app.get("/assets/", response_model=List[AssetResponse])
-def read_assets(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    assets = db.query(database.Asset).offset(skip).limit(limit).all()
-    return assets
+async def read_assets(request: Request, response: Response, filters: AssetFilter = Depends(asset_filter_params),
+                      skip: int = 0, limit: int = Query(100, ge=1, le=100000), after_id: Optional[int] = None,
+                      as_of: Optional[datetime] = None, fields: Optional[str] = None, format: str = "json",
+                      sort: Optional[str] = None, cursor: Optional[str] = None, db=Depends(get_db)):
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+    if sort is not None and sort.lstrip("-") not in crud.SORTABLE_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(crud.SORTABLE_FIELDS)}")
+    after = decode_cursor(cursor, sort) if sort and cursor else None
+    columns = parse_fields(fields)
+    etag, not_modified = await etag_or_304(request, db)
+    if not_modified:
+        return not_modified
+    response.headers["ETag"] = etag
+
+    if as_of is not None:
+        if as_of.tzinfo is not None:
+            as_of = as_of.astimezone().replace(tzinfo=None)  # 이력은 서버 로컬 시각으로 저장됨
+        assets, cursor = await run_db(db, history.state_as_of, as_of, limit, after_id or 0)
+        if cursor is not None:
+            response.headers["X-Next-Cursor"] = str(cursor)
+        return assets
+
+    page = {"after_id": after_id, "skip": skip, "sort": sort, "after": after}
+    headers = {"ETag": etag}
+    if format == "ndjson":
+        # 다음 페이지 커서(키 컬럼만 조회)를 헤더로 먼저 보내고, 본문은 DB 커서에서 청크 단위로 읽어 바로 전송
+        last = await run_db(db, crud.page_end_key, filters.clauses(), limit, **page)
+        if last is not None:
+            headers["X-Next-Cursor"] = encode_cursor(last) if sort else str(last)
+        stmt, width = crud.list_asset_query(columns, filters.clauses(), **page)
+
+        def stream():
+            with database.engine.connect() as conn:
+                for rows in export_data.iter_chunks(conn, stmt.limit(limit)):
+                    yield b"".join(dumps(dict(zip(columns, row[width:]))) + b"\n" for row in rows)
+        return StreamingResponse(stream(), media_type="application/x-ndjson", headers=headers)
+
+    rows, last = await run_db(db, crud.list_asset_rows, columns, filters.clauses(), limit, **page)
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(last) if sort else str(last)
+    return Response(dumps(rows), media_type="application/json", headers=headers)
+
+# 2-2. 자산 검색 (자산명/자산코드/소유자 부분 문자열, 순위순 페이지네이션)
+# 검색어 전체가 일치하는 결과가 없으면 trigram 단위로 오타 허용 검색
+# 순위는 최신 search.RANK_CANDIDATES건 안에서 고정이므로 offset + limit이 그 수를 넘으면 has_more=false
+@app.get("/assets/search")
+async def search_assets(q: str, limit: int = Query(20, ge=1, le=200), offset: int = Query(0, ge=0),
+                        fuzzy: bool = True, db=Depends(get_db)):
+    items, mode = await run_db(db, search.search_assets, q, limit + 1, offset, fuzzy)
+    return Response(dumps({"query": q, "mode": mode, "has_more": len(items) > limit, "items": items[:limit]}),
+                    media_type="application/json")
+
+# 2-1. 변경 피드 (since 버전 이후의 변경분과 삭제 id)
+# 클라이언트는 응답의 version을 다음 since로 사용. 변경이 없으면 If-None-Match로 304
+# 목록 조회와 같은 고속 경로 (Core select + Pydantic 검증 없이 직렬화)
+@app.get("/assets/changes", response_model=AssetChanges)
+async def read_changes(request: Request, since: int = 0, limit: int = Query(1000, ge=1, le=5000),
+                       db=Depends(get_db)):
+    etag, not_modified = await etag_or_304(request, db)
+    if not_modified:
+        return not_modified
+
+    upserts, deleted, version, has_more = await run_db(db, history.changes_since, since, limit, LIST_FIELDS)
+    return Response(dumps({"version": version, "has_more": has_more, "upserts": upserts, "deleted": deleted}),
+                    media_type="application/json", headers={"ETag": etag})
+
+# 2-3. 자산 단건 조회 (경로가 숫자일 때만 매칭되어 /assets/summary 등과 겹치지 않음)
+@app.get("/assets/{asset_id:int}", response_model=AssetResponse)
+async def read_asset(asset_id: int, db=Depends(get_db)):
+    asset = await run_db(db, crud.get_asset, asset_id)
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return asset
 
 # 3. 자산 상태 업데이트 (수리/폐기 등)
 @app.put("/assets/{asset_id}/status")
-def update_status(asset_id: int, status: str, db: Session = Depends(get_db)):
-    asset = db.query(database.Asset).filter(database.Asset.id == asset_id).first()
+async def update_status(asset_id: int, status: str, db=Depends(get_db)):
+    asset = await run_db(db, crud.update_status, asset_id, status)
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
-    
-    asset.status = status
-    
-    # 반납(퇴사), 폐기, 매각, 분실, 보관중 시 사용자 정보 초기화 로직
-    if status in ["반납(퇴사)", "폐기", "매각", "분실", "보관중"]:
-        asset.owner = ""  # 소유자 정보 제거
-        
-    db.commit()
     return {"msg": "Status updated", "new_status": status, "owner": asset.owner}
 
+# 3-1. 일괄 상태 전환 (퇴사자 일괄 반납, 연간 폐기 등)
+# 소유자 초기화 규칙은 단건 변경과 동일 (crud.status_values)
+@app.patch("/assets/status")
+async def batch_update_status(batch: StatusBatch, db=Depends(get_db)):
+    clauses = batch.filter.clauses() if batch.filter else []
+    if batch.ids is not None:
+        clauses.append(database.Asset.id.in_(batch.ids))
+    if not clauses:
+        raise HTTPException(status_code=400, detail="ids or filter is required")
+
+    affected = await run_db(db, crud.batch_update_status, batch.status, clauses)
+    invalid = sorted(set(batch.ids) - set(affected)) if batch.ids is not None else []
+    return {"msg": "Status updated", "new_status": batch.status, "updated": len(affected),
+            "affected_ids": affected, "invalid_ids": invalid}
+
 # 4. 자산 정보 전체 수정 (수정 기능)
 @app.put("/assets/{asset_id}")
-def update_asset(asset_id: int, asset_data: AssetCreate, db: Session = Depends(get_db)):
-    asset = db.query(database.Asset).filter(database.Asset.id == asset_id).first()
+async def update_asset(asset_id: int, asset_data: AssetCreate, db=Depends(get_db)):
+    asset = await run_db(db, crud.update_asset, asset_id, asset_data.dict())
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
-    
-    # Pydantic 모델에서 값 복사 (id 제외)
-    asset.asset_code = asset_data.asset_code
-    asset.name = asset_data.name
-    asset.category = asset_data.category
-    asset.owner = asset_data.owner
-    asset.purchase_date = asset_data.purchase_date
-    asset.price = asset_data.price
-    
-    db.commit()
-    db.refresh(asset)
     return asset
 
 # 5. 자산 삭제
 @app.delete("/assets/{asset_id}")
-def delete_asset(asset_id: int, db: Session = Depends(get_db)):
-    asset = db.query(database.Asset).filter(database.Asset.id == asset_id).first()
-    if not asset:
+async def delete_asset(asset_id: int, db=Depends(get_db)):
+    if not await run_db(db, crud.delete_asset, asset_id):
         raise HTTPException(status_code=404, detail="Asset not found")
-    
-    db.delete(asset)
-    db.commit()
-    return {"msg": "Asset deleted"}
\ No newline at end of file
+    return {"msg": "Asset deleted"}
+
+# 6. 대시보드 집계 (분류/상태/소유자/부서별 건수·금액)
+# asset_summary 테이블에서 읽으므로 응답 시간은 자산 수가 아니라 그룹 수에 비례
+@app.get("/assets/summary")
+async def read_summary(status: Optional[List[str]] = Query(None), category: Optional[List[str]] = Query(None),
+                       owner: Optional[List[str]] = Query(None), exclude_status: Optional[List[str]] = Query(None),
+                       department_id: Optional[List[int]] = Query(None), db=Depends(get_db)):
+    return await run_db(db, summary.read_summary, status=status, category=category, owner=owner,
+                        exclude_status=exclude_status, department_id=department_id)
+
+# 6-1. 자산 가치 평가 (as_of 월말 기준 취득가·장부가·감가상각누계액, 분류별 상각 정책은 depreciation.py)
+# asset_valuation 월별 증감 테이블의 as_of 이하 합계이므로 자산 수와 무관
+@app.get("/assets/valuation")
+async def read_valuation(as_of: Optional[date] = None, status: Optional[List[str]] = Query(None),
+                         category: Optional[List[str]] = Query(None), exclude_status: Optional[List[str]] = Query(None),
+                         db=Depends(get_db)):
+    return await run_db(db, valuation.read_valuation, as_of=as_of, status=status, category=category,
+                        exclude_status=exclude_status)
+
+# 6-2. 트리맵 계층 집계 (분류 -> 상태 -> 자산명, 레벨별 상위 top개 + 롤업 "그 외 N개")
+# path로 드릴다운 위치를 지정하면 그 아래 depth 레벨만 반환 (브라우저로 자산 행을 보내지 않음)
+@app.get("/assets/treemap")
+async def read_treemap(path: Optional[List[str]] = Query(None), depth: int = Query(2, ge=1, le=len(treemap.LEVELS)),
+                       top: int = Query(treemap.TOP_N, ge=1, le=100),
+                       filters: AssetFilter = Depends(asset_filter_params), db=Depends(get_db)):
+    if path and len(path) >= len(treemap.LEVELS):
+        raise HTTPException(status_code=400, detail=f"path must have fewer than {len(treemap.LEVELS)} levels")
+    return await run_db(db, treemap.build_tree, filters.clauses(), path or [], depth, top)
+
+# 6-3. 부서 목록 (id, 부서명, 부서별 건수·금액, 등록된 담당자 수)
+# 자산 필터/집계의 department_id 값. 건수·금액은 asset_summary의 부서 id 그룹에서 읽음
+@app.get("/departments")
+async def read_departments(status: Optional[List[str]] = Query(None), category: Optional[List[str]] = Query(None),
+                           exclude_status: Optional[List[str]] = Query(None), db=Depends(get_db)):
+    return await run_db(db, departments.read_departments, status=status, category=category,
+                        exclude_status=exclude_status)
+
+# 7. 자산 내보내기 (csv | parquet | xlsx)
+# 서버측 커서에서 청크 단위로 읽어 기록하므로 메모리 사용량이 행 수와 무관
+@app.get("/assets/export")
+def export_assets(format: str = "csv", filters: AssetFilter = Depends(asset_filter_params)):
+    if format not in export_data.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(export_data.FORMATS)}")
+    stmt = select(*export_data.export_columns()).where(*filters.clauses()).order_by(database.Asset.id)
+    filename = f"assets.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if format == "csv":
+        def stream():
+            with database.engine.connect() as conn:
+                yield from export_data.iter_csv_bytes(export_data.iter_chunks(conn, stmt))
+        return StreamingResponse(stream(), media_type=export_data.MEDIA_TYPES[format], headers=headers)
+
+    # parquet/xlsx는 파일 끝에 메타데이터가 붙으므로 임시 파일에 청크 단위로 쓴 뒤 전송
+    fd, path = tempfile.mkstemp(suffix=f".{format}")
+    os.close(fd)
+    try:
+        export_data.export_assets(path, format, stmt)
+    except Exception:
+        os.remove(path)
+        raise
+    return FileResponse(path, media_type=export_data.MEDIA_TYPES[format], filename=filename,
+                        background=BackgroundTask(os.remove, path))
+
+# 7-1. QR 라벨 시트 (pdf: 다중 페이지 PDF | png: 페이지별 PNG를 zip으로)
+# 필터 결과의 asset_code마다 라벨 1장. 캐시에 없는 라벨만 프로세스 풀로 렌더링 (labels.py)
+@app.get("/assets/labels")
+def label_sheets(format: str = "pdf", template: str = labels.DEFAULT_TEMPLATE,
+                 filters: AssetFilter = Depends(asset_filter_params)):
+    if format not in labels.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(labels.FORMATS)}")
+    if template not in labels.TEMPLATES:
+        raise HTTPException(status_code=400, detail=f"template must be one of {', '.join(labels.TEMPLATES)}")
+    Asset = database.Asset
+    stmt = select(Asset.asset_code, Asset.name).where(*filters.clauses()).order_by(Asset.id)
+    with database.engine.connect() as conn:
+        items = conn.execute(stmt).all()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        files, count, rendered = labels.build_label_sheets(items, os.path.join(workdir, f"labels.{format}"), format, template)
+        if not files:
+            raise HTTPException(status_code=404, detail="No labelled assets match the filter")
+        path, filename, media_type = files[0], f"labels.{format}", "application/pdf"
+        if format == "png":
+            # PNG 시트는 이미 압축되어 있으므로 zip은 저장만 (ZIP_STORED)
+            path, filename, media_type = os.path.join(workdir, "labels.zip"), "labels.zip", "application/zip"
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+                for f in files:
+                    archive.write(f, os.path.basename(f))
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    headers = {"X-Label-Count": str(count), "X-Label-Rendered": str(rendered)}
+    return FileResponse(path, media_type=media_type, filename=filename, headers=headers,
+                        background=BackgroundTask(shutil.rmtree, workdir, ignore_errors=True))
+
+# 8. 운영 지표 (Prometheus 텍스트 형식: 라우트별 지연/응답 크기, 처리 중 요청 수, 쿼리 시간/느린 쿼리, DB 오류)
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# 9. 재고 실사 생성 (현장 QR 스캔 목록과 자산 대장 대사, inventory.py)
+@app.post("/audits")
+async def create_audit(audit: AuditCreate, db=Depends(get_db)):
+    return await run_db(db, inventory.create_audit, audit.name)
+
+# 9-1. 스캔 업로드 (본문: 한 줄에 asset_code 하나, 또는 첫 열이 asset_code인 CSV. 스트리밍/파일 모두 가능)
+# 본문은 디스크로 스풀링하며 받고, 임시 테이블에 넣은 뒤 집합 조인으로 분류 (자산을 한 건씩 조회하지 않음)
+# 여러 번 나눠 올리면 이어 붙이며, 응답은 이번 업로드로 처음 스캔된 코드의 분류별 건수(diff)와 전체 건수
+@app.post("/audits/{audit_id}/scans")
+async def upload_scans(audit_id: int, request: Request):
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        scanned = inventory.iter_codes(bulk_upsert.open_text(spool))
+        with database.SessionLocal() as db:
+            report = await run_in_threadpool(inventory.add_scans, db, audit_id, scanned)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Audit not found")
+    return report
+
+# 9-2. 실사 현황 (found / wrong_status / unknown / missing 건수)
+@app.get("/audits/{audit_id}")
+async def read_audit(audit_id: int, db=Depends(get_db)):
+    audit = await run_db(db, inventory.read_audit, audit_id)
+    if audit is None:
+        raise HTTPException(status_code=404, detail="Audit not found")
+    return audit
+
+# 9-3. 분류별 코드 목록 (asset_code 순 키셋 페이지네이션, 다음 페이지는 X-Next-Cursor를 after로 전달)
+@app.get("/audits/{audit_id}/items")
+async def read_audit_items(audit_id: int, result: str = "missing", limit: int = Query(1000, ge=1, le=100000),
+                           after: Optional[str] = None, db=Depends(get_db)):
+    if result not in inventory.RESULTS:
+        raise HTTPException(status_code=400, detail=f"result must be one of {', '.join(inventory.RESULTS)}")
+    items = await run_db(db, inventory.list_items, audit_id, result, limit, after)
+    if items is None:
+        raise HTTPException(status_code=404, detail="Audit not found")
+    headers = {"X-Next-Cursor": items[-1]["asset_code"]} if len(items) == limit else {}
+    return Response(dumps(items), media_type="application/json", headers=headers)
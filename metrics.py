@@ -0,0 +1,244 @@
+import bisect
+import contextvars
+import logging
+import os
+import threading
+import time
+
+# 요청/SQL 계측과 Prometheus 텍스트 형식 출력 (외부 의존 없음, GET /metrics)
+# - MetricsMiddleware: 라우트별 지연/응답 크기 히스토그램, 처리 중 요청 수, 요청당 쿼리 수와 DB 시간
+# - database.py 엔진 이벤트가 observe_query()로 쿼리 시간을 기록하고, 느린 쿼리는 실행 계획과 함께 로그
+# 요청 지연 - 요청당 DB 시간 = 직렬화/애플리케이션 처리 시간 (SQLite 잠금 대기는 쿼리 시간에 포함)
+
+logger = logging.getLogger("asset_manager.sql")
+
+# 이 시간 이상 걸린 쿼리는 실행 계획과 함께 경고 로그 (API 요청 처리 중 실행된 쿼리만, CLI 대량 작업 제외)
+SLOW_QUERY_SECONDS = float(os.environ.get("ASSET_SLOW_QUERY_MS", "200")) / 1000
+# 느린 쿼리 로그 한 줄 크기 제한 (대량 IN 목록 등): SQL 문자 수, 파라미터 표시 개수
+SLOW_QUERY_MAX_CHARS = 2000
+SLOW_QUERY_MAX_PARAMS = 20
+# 파라미터가 이보다 많으면 실행 계획 조회(같은 파라미터로 EXPLAIN 한 번 더 실행)를 건너뜀
+PLAN_MAX_PARAMS = 100
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+# 쿼리 종류 라벨 (그 외는 OTHER, 라벨 값 수 제한)
+QUERY_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        # 값 -> [버킷별 개수..., 합계, 개수] (누적 개수는 출력할 때 계산)
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0]
+            state[bisect.bisect_left(self.buckets, value)] += 1
+            state[-1] += value
+
+    def render(self):
+        with self.lock:
+            items = sorted((k, list(v)) for k, v in self.values.items())
+        lines = self.header()
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(float(state[-1]))}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "asset_http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "asset_http_request_duration_seconds", "HTTP request latency until the last body chunk", ["method", "route"]))
+RESPONSE_BYTES = REGISTRY.register(Histogram(
+    "asset_http_response_size_bytes", "HTTP response body size", ["method", "route"], SIZE_BUCKETS))
+IN_FLIGHT = REGISTRY.register(Gauge("asset_http_requests_in_flight", "HTTP requests being processed"))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    "asset_http_request_queries", "SQL statements executed per request", ["method", "route"], COUNT_BUCKETS))
+REQUEST_DB_SECONDS = REGISTRY.register(Histogram(
+    "asset_http_request_db_seconds", "Time spent in SQL statements per request", ["method", "route"]))
+QUERY_SECONDS = REGISTRY.register(Histogram(
+    "asset_db_query_duration_seconds", "SQL statement execution time", ["operation"]))
+SLOW_QUERIES = REGISTRY.register(Counter(
+    "asset_db_slow_queries_total", "SQL statements slower than ASSET_SLOW_QUERY_MS", ["operation"]))
+DB_ERRORS = REGISTRY.register(Counter(
+    "asset_db_errors_total", "SQL errors (locked: SQLite lock wait exceeded busy_timeout)", ["kind"]))
+
+
+def render():
+    return REGISTRY.render()
+
+
+# === 요청 단위 SQL 집계 ===
+# 요청마다 새 객체를 컨텍스트에 두고 쿼리 이벤트가 누적 (스레드풀/run_sync로 넘어가도 같은 객체를 공유)
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current = contextvars.ContextVar("asset_request_stats", default=None)
+
+
+def current_request():
+    return _current.get()
+
+
+def operation(statement):
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in QUERY_OPERATIONS else "OTHER"
+
+
+def observe_query(statement, seconds):
+    """쿼리 1건 기록. 반환값: 느린 쿼리로 로그를 남겨야 하면 True (요청 처리 중일 때만)"""
+    op = operation(statement)
+    QUERY_SECONDS.observe(seconds, op)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += seconds
+    if seconds >= SLOW_QUERY_SECONDS:
+        SLOW_QUERIES.inc(op)
+        return stats is not None
+    return False
+
+
+def _truncate(text, limit):
+    return text if len(text) <= limit else f"{text[:limit]}... ({len(text):,} chars)"
+
+
+def _params_preview(parameters, limit=SLOW_QUERY_MAX_PARAMS):
+    # 앞쪽 limit개만 표시하고 나머지는 개수만
+    if not parameters or len(parameters) <= limit:
+        return repr(parameters)
+    items = list(parameters.items() if isinstance(parameters, dict) else parameters)[:limit]
+    head = repr(dict(items) if isinstance(parameters, dict) else tuple(items))
+    return f"{head[:-1]}, ... ({len(parameters):,} total){head[-1]}"
+
+
+def log_slow_query(statement, parameters, seconds, plan):
+    logger.warning("slow query (%.1f ms): %s\n  params: %s\n  plan:\n    %s", seconds * 1000,
+                   _truncate(" ".join(statement.split()), SLOW_QUERY_MAX_CHARS), _params_preview(parameters),
+                   "\n    ".join(plan) if plan else "(unavailable)")
+
+
+def route_label(scope):
+    # 경로 템플릿 (/assets/{asset_id:int}) 사용. 라우트가 없으면(404) 값 하나로 묶어 라벨 수 제한
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI 미들웨어: 응답 본문 마지막 조각을 보낼 때까지의 지연, 응답 크기, 요청당 쿼리 수/DB 시간"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        response = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            _current.reset(token)
+            labels = (scope["method"], route_label(scope))
+            REQUESTS.inc(*labels, str(response["status"]))
+            REQUEST_SECONDS.observe(elapsed, *labels)
+            RESPONSE_BYTES.observe(response["size"], *labels)
+            REQUEST_QUERIES.observe(stats.queries, *labels)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, *labels)
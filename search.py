@@ -0,0 +1,78 @@
+from sqlalchemy import or_, select, text
+import database
+
+# trigram 토크나이저는 3자 이상부터 인덱스를 사용
+MIN_TRIGRAM = 3
+
+# 순위를 매길 후보 수 상한. 흔한 검색어(수십만 건 일치)도 최신 자산부터 이만큼만 점수 계산
+# (FTS5 bm25는 후보당 비용이 커서 1M건 기준 10ms 목표를 넘으므로 아래 단순 점수를 사용)
+# 모든 페이지를 같은 후보 집합 안에서 순위를 매겨 페이지 간 중복/누락이 없도록 offset과 무관하게 고정
+# (offset + limit이 이 값을 넘는 부분은 결과 없음)
+RANK_CANDIDATES = 1000
+
+RESULT_FIELDS = ["id", "asset_code", "name", "category", "status", "owner", "price"]
+_RESULT_COLS = ", ".join(f"a.{f}" for f in RESULT_FIELDS)
+_HAYSTACK = "lower(coalesce(a.name, '') || ' ' || coalesce(a.asset_code, '') || ' ' || coalesce(a.owner, ''))"
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _escape_like(term):
+    # LIKE 와일드카드(%, _)와 이스케이프 문자 자체를 글자 그대로 일치하도록 (ESCAPE '\\')
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _trigrams(q):
+    return list(dict.fromkeys(q[i:i + MIN_TRIGRAM] for i in range(len(q) - MIN_TRIGRAM + 1)))
+
+
+def _match(db, q, expr, limit, offset):
+    # 점수: 자산코드 완전 일치 > 접두어 일치 > 검색어 trigram 포함 개수 (오타 허용 순위), 동점은 짧은 이름/최신순
+    trigrams = _trigrams(q.lower())
+    params = {f"t{i}": t for i, t in enumerate(trigrams)}
+    trigram_hits = " + ".join(f"(instr({_HAYSTACK}, :t{i}) > 0)" for i in range(len(trigrams)))
+    prefix = "a.asset_code LIKE :prefix ESCAPE '\\' OR a.name LIKE :prefix ESCAPE '\\' OR a.owner LIKE :prefix ESCAPE '\\'"
+    rows = db.execute(text(
+        f"SELECT {_RESULT_COLS}, 100 * (a.asset_code = :q) + 10 * ({prefix}) + {trigram_hits} AS score FROM ("
+        "  SELECT rowid FROM assets_fts WHERE assets_fts MATCH :expr ORDER BY rowid DESC LIMIT :candidates"
+        ") c JOIN assets a ON a.id = c.rowid ORDER BY score DESC, length(a.name), a.id DESC LIMIT :limit OFFSET :offset"
+    ), {
+        **params, "q": q, "expr": expr,
+        "prefix": _escape_like(q) + "%",
+        "candidates": RANK_CANDIDATES, "limit": limit, "offset": offset,
+    }).all()
+    return [dict(zip(RESULT_FIELDS, row[:-1]), score=row[-1]) for row in rows]
+
+
+def _like(db, q, limit, offset):
+    # 짧은 검색어(또는 FTS 미지원 DB)는 LIKE 부분 일치로 처리
+    Asset = database.Asset
+    pattern = f"%{_escape_like(q)}%"
+    stmt = (
+        select(*[getattr(Asset, f) for f in RESULT_FIELDS])
+        .where(or_(*[getattr(Asset, c).like(pattern, escape="\\") for c in database.FTS_COLUMNS]))
+        .order_by(Asset.id).limit(limit).offset(offset)
+    )
+    return [dict(zip(RESULT_FIELDS, row), score=0.0) for row in db.execute(stmt)]
+
+
+def search_assets(db, q, limit=20, offset=0, fuzzy=True):
+    """자산명/자산코드/소유자 부분 문자열 검색 (최신 RANK_CANDIDATES건 내 점수순, 페이지는 그 안에서만)
+
+    1) 검색어 전체를 부분 문자열로 일치 (접두어 포함)
+    2) 결과가 없고 fuzzy면 검색어의 trigram 중 하나라도 포함된 자산을 순위순으로 (오타 허용)
+       (다음 페이지가 비었을 뿐 1)의 결과가 있으면 fuzzy로 넘어가지 않음)
+    반환값: (결과 목록, 사용한 방식 "exact" | "fuzzy" | "like")
+    """
+    q = q.strip()
+    if not q:
+        return [], "exact"
+    if not database.IS_SQLITE or len(q) < MIN_TRIGRAM:
+        return _like(db, q, limit, offset), "like"
+
+    results = _match(db, q, _quote(q), limit, offset)
+    if results or not fuzzy or len(q) <= MIN_TRIGRAM or (offset and _match(db, q, _quote(q), 1, 0)):
+        return results, "exact"
+    return _match(db, q, " OR ".join(_quote(t) for t in _trigrams(q)), limit, offset), "fuzzy"
@@ -1,101 +1,306 @@
-from sqlalchemy.orm import Session
-from database import SessionLocal, Asset, init_db, engine
-import random
-from datetime import date, timedelta
-
-# DB 초기화 ensure tables exist
-init_db()
-
-db: Session = SessionLocal()
-
-# 기존 데이터 삭제 (Clean state for "force apply")
-db.query(Asset).delete()
-db.commit()
-
-# 데이터 생성 함수
-def create_random_assets():
-    # 데이터셋 정의
-    departments = ["영업1팀", "영업2팀", "기획팀", "개발1팀", "개발2팀", "인사팀", "재무팀", "디자인팀"]
-    last_names = ["김", "이", "박", "최", "정", "강", "조", "윤", "장", "임", "한", "오", "서", "신"]
-    first_names = ["철수", "영희", "민수", "지영", "동현", "현우", "서준", "지민", "민지", "예진", "준호", "성민", "수빈"]
-    
-    asset_types = {
-        "IT기기": [
-            ("MacBook Pro 16 M3", 3500000), ("MacBook Air 15 M2", 2000000), 
-            ("Dell XPS 15", 2800000), ("LG Gram 17", 1900000), 
-            ("Samsung Galaxy Book 3", 1800000), ("iPad Pro 12.9", 1700000),
-            ("Dell UltraSharp Monitor 27", 600000), ("LG UltraFine 32", 900000)
-        ],
-        "가구": [
-            ("퍼시스 모션데스크", 800000), ("시디즈 T50 의자", 350000), 
-            ("허먼밀러 에어론", 1800000), ("3단 서랍장", 150000), ("회의용 테이블", 600000)
-        ],
-        "소프트웨어": [
-            ("Adobe CC All Apps", 700000), ("JetBrains All Products", 400000), 
-            ("Microsoft 365 Business", 200000), ("Sketch License", 120000)
-        ],
-        "차량": [
-            ("제네시스 G80 (법인)", 60000000), ("아반떼 cn7 (영업용)", 25000000), 
-            ("카니발 하이리무진", 45000000)
-        ],
-        "기타": [
-            ("네스프레소 커피머신", 250000), ("LG 퓨리케어 공기청정기", 800000), 
-            ("삼성 비스포크 냉장고", 1500000), ("다이슨 청소기", 900000)
-        ]
-    }
-    
-    statuses = ["정상", "정상", "정상", "정상", "정상", "정상", "수리중", "반납(퇴사)", "폐기", "매각", "분실"]
-    
-    assets_to_add = []
-    
-    code_counters = {"IT기기": 1, "가구": 1, "소프트웨어": 1, "차량": 1, "기타": 1}
-    category_codes = {"IT기기": "IT", "가구": "FUR", "소프트웨어": "SW", "차량": "CAR", "기타": "ETC"}
-
-    for _ in range(80): # 80개 아이템 생성
-        category = random.choice(list(asset_types.keys()))
-        item_name, base_price = random.choice(asset_types[category])
-        
-        # 가격 변동 (±10%)
-        price = int(base_price * random.uniform(0.9, 1.1) / 1000) * 1000
-        
-        status = random.choice(statuses)
-        
-        owner = ""
-        # 소유자가 필요한 상태인 경우 랜덤 생성
-        if status in ["정상", "수리중"]:
-             dept = random.choice(departments)
-             name = random.choice(last_names) + random.choice(first_names)
-             owner = f"{dept} {name}"
-        
-        # 구매일: 최근 3년 이내
-        days_offset = random.randint(0, 365 * 3)
-        purchase_date = date.today() - timedelta(days=days_offset)
-        
-        # 자산코드 생성 (예: IT-23001)
-        year_suffix = purchase_date.year % 100
-        seq = code_counters[category]
-        asset_code = f"{category_codes[category]}-{year_suffix}{seq:03d}"
-        code_counters[category] += 1
-        
-        asset = Asset(
-            asset_code=asset_code,
-            name=item_name,
-            category=category,
-            status=status,
-            owner=owner,
-            purchase_date=purchase_date,
-            price=price
-        )
-        assets_to_add.append(asset)
-        
-    db.add_all(assets_to_add)
-    db.commit()
-    print(f"Successfully added {len(assets_to_add)} random assets.")
+import argparse
+import time
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, delete, func, insert, select, text
+import codes
+import crud
+import database
+import departments
+import history
+import summary
+import valuation
+
+# 부하 테스트용 합성 자산 생성기 (같은 seed면 항상 같은 데이터)
+# 청크마다 NumPy로 열 단위 샘플링 -> Core executemany INSERT를 청크 트랜잭션으로 기록
+# 기본은 기존 데이터에 추가 (--wipe 일 때만 삭제). 자산코드는 codes.py 시퀀스에서 (분류, 연도)별 블록으로 임대
+#   python seed_data.py --rows 1000000 --seed 42
+#   python seed_data.py --rows 1000000 --output fixture.parquet   (DB 대신 Parquet 파일로 바로 생성)
+
+CHUNK_SIZE = 50000
+
+# 시드 중 SQLite 페이지 캐시 (KiB, 음수). 인덱스가 커지면 청크마다 캐시 밖 페이지를 다시 읽어 느려짐
+SEED_CACHE_KIB = 256000
+
+# 분류별 (비중, [(품목, 기준 가격, 품목 비중), ...])
+CATALOG = {
+    "IT기기": (0.45, [
+        ("MacBook Pro 16 M3", 3500000, 3), ("MacBook Air 15 M2", 2000000, 4),
+        ("Dell XPS 15", 2800000, 2), ("LG Gram 17", 1900000, 4),
+        ("Samsung Galaxy Book 3", 1800000, 3), ("iPad Pro 12.9", 1700000, 1),
+        ("Dell UltraSharp Monitor 27", 600000, 6), ("LG UltraFine 32", 900000, 3),
+    ]),
+    "가구": (0.25, [
+        ("퍼시스 모션데스크", 800000, 4), ("시디즈 T50 의자", 350000, 8),
+        ("허먼밀러 에어론", 1800000, 1), ("3단 서랍장", 150000, 4), ("회의용 테이블", 600000, 1),
+    ]),
+    "소프트웨어": (0.15, [
+        ("Adobe CC All Apps", 700000, 2), ("JetBrains All Products", 400000, 3),
+        ("Microsoft 365 Business", 200000, 6), ("Sketch License", 120000, 1),
+    ]),
+    "기타": (0.12, [
+        ("네스프레소 커피머신", 250000, 2), ("LG 퓨리케어 공기청정기", 800000, 3),
+        ("삼성 비스포크 냉장고", 1500000, 1), ("다이슨 청소기", 900000, 1),
+    ]),
+    "차량": (0.03, [
+        ("제네시스 G80 (법인)", 60000000, 1), ("아반떼 cn7 (영업용)", 25000000, 3),
+        ("카니발 하이리무진", 45000000, 1),
+    ]),
+}
+
+# 상태 분포 (crud.OWNER_CLEARING_STATUSES 상태는 소유자 없음)
+STATUSES = {"정상": 0.72, "보관중": 0.08, "수리중": 0.05, "반납(퇴사)": 0.05, "폐기": 0.05, "매각": 0.03, "분실": 0.02}
+
+# 부서 규모는 Zipf 형태 (앞쪽 부서일수록 인원/자산이 많음)
+DEPARTMENTS = ["개발1팀", "개발2팀", "영업1팀", "영업2팀", "기획팀", "디자인팀", "인사팀", "재무팀",
+               "마케팅팀", "고객지원팀", "데이터팀", "인프라팀", "보안팀", "법무팀", "구매팀", "총무팀"]
+LAST_NAMES = ["김", "이", "박", "최", "정", "강", "조", "윤", "장", "임", "한", "오", "서", "신"]
+FIRST_NAMES = ["철수", "영희", "민수", "지영", "동현", "현우", "서준", "지민", "민지", "예진", "준호", "성민", "수빈"]
+
+# 구매일: 최근일수록 많도록 지수 분포 (평균 PURCHASE_MEAN_DAYS일 전, 최대 PURCHASE_MAX_DAYS일 전)
+PURCHASE_MEAN_DAYS = 700
+PURCHASE_MAX_DAYS = 365 * 10
+
+
+def _weights(values):
+    weights = np.asarray(values, dtype=np.float64)
+    return weights / weights.sum()
+
+
+def generate(n, seed=42, chunk_size=CHUNK_SIZE, today=None):
+    """n개 자산을 chunk_size개씩 열 dict로 생성 (asset_code 제외, 값은 NumPy 배열)"""
+    rng = np.random.default_rng(seed)
+    today = np.datetime64(today or date.today(), "D")
+    categories = list(CATALOG)
+    category_p = _weights([CATALOG[c][0] for c in categories])
+    # 전체 품목을 한 배열로 펼쳐 두고 분류별 품목 구간에서 샘플링
+    items = [(c, name, price, w) for c in categories for name, price, w in CATALOG[c][1]]
+    item_names = np.array([i[1] for i in items], dtype=object)
+    item_prices = np.array([i[2] for i in items], dtype=np.float64)
+    item_category = np.array([categories.index(i[0]) for i in items])
+    statuses = np.array(list(STATUSES), dtype=object)
+    status_p = _weights(list(STATUSES.values()))
+    dept_p = _weights(1 / np.arange(1, len(DEPARTMENTS) + 1))
+    people = np.array([f"{d} {l}{f}" for d in DEPARTMENTS for l in LAST_NAMES for f in FIRST_NAMES], dtype=object)
+    per_dept = len(LAST_NAMES) * len(FIRST_NAMES)
+
+    for start in range(0, n, chunk_size):
+        size = min(chunk_size, n - start)
+        category = rng.choice(len(categories), size=size, p=category_p)
+        item = np.empty(size, dtype=np.int64)
+        for c in range(len(categories)):
+            rows = np.flatnonzero(category == c)
+            choices = np.flatnonzero(item_category == c)
+            item[rows] = rng.choice(choices, size=len(rows), p=_weights([items[i][3] for i in choices]))
+        # 가격: 기준 가격의 ±10% 안팎 (로그정규), 천 원 단위
+        price = (item_prices[item] * rng.lognormal(0, 0.05, size) / 1000).round().astype(np.int64) * 1000
+        status = statuses[rng.choice(len(statuses), size=size, p=status_p)]
+        person = rng.choice(len(DEPARTMENTS), size=size, p=dept_p) * per_dept + rng.integers(0, per_dept, size)
+        owner = np.where(np.isin(status, crud.OWNER_CLEARING_STATUSES), "", people[person])
+        days = np.minimum(rng.exponential(PURCHASE_MEAN_DAYS, size), PURCHASE_MAX_DAYS).astype("timedelta64[D]")
+        yield {
+            "name": item_names[item],
+            "category": np.array(categories, dtype=object)[category],
+            "status": status,
+            "owner": owner,
+            "purchase_date": today - days,
+            "price": price,
+        }
+
+
+def code_columns(columns, lease):
+    """청크의 (분류 접두어, 구매연도) 그룹마다 lease(prefix, year, count)로 블록을 받아 asset_code 배열 생성"""
+    prefix = _map(columns["category"], codes.prefix_for)
+    year = columns["purchase_date"].astype("datetime64[Y]").astype(np.int64) + 1970
+    result = np.empty(len(year), dtype=object)
+    keys = np.char.add(prefix.astype(str), year.astype(str))
+    for key in np.unique(keys):
+        rows = np.flatnonzero(keys == key)
+        p, y = prefix[rows[0]], int(year[rows[0]])
+        first = lease(p, y, len(rows))
+        result[rows] = [codes.format_code(p, y, seq) for seq in range(first, first + len(rows))]
+    return result
+
+
+def department_columns(conn, owner):
+    """소유자 배열 -> department_id, person_id 배열 (고유 소유자 단위로 departments.resolve)"""
+    uniques, inverse = np.unique(owner.astype(str), return_inverse=True)
+    ids = departments.resolve(conn, uniques.tolist())
+    resolved = [ids.get(u, (None, None)) for u in uniques]
+    return {"department_id": np.array([d for d, _ in resolved], dtype=object)[inverse],
+            "person_id": np.array([p for _, p in resolved], dtype=object)[inverse]}
+
+
+def _map(values, fn):
+    # 고유값 단위로만 함수 호출
+    uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+    return np.array([fn(u) for u in uniques], dtype=object)[inverse]
+
+
+def _tuples(columns, fields):
+    # 날짜는 드라이버가 행마다 변환하지 않도록 SQLite 저장 형식 문자열로 (purchase_date: datetime64[D] -> "YYYY-MM-DD")
+    values = [columns[f].astype(str).tolist() if f == "purchase_date" else columns[f].tolist() for f in fields]
+    return zip(*values)
+
+
+def _record_summary(conn, columns):
+    """청크를 그룹 단위 증감으로 집계/감가상각 테이블에 반영 (끝에서 전체를 다시 구축하지 않도록 같은 트랜잭션에서)"""
+    frame = pd.DataFrame({k: columns[k] for k in ("category", "status", "owner", "purchase_date", "price")})
+    department_ids = dict(zip(columns["owner"].tolist(), columns["department_id"].tolist()))
+    groups = frame.groupby(list(summary.KEYS), sort=False)["price"].agg(["size", "sum"])
+    summary.apply_changes(conn, [
+        (None, {"category": c, "status": s, "owner": o, "department_id": department_ids[o],
+                "count": int(count), "price": int(price)})
+        for (c, s, o), count, price in groups.itertuples(name=None)
+    ])
+    # 상각표는 취득월 단위이므로 같은 달 취득분은 월초 날짜 하나로 합쳐 전달
+    frame["purchase_date"] = frame["purchase_date"].to_numpy().astype("datetime64[M]")
+    months = frame.groupby(["category", "status", "purchase_date"], sort=False)["price"].sum()
+    valuation.apply_changes(conn, [
+        (None, {"category": c, "status": s, "purchase_date": m, "price": int(price)})
+        for (c, s, m), price in months.items()
+    ])
+
+
+def _insert_chunk(conn, columns, created_at, with_history):
+    """청크 하나를 현재 트랜잭션에 기록
+
+    SQLite는 검색 인덱스(FTS) 트리거를 트랜잭션 안에서 잠시 내리고 청크 단위 INSERT ... SELECT로 색인한 뒤
+    다시 만듦 (DDL도 트랜잭션에 포함되므로 다른 연결에는 트리거가 없는 순간이 보이지 않음).
+    """
+    Asset = database.Asset
+    size = len(columns["price"])
+    # created_at도 드라이버 기본 변환(isoformat(" "))과 같은 문자열을 한 번만 만들어 사용
+    columns = dict(columns, created_at=np.full(size, str(created_at), dtype=object),
+                   **department_columns(conn, columns["owner"]))
+    last_id = conn.execute(select(func.max(Asset.id))).scalar() or 0
+    fts_trigger = database.IS_SQLITE and conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'assets_fts_ai'")).first()
+    if fts_trigger:
+        conn.execute(text("DROP TRIGGER assets_fts_ai"))
+    # 값 dict를 만들지 않도록 컴파일된 INSERT 문에 튜플 목록을 드라이버 executemany로 바로 전달
+    compiled = insert(Asset.__table__).values({f: bindparam(f) for f in columns}).compile(dialect=conn.dialect)
+    conn.exec_driver_sql(str(compiled), list(_tuples(columns, compiled.positiontup)))
+    if fts_trigger:
+        conn.execute(text(f"INSERT INTO assets_fts(rowid, {database._FTS_COLS}) "
+                          f"SELECT id, {database._FTS_COLS} FROM assets WHERE id > :last_id"), {"last_id": last_id})
+        conn.execute(text(database.FTS_DDL[1]))
+    if with_history:
+        history.record_where(conn, "create", Asset.id > last_id, changed_at=created_at)
+    _record_summary(conn, columns)
+
+
+def _deferred_indexes(conn, n):
+    """시드 동안 내려 둘 assets 인덱스 (SQLite에서 기존 자산 수 이상을 추가할 때만, 유일 인덱스 제외)
+
+    행마다 일반 인덱스 B-tree 9개를 갱신하는 것보다 끝에서 인덱스마다 정렬 한 번으로 만드는 편이 빠름
+    (100만 건 기준 INSERT 약 28초 -> 인덱스 생성 약 15초). 시드 중 다른 연결의 조회는 그만큼 느려짐.
+    프로세스가 중간에 죽어도 다음 init_db가 빠진 인덱스를 다시 만듦
+    """
+    if not database.IS_SQLITE:
+        return []
+    existing = conn.execute(select(func.count()).select_from(database.Asset.__table__)).scalar()
+    conn.commit()
+    if existing > n:
+        return []
+    return [index for index in database.Asset.__table__.indexes if not index.unique]
+
+
+def seed_database(n, seed=42, chunk_size=CHUNK_SIZE, wipe=False, with_history=True, today=None, log=print):
+    """DB에 n개 자산을 추가. 청크마다 한 트랜잭션 (자산 INSERT + 생성 이벤트 INSERT ... SELECT + 집계 증감)
+
+    반환값: 추가한 자산 수
+    """
+    database.init_db()
+    Asset = database.Asset
+    if wipe:
+        with database.engine.begin() as conn:
+            conn.execute(delete(Asset))
+            conn.execute(delete(database.AssetEvent))
+            conn.execute(delete(database.AssetCodeSequence.__table__))
+            conn.execute(delete(database.AssetSummary.__table__))
+            conn.execute(delete(database.AssetValuation.__table__))
+    # 집계 테이블이 없던 기존 DB면 먼저 구축 (이후로는 청크마다 증감만 반영)
+    with database.SessionLocal() as db:
+        summary.rebuild_if_empty(db)
+
+    started = time.perf_counter()
+    created_at = datetime.now()
+    inserted = 0
+    # 연결 하나로 청크 트랜잭션을 이어 가며 페이지 캐시를 유지 (끝나면 기본값으로 되돌려 풀에 반환)
+    with database.engine.connect() as conn:
+        if database.IS_SQLITE:
+            conn.exec_driver_sql(f"PRAGMA cache_size=-{SEED_CACHE_KIB}")
+            conn.commit()
+        deferred = _deferred_indexes(conn, n)
+        try:
+            for index in deferred:
+                index.drop(conn)
+            conn.commit()
+            for columns in generate(n, seed, chunk_size, today):
+                columns["asset_code"] = code_columns(
+                    columns, lambda p, y, count: codes.lease(database.engine, p, y, count))
+                with conn.begin():
+                    _insert_chunk(conn, columns, created_at, with_history)
+                inserted += len(columns["price"])
+                log(f"  {inserted:,}/{n:,} rows ({time.perf_counter() - started:.1f}s)")
+        finally:
+            conn.rollback()
+            for index in deferred:
+                index.create(conn, checkfirst=True)
+            if database.IS_SQLITE:
+                conn.exec_driver_sql(f"PRAGMA cache_size={database.SQLITE_PRAGMAS['cache_size']}")
+            conn.commit()
+
+    log(f"Successfully added {inserted:,} assets in {time.perf_counter() - started:.1f}s.")
+    return inserted
+
+
+def write_parquet(path, n, seed=42, chunk_size=CHUNK_SIZE, today=None, log=print):
+    """DB 없이 export_data.py의 Parquet 스키마로 바로 기록 (자산코드는 파일 안에서 (분류, 연도)별 1부터)
+
+    DB가 정하는 열(row_version, department_id, person_id 등 생성하지 않는 열)은 null
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import export_data
+
+    schema = export_data._arrow_schema()
+    counters = {}
+
+    def lease(prefix, year, count):
+        first = counters.get((prefix, year), 1)
+        counters[(prefix, year)] = first + count
+        return first
+
+    started = time.perf_counter()
+    created_at = datetime.now()
+    written = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for columns in generate(n, seed, chunk_size, today):
+            columns["asset_code"] = code_columns(columns, lease)
+            size = len(columns["price"])
+            columns.update(id=np.arange(written + 1, written + size + 1), created_at=np.full(size, created_at))
+            arrays = [pa.array(columns[f.name], type=f.type) if f.name in columns else pa.nulls(size, type=f.type)
+                      for f in schema]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            written += size
+    log(f"Successfully wrote {written:,} assets to {path} in {time.perf_counter() - started:.1f}s.")
+    return written
+
 
 if __name__ == "__main__":
-    try:
-        create_random_assets()
-    except Exception as e:
-        print(f"Error: {e}")
-    finally:
-        db.close()
+    parser = argparse.ArgumentParser(description="부하 테스트용 합성 자산 데이터 생성")
+    parser.add_argument("--rows", type=int, default=80, help="생성할 자산 수 (기본 80)")
+    parser.add_argument("--seed", type=int, default=42, help="난수 seed (같으면 같은 데이터)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="트랜잭션/청크당 행 수")
+    parser.add_argument("--wipe", action="store_true", help="기존 자산/이력/채번 시퀀스를 지우고 생성")
+    parser.add_argument("--no-history", action="store_true", help="생성 이벤트를 기록하지 않음 (변경 피드/as_of 제외)")
+    parser.add_argument("--output", help="DB 대신 Parquet 파일로 기록")
+    args = parser.parse_args()
+
+    if args.output:
+        write_parquet(args.output, args.rows, args.seed, args.chunk_size)
+    else:
+        seed_database(args.rows, args.seed, args.chunk_size, wipe=args.wipe, with_history=not args.no_history)
@@ -0,0 +1,155 @@
+import json
+import os
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+
+# 오프라인 모드용 컬럼형 스냅샷 (Arrow IPC 파일, 메모리 맵으로 읽음)
+# 디렉터리 안에 세그먼트 파일을 순번대로 쌓음: base 1개 + 이후 변경분(delta)들
+#   000001-base.arrow, 000002-delta.arrow, ...
+# 각 세그먼트 메타데이터: 기준 버전(asset_events 최대 id), 삭제된 id 목록(delta)
+# DB 의존 없음 (쓰기 데이터는 export_data.py가 조회해서 넘김)
+
+SNAPSHOT_DIR = "local_snapshot"
+
+# 변경분 세그먼트가 이 수 이상이면 다음 내보내기는 base를 새로 씀 (로드 시 병합 비용 제한)
+MAX_DELTAS = 20
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("asset_code", pa.string()),
+    ("name", pa.string()),
+    ("category", _DICT),
+    ("status", _DICT),
+    ("owner", _DICT),
+    ("purchase_date", pa.date32()),
+    ("price", pa.int64()),
+    ("created_at", pa.timestamp("us")),
+    ("row_version", pa.int64()),
+])
+DICT_COLUMNS = [f.name for f in SCHEMA if pa.types.is_dictionary(f.type)]
+
+
+class _DictEncoder:
+    """세그먼트 전체에서 사전이 늘어나기만 하도록 인코딩 (IPC 파일은 사전 교체 불가, 추가(delta)만 허용)
+
+    결측은 ""로 저장 (asset_summary와 같은 규칙, 로드 후 categorical fillna 비용 없음)
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def encode(self, values):
+        chunk = pa.array(values, pa.string()).fill_null("").dictionary_encode()
+        mapping = []
+        for value in chunk.dictionary.to_pylist():
+            if value not in self.index:
+                self.index[value] = len(self.values)
+                self.values.append(value)
+            mapping.append(self.index[value])
+        indices = pc.take(pa.array(mapping, pa.int32()), chunk.indices)
+        return pa.DictionaryArray.from_arrays(indices, pa.array(self.values, pa.string()))
+
+
+def segments(path=SNAPSHOT_DIR):
+    """마지막 base부터의 세그먼트 경로 목록 (이전 base는 무시)"""
+    if not os.path.isdir(path):
+        return []
+    names = sorted(n for n in os.listdir(path) if n.endswith(".arrow"))
+    bases = [i for i, n in enumerate(names) if n.endswith("-base.arrow")]
+    if not bases:
+        return []
+    return [os.path.join(path, n) for n in names[bases[-1]:]]
+
+
+def _metadata(segment):
+    with pa.memory_map(segment) as source:
+        meta = ipc.open_file(source).schema.metadata or {}
+    return {k.decode(): v.decode() for k, v in meta.items()}
+
+
+def read_version(path=SNAPSHOT_DIR):
+    """스냅샷 기준 버전 (없으면 None)"""
+    found = segments(path)
+    return int(_metadata(found[-1])["version"]) if found else None
+
+
+def delta_count(path=SNAPSHOT_DIR):
+    return max(len(segments(path)) - 1, 0)
+
+
+def write_segment(chunks, version, path=SNAPSHOT_DIR, deleted=(), base=False):
+    """SCHEMA 컬럼 순서의 행 리스트 청크들을 세그먼트 하나로 기록 (반환값: 기록한 행 수)
+
+    base=True면 새 base를 쓴 뒤 이전 세그먼트를 정리. 임시 파일에 쓰고 이름을 바꾸므로
+    읽는 쪽은 항상 완성된 세그먼트만 봄.
+    """
+    os.makedirs(path, exist_ok=True)
+    existing = sorted(n for n in os.listdir(path) if n.endswith(".arrow"))
+    seq = int(existing[-1].split("-")[0]) + 1 if existing else 1
+    target = os.path.join(path, f"{seq:06d}-{'base' if base else 'delta'}.arrow")
+    metadata = {"version": str(version), "deleted": json.dumps(list(deleted)),
+                "written_at": datetime.now().isoformat(timespec="seconds")}
+    schema = SCHEMA.with_metadata(metadata)
+    encoders = {name: _DictEncoder() for name in DICT_COLUMNS}
+
+    count = 0
+    options = ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    with ipc.new_file(target + ".tmp", schema, options=options) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            arrays = [
+                encoders[field.name].encode(col) if field.name in encoders else pa.array(col, type=field.type)
+                for col, field in zip(columns, SCHEMA)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            count += len(rows)
+    os.replace(target + ".tmp", target)
+
+    if base:
+        for name in existing:
+            os.remove(os.path.join(path, name))
+    return count
+
+
+def load_table(path=SNAPSHOT_DIR):
+    """세그먼트를 메모리 맵으로 열어 하나의 Arrow 테이블로 병합 (반환값: (테이블, 버전) 또는 (None, None))
+
+    뒤 세그먼트에서 다시 쓰였거나 삭제된 id는 앞 세그먼트에서 제외. 변경분이 없으면 복사 없이 반환.
+    """
+    found = segments(path)
+    if not found:
+        return None, None
+    tables, metas = [], []
+    for segment in found:
+        reader = ipc.open_file(pa.memory_map(segment))
+        tables.append(reader.read_all())
+        metas.append({k.decode(): v.decode() for k, v in (reader.schema.metadata or {}).items()})
+
+    # 뒤에서부터 "이후에 바뀐 id" 집합을 누적해 각 세그먼트를 한 번씩만 걸러냄
+    later = None
+    for i in range(len(tables) - 1, -1, -1):
+        if later is not None and len(later):
+            tables[i] = tables[i].filter(pc.invert(pc.is_in(tables[i]["id"], value_set=later)))
+        touched = pa.concat_arrays([
+            pa.array(json.loads(metas[i].get("deleted", "[]")), pa.int64()),
+            tables[i]["id"].combine_chunks() if tables[i].num_rows else pa.array([], pa.int64()),
+        ]) if i > 0 else None
+        if touched is not None:
+            later = touched if later is None else pa.concat_arrays([later, touched])
+
+    table = pa.concat_tables(t.replace_schema_metadata() for t in tables)
+    if len(tables) > 1:
+        table = table.unify_dictionaries()
+    return table, int(metas[-1]["version"])
+
+
+def load_frame(path=SNAPSHOT_DIR):
+    """pandas DataFrame으로 로드 (분류/상태/소유자는 categorical, 날짜는 datetime64)"""
+    table, version = load_table(path)
+    if table is None:
+        return None, None
+    return table.to_pandas(date_as_object=False), version
@@ -0,0 +1,113 @@
+from collections import defaultdict
+from sqlalchemy import delete, func, select
+import database
+import valuation
+
+# 집계 그룹 키 (asset_summary 기본키 순서)
+KEYS = ("category", "status", "owner")
+
+
+def asset_values(asset):
+    """ORM 객체/Row에서 집계에 필요한 값만 추출 (변경 전 상태 보관용)"""
+    return {"category": asset.category, "status": asset.status, "owner": asset.owner, "price": asset.price,
+            "purchase_date": asset.purchase_date, "department_id": asset.department_id}
+
+
+def _key(values):
+    return tuple(values.get(k) or "" for k in KEYS)
+
+
+def apply_changes(db, changes):
+    """(변경 전, 변경 후) 값 쌍 목록을 그룹별 증감으로 합쳐 asset_summary에 반영
+
+    신규 등록은 (None, 값), 삭제는 (값, None). 커밋은 호출자가 자산 변경과 함께 수행.
+    그룹 단위 변경은 값에 "count"(행 수)와 그룹 합계 "price"를 담아 전달.
+    월별 감가상각 테이블은 쓰기 경로에서 같은 변경 목록으로 valuation.apply_changes를 따로 호출.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    department_ids = {}  # 그룹 키(소유자 포함) -> 부서 id (소유자로 정해지므로 그룹마다 하나)
+    for old, new in changes:
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None:
+                continue
+            delta = deltas[_key(values)]
+            delta[0] += sign * values.get("count", 1)
+            delta[1] += sign * (values.get("price") or 0)
+            if values.get("department_id") is not None:
+                department_ids[_key(values)] = values["department_id"]
+
+    rows = [dict(zip(KEYS, key), department_id=department_ids.get(key), count=c, price_sum=s)
+            for key, (c, s) in deltas.items() if c or s]
+    if not rows:
+        return
+    table = database.AssetSummary.__table__
+    stmt = database.insert_for(db)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c[k] for k in KEYS],
+        set_={"count": table.c.count + stmt.excluded.count,
+              "price_sum": table.c.price_sum + stmt.excluded.price_sum,
+              "department_id": func.coalesce(stmt.excluded.department_id, table.c.department_id)},
+    )
+    db.execute(stmt, rows)
+    db.execute(delete(table).where(table.c.count <= 0))
+
+
+def record_change(db, old=None, new=None):
+    apply_changes(db, [(old, new)])
+
+
+def rebuild(db):
+    """assets 전체를 다시 집계 (초기 구축 또는 직접 DB를 수정한 경우, 감가상각 테이블 포함)"""
+    table = database.AssetSummary.__table__
+    Asset = database.Asset
+    group = [func.coalesce(getattr(Asset, k), "") for k in KEYS]
+    db.execute(delete(table))
+    db.execute(table.insert().from_select(
+        [*KEYS, "department_id", "count", "price_sum"],
+        select(*group, func.max(Asset.department_id), func.count(), func.coalesce(func.sum(Asset.price), 0))
+        .group_by(*group),
+    ))
+    valuation.rebuild(db)
+    db.commit()
+
+
+def rebuild_if_empty(db):
+    if db.query(database.AssetSummary).first() is None and db.query(database.Asset).first() is not None:
+        rebuild(db)
+
+
+def read_summary(db, status=None, category=None, owner=None, exclude_status=None, department_id=None):
+    """집계 테이블에서 분류/상태/소유자/부서별 건수와 금액 합계를 조회 (그룹 수에 비례)"""
+    t = database.AssetSummary.__table__
+    conds = []
+    if status:
+        conds.append(t.c.status.in_(status))
+    if category:
+        conds.append(t.c.category.in_(category))
+    if owner:
+        conds.append(t.c.owner.in_(owner))
+    if exclude_status:
+        conds.append(t.c.status.notin_(exclude_status))
+    if department_id:
+        conds.append(t.c.department_id.in_(department_id))
+
+    result = {}
+    for dim in KEYS:
+        rows = db.execute(
+            select(t.c[dim], func.sum(t.c.count), func.sum(t.c.price_sum))
+            .where(*conds).group_by(t.c[dim]).order_by(func.sum(t.c.price_sum).desc())
+        ).all()
+        result[f"by_{dim}"] = [{"key": k, "count": c, "price_sum": s} for k, c, s in rows]
+    # 부서별: department_id 그룹에 부서명을 붙임 (소유자 없음은 id None, key "")
+    D = database.Department.__table__
+    rows = db.execute(
+        select(t.c.department_id, func.coalesce(D.c.name, ""), func.sum(t.c.count), func.sum(t.c.price_sum))
+        .select_from(t.outerjoin(D, D.c.id == t.c.department_id))
+        .where(*conds).group_by(t.c.department_id, D.c.name).order_by(func.sum(t.c.price_sum).desc())
+    ).all()
+    result["by_department"] = [{"key": k, "id": i, "count": c, "price_sum": s} for i, k, c, s in rows]
+    result["total"] = {
+        "count": sum(r["count"] for r in result["by_status"]),
+        "price_sum": sum(r["price_sum"] for r in result["by_status"]),
+    }
+    return result
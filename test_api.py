@@ -0,0 +1,696 @@
+import json
+
+
+def _asset(code, **overrides):
+    asset = {
+        "asset_code": code,
+        "name": "MacBook Pro 16 M3",
+        "category": "IT기기",
+        "owner": "개발1팀 김민수",
+        "purchase_date": "2024-03-02",
+        "price": 3500000,
+    }
+    asset.update(overrides)
+    return asset
+
+
+def test_sqlite_pragmas(client):
+    import asyncio
+    import database
+
+    expected = {"journal_mode": "wal", "synchronous": 1, "cache_size": -64000, "temp_store": 2,
+                "busy_timeout": database.DB_BUSY_TIMEOUT_MS}
+
+    def read(conn):
+        return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in expected}
+
+    # 새 연결마다 적용되는지 (동기 엔진, 비동기 엔진 각각)
+    database.engine.dispose()
+    with database.engine.connect() as conn:
+        assert read(conn) == expected
+
+    async def read_async():
+        async with database.async_engine.connect() as conn:
+            return await conn.run_sync(read)
+
+    if database.async_engine is not None:
+        assert asyncio.run(read_async()) == expected
+        asyncio.run(database.async_engine.dispose())
+
+
+def test_bulk_upsert_ndjson(client):
+    client.post("/assets/", json=_asset("IT-24001", price=100))
+    rows = [_asset("IT-24001", price=3000000), _asset("IT-24002"), {"asset_code": "IT-24003"}]
+    body = "\n".join(json.dumps(r, ensure_ascii=False) for r in rows) + "\nnot-json\n"
+
+    res = client.post("/assets/bulk", content=body.encode(), headers={"content-type": "application/x-ndjson"})
+    report = res.json()
+    assert res.status_code == 200
+    assert report["received"] == 4 and report["upserted"] == 2 and report["failed"] == 2
+    assert [e["row"] for e in report["errors"]] == [3, 4]
+
+    assets = {a["asset_code"]: a for a in client.get("/assets/").json()}
+    assert len(assets) == 2
+    assert assets["IT-24001"]["price"] == 3000000
+
+
+def test_bulk_upsert_csv(client):
+    body = "asset_code,name,category,owner,purchase_date,price\n" \
+           "FUR-24001,\"허먼밀러 에어론, 블랙\",가구,,2024-01-05,1800000\n" \
+           "FUR-24002,시디즈 T50 의자,가구,,2024-01-05,abc\n"
+    res = client.post("/assets/bulk?format=csv", content=body.encode("utf-8-sig"))
+    report = res.json()
+    assert report["upserted"] == 1 and report["failed"] == 1
+    assert report["errors"][0]["asset_code"] == "FUR-24002"
+    assert client.get("/assets/").json()[0]["name"] == "허먼밀러 에어론, 블랙"
+
+
+def test_read_assets_keyset_and_filters(client):
+    for i in range(5):
+        client.post("/assets/", json=_asset(f"IT-2400{i}", price=1000 * i, owner="개발1팀" if i % 2 else "기획팀"))
+
+    first = client.get("/assets/?limit=2")
+    assert len(first.json()) == 2
+    cursor = first.headers["x-next-cursor"]
+    second = client.get(f"/assets/?limit=2&after_id={cursor}").json()
+    assert [a["asset_code"] for a in second] == ["IT-24002", "IT-24003"]
+
+    res = client.get("/assets/?owner=개발1팀&owner=없는팀&min_price=2000")
+    assert [a["asset_code"] for a in res.json()] == ["IT-24003"]
+    assert "x-next-cursor" not in res.headers
+    res = client.get("/assets/?purchased_from=2025-01-01")
+    assert res.json() == []
+
+
+def test_summary_tracks_mutations(client):
+    import database
+    import summary
+
+    ids = [client.post("/assets/", json=_asset(f"IT-2400{i}", price=1000)).json()["id"] for i in range(3)]
+    client.put(f"/assets/{ids[0]}/status?status=폐기")
+    client.put(f"/assets/{ids[1]}", json=_asset("IT-24001", category="가구", price=5000))
+    client.delete(f"/assets/{ids[2]}")
+    client.post("/assets/bulk", content=json.dumps(_asset("IT-24000", price=2000)) + "\n" + json.dumps(_asset("IT-24009")))
+
+    data = client.get("/assets/summary").json()
+    assert data["total"] == {"count": 3, "price_sum": 2000 + 5000 + 3500000}
+    assert {r["key"]: r["count"] for r in data["by_status"]} == {"정상": 2, "폐기": 1}
+    drafts_excluded = client.get("/assets/summary?exclude_status=폐기&category=IT기기").json()
+    assert drafts_excluded["total"]["count"] == 1
+
+    # 증분 결과가 전체 재집계 결과와 같아야 함
+    with database.SessionLocal() as db:
+        incremental = summary.read_summary(db)
+        summary.rebuild(db)
+        assert summary.read_summary(db) == incremental
+
+
+def test_export_formats(client, tmp_path):
+    import io
+    import pyarrow.parquet as pq
+    from openpyxl import load_workbook
+
+    client.post("/assets/bulk", content="\n".join(json.dumps(_asset(f"IT-2{i:04d}", price=i)) for i in range(25)))
+    csv_text = client.get("/assets/export?format=csv&max_price=9").text
+    lines = csv_text.strip().split("\n")
+    assert lines[0].startswith("id,asset_code,name") and len(lines) == 11
+
+    parquet = client.get("/assets/export?format=parquet")
+    assert pq.read_table(io.BytesIO(parquet.content)).num_rows == 25
+
+    xlsx = client.get("/assets/export?format=xlsx")
+    ws = load_workbook(io.BytesIO(xlsx.content), read_only=True)["assets"]
+    assert sum(1 for _ in ws.iter_rows()) == 26
+    assert client.get("/assets/export?format=json").status_code == 400
+
+
+def test_create_with_status(client):
+    assert client.post("/assets/", json=_asset("IT-24001")).json()["status"] == "정상"
+    draft = client.post("/assets/", json=_asset("IT-24002", status="임시저장")).json()
+    stored = client.post("/assets/", json=_asset("IT-24003", status="보관중")).json()
+    assert draft["status"] == "임시저장" and draft["owner"] == "개발1팀 김민수"
+    assert stored["status"] == "보관중" and stored["owner"] == ""
+    assert client.get("/assets/summary", params={"status": "임시저장"}).json()["total"]["count"] == 1
+
+
+def test_batch_status_update(client):
+    from sqlalchemy import event
+    import database
+    import summary
+
+    ids = [client.post("/assets/", json=_asset(f"IT-2400{i}", owner="인사팀" if i < 3 else "재무팀")).json()["id"]
+           for i in range(5)]
+    res = client.patch("/assets/status", json={"status": "반납(퇴사)", "ids": ids[:2] + [999]}).json()
+    assert res["affected_ids"] == ids[:2] and res["invalid_ids"] == [999]
+
+    res = client.patch("/assets/status", json={"status": "수리중", "filter": {"owner": ["재무팀"]}}).json()
+    assert res["affected_ids"] == ids[3:]
+    assert client.patch("/assets/status", json={"status": "폐기", "filter": {}}).status_code == 400
+
+    assets = {a["id"]: a for a in client.get("/assets/").json()}
+    assert assets[ids[0]]["owner"] == "" and assets[ids[3]]["owner"] == "재무팀"
+    with database.SessionLocal() as db:
+        incremental = summary.read_summary(db)
+        summary.rebuild(db)
+        assert summary.read_summary(db) == incremental
+
+    # 조건 변경은 바뀐 행 수와 무관하게 바인드 변수 수가 일정 (SQLite 변수 한도를 넘는 id 목록을 만들지 않음)
+    client.post("/assets/bulk", content="\n".join(json.dumps(_asset(f"FUR-2{i:04d}", category="가구"))
+                                                  for i in range(300)))
+    counts = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        # executemany는 행마다 같은 문장이므로 한 행의 변수 수
+        counts.append(len((parameters[0] if executemany else parameters) or ()))
+
+    engines = [e for e in (database.engine, getattr(database.async_engine, "sync_engine", None)) if e is not None]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count)
+    try:
+        res = client.patch("/assets/status", json={"status": "보관중", "filter": {"category": ["가구"]}})
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", count)
+    assert res.status_code == 200 and len(res.json()["affected_ids"]) == 300
+    assert counts and max(counts) < 50
+    with database.SessionLocal() as db:
+        Asset, Event = database.Asset, database.AssetEvent
+        assert db.query(Event).filter(Event.event_type == "status", Event.status == "보관중").count() == 300
+        assert db.query(Asset).filter(Asset.category == "가구", Asset.row_version <= 0).count() == 0
+
+
+def test_departments(client):
+    from sqlalchemy import delete, update
+    import database
+    import departments
+    import summary
+
+    a = client.post("/assets/", json=_asset("IT-24001", price=100)).json()["id"]
+    b = client.post("/assets/", json=_asset("IT-24002", price=200, owner="개발1팀 이영희")).json()["id"]
+    c = client.post("/assets/", json=_asset("IT-24003", price=400, owner="재무팀")).json()["id"]
+    bulk = _asset("IT-24004", price=800, owner="기획팀  박지성")
+    client.post("/assets/bulk", content=json.dumps(bulk, ensure_ascii=False))
+    client.put(f"/assets/{c}/status?status=보관중")  # 소유자 초기화 -> 부서 없음
+
+    depts = {d["name"]: d for d in client.get("/departments").json()}
+    assert list(depts) == ["개발1팀", "기획팀", "재무팀"]
+    assert (depts["개발1팀"]["count"], depts["개발1팀"]["price_sum"], depts["개발1팀"]["people"]) == (2, 300, 2)
+    assert depts["재무팀"]["count"] == 0
+    dev = depts["개발1팀"]["id"]
+
+    rows = client.get("/assets/", params={"department_id": dev, "fields": "id,department_id,person_id"}).json()
+    assert [r["id"] for r in rows] == [a, b] and rows[0]["person_id"] != rows[1]["person_id"]
+    res = client.get("/assets/summary", params={"department_id": dev}).json()
+    assert res["total"] == {"count": 2, "price_sum": 300}
+    by_dept = {r["key"]: (r["id"], r["count"]) for r in client.get("/assets/summary").json()["by_department"]}
+    assert by_dept == {"개발1팀": (dev, 2), "기획팀": (depts["기획팀"]["id"], 1), "": (None, 1)}
+
+    # 차원 도입 전 DB를 흉내 내 정수 키를 지운 뒤 일회성 변환으로 복원
+    with database.SessionLocal() as db:
+        before = summary.read_summary(db)
+        db.execute(update(database.Asset).values(department_id=None, person_id=None))
+        db.execute(update(database.AssetSummary).values(department_id=None))
+        db.execute(delete(database.Person))
+        db.execute(delete(database.Department))
+        # 변환 전에 새 쓰기로 부서가 먼저 생겨도 남은 자산은 변환되어야 함 (다시 실행해도 변화 없음)
+        db.add(database.Department(name="재무팀"))
+        db.commit()
+        departments.backfill(db)
+        departments.backfill(db)
+        Asset, Department = database.Asset, database.Department
+        assert [d for d, in db.query(Department.name).order_by(Department.name)] == ["개발1팀", "기획팀", "재무팀"]
+        assert db.query(Asset).filter(Asset.owner != "", Asset.person_id.is_(None)).count() == 0
+        after = summary.read_summary(db)
+        assert [(r["key"], r["count"]) for r in after["by_department"]] == \
+            [(r["key"], r["count"]) for r in before["by_department"]]
+        summary.rebuild(db)
+        assert summary.read_summary(db) == after
+
+
+def test_history_as_of(client):
+    from datetime import datetime
+
+    before_all = datetime.now().isoformat()
+    a = client.post("/assets/", json=_asset("IT-24001")).json()["id"]
+    b = client.post("/assets/", json=_asset("IT-24002")).json()["id"]
+    t1 = datetime.now().isoformat()
+    client.put(f"/assets/{a}/status?status=폐기")
+    client.post("/assets/bulk", content=json.dumps(_asset("IT-24002", price=1)))
+    t2 = datetime.now().isoformat()
+    client.delete(f"/assets/{b}")
+
+    assert client.get("/assets/", params={"as_of": before_all}).json() == []
+    at_t1 = client.get("/assets/", params={"as_of": t1}).json()
+    assert [(x["id"], x["status"], x["owner"]) for x in at_t1] == [(a, "정상", "개발1팀 김민수"), (b, "정상", "개발1팀 김민수")]
+    at_t2 = {x["id"]: x for x in client.get("/assets/", params={"as_of": t2}).json()}
+    assert at_t2[a]["status"] == "폐기" and at_t2[b]["price"] == 1
+    now = client.get("/assets/", params={"as_of": datetime.now().isoformat()}).json()
+    assert [x["id"] for x in now] == [a]
+
+    page = client.get("/assets/", params={"as_of": t1, "limit": 1})
+    assert page.headers["x-next-cursor"] == str(a)
+
+
+def test_change_feed_and_etag(client):
+    a = client.post("/assets/", json=_asset("IT-24001")).json()["id"]
+    b = client.post("/assets/", json=_asset("IT-24002")).json()["id"]
+
+    full = client.get("/assets/changes?since=0&limit=1").json()
+    assert full["has_more"] and [x["id"] for x in full["upserts"]] == [a]
+    rest = client.get(f"/assets/changes?since={full['version']}").json()
+    assert not rest["has_more"] and [x["id"] for x in rest["upserts"]] == [b]
+    version = rest["version"]
+
+    res = client.get(f"/assets/changes?since={version}")
+    assert res.json()["upserts"] == [] and res.json()["deleted"] == []
+    assert client.get(f"/assets/changes?since={version}", headers={"If-None-Match": res.headers["etag"]}).status_code == 304
+
+    listing = client.get("/assets/")
+    assert client.get("/assets/", headers={"If-None-Match": listing.headers["etag"]}).status_code == 304
+
+    client.put(f"/assets/{a}/status?status=수리중")
+    client.delete(f"/assets/{b}")
+    client.post("/assets/bulk", content=json.dumps(_asset("IT-24003")))
+    delta = client.get(f"/assets/changes?since={version}").json()
+    assert delta["deleted"] == [b]
+    assert [(x["asset_code"], x["status"]) for x in delta["upserts"]] == [("IT-24001", "수리중"), ("IT-24003", "정상")]
+    assert client.get("/assets/", headers={"If-None-Match": listing.headers["etag"]}).status_code == 200
+
+
+def test_list_projection_and_ndjson(client):
+    client.post("/assets/bulk", content="\n".join(json.dumps(_asset(f"IT-2{i:04d}", price=i)) for i in range(5)))
+
+    full = client.get("/assets/").json()
+    assert list(full[0]) == ["asset_code", "name", "category", "owner", "purchase_date", "price", "id", "status"]
+    assert full[0]["purchase_date"] == "2024-03-02"
+
+    grid = client.get("/assets/?fields=id,name,status,price&limit=2")
+    assert grid.json() == [{"id": 1, "name": "MacBook Pro 16 M3", "status": "정상", "price": 0},
+                           {"id": 2, "name": "MacBook Pro 16 M3", "status": "정상", "price": 1}]
+    assert grid.headers["x-next-cursor"] == "2"
+    assert client.get("/assets/?fields=id,secret").status_code == 400
+
+    lines = client.get("/assets/?format=ndjson&fields=asset_code").text.splitlines()
+    assert [json.loads(line) for line in lines] == [{"asset_code": f"IT-2{i:04d}"} for i in range(5)]
+    params = {"format": "ndjson", "fields": "id,price", "sort": "-price", "limit": 2}
+    page = client.get("/assets/", params=params)
+    assert [json.loads(line)["id"] for line in page.text.splitlines()] == [5, 4]
+    rest = client.get("/assets/", params={**params, "limit": 3, "cursor": page.headers["x-next-cursor"]})
+    assert [json.loads(line)["id"] for line in rest.text.splitlines()] == [3, 2, 1]
+    assert rest.headers["x-next-cursor"]  # limit개를 채우면 커서 (목록 JSON과 같은 규칙)
+    assert "x-next-cursor" not in client.get("/assets/?format=ndjson&limit=6").headers
+
+
+def test_search_trigram(client):
+    client.post("/assets/bulk", content="\n".join(json.dumps(a, ensure_ascii=False) for a in [
+        _asset("ETC-24001", name="삼성 비스포크 냉장고", category="기타", owner=""),
+        _asset("IT-24001", name="MacBook Air 15 M2", owner="개발1팀 김민수"),
+        _asset("IT-24002", name="Dell XPS 15", owner="개발2팀 이영희"),
+    ]).encode())
+
+    res = client.get("/assets/search", params={"q": "비스포크"}).json()
+    assert res["mode"] == "exact" and [i["asset_code"] for i in res["items"]] == ["ETC-24001"]
+    assert [i["asset_code"] for i in client.get("/assets/search", params={"q": "개발1팀"}).json()["items"]] == ["IT-24001"]
+    assert [i["asset_code"] for i in client.get("/assets/search", params={"q": "macbook"}).json()["items"]] == ["IT-24001"]
+
+    typo = client.get("/assets/search", params={"q": "비스프크 냉장고"}).json()
+    assert typo["mode"] == "fuzzy" and typo["items"][0]["asset_code"] == "ETC-24001"
+    assert client.get("/assets/search", params={"q": "IT"}).json()["mode"] == "like"
+    # 짧은 검색어의 %, _, \ 는 와일드카드가 아니라 글자 그대로
+    for q in ("_", "%", "\\", "%_"):
+        assert client.get("/assets/search", params={"q": q}).json()["items"] == []
+
+    # 수정/삭제가 검색 인덱스에 반영되어야 함
+    ids = {i["asset_code"]: i["id"] for i in client.get("/assets/").json()}
+    client.put(f"/assets/{ids['IT-24002']}", json=_asset("IT-24002", name="Dell XPS 13", owner="기획팀"))
+    client.delete(f"/assets/{ids['ETC-24001']}")
+    assert client.get("/assets/search", params={"q": "개발2팀", "fuzzy": False}).json()["items"] == []
+    assert client.get("/assets/search", params={"q": "비스포크", "fuzzy": False}).json()["items"] == []
+    assert client.get("/assets/search", params={"q": "XPS 13"}).json()["items"][0]["owner"] == "기획팀"
+
+
+def test_search_paging_fixed_candidates(client, monkeypatch):
+    import search
+
+    # 오래된 자산일수록 점수가 높도록 (접두어 일치) 섞어 등록. 페이지를 넘겨도 후보 집합이 같아야 중복/누락 없음
+    monkeypatch.setattr(search, "RANK_CANDIDATES", 10)
+    names = ["Pro Stand" if i % 3 == 0 else f"MacBook Pro {i}" for i in range(25)]
+    client.post("/assets/bulk", content="\n".join(json.dumps(_asset(f"IT-2{i:04d}", name=n)) for i, n in enumerate(names)))
+
+    seen, offset = [], 0
+    while True:
+        res = client.get("/assets/search", params={"q": "Pro", "limit": 3, "offset": offset}).json()
+        assert res["mode"] == "exact"
+        seen += [i["id"] for i in res["items"]]
+        if not res["has_more"]:
+            break
+        offset += 3
+    assert len(seen) == len(set(seen)) == 10 and set(seen) == set(range(16, 26))
+    past = client.get("/assets/search", params={"q": "Pro", "limit": 3, "offset": 30}).json()
+    assert past["items"] == [] and past["mode"] == "exact" and not past["has_more"]
+
+
+def test_valuation_schedule(client):
+    from datetime import date
+    import database
+    import depreciation
+    import valuation
+
+    client.post("/assets/", json=_asset("IT-20001", purchase_date="2022-01-15", price=4800000))  # 정액 4년
+    car = client.post("/assets/", json=_asset("CAR-21001", category="차량", purchase_date="2021-06-01",
+                                              price=50000000)).json()  # 정률 5년
+    gone = client.post("/assets/", json=_asset("FUR-23001", category="가구", purchase_date="2023-03-01")).json()
+    body = json.dumps(_asset("IT-20001", purchase_date="2022-01-15", price=2400000), ensure_ascii=False)
+    client.post("/assets/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+    client.patch("/assets/status", json={"status": "보관중", "ids": [car["id"]]})
+    client.delete(f"/assets/{gone['id']}")
+
+    res = client.get("/assets/valuation", params={"as_of": "2024-01-31"}).json()
+    assert res["total"]["cost"] == 2400000 + 50000000
+    it = next(r for r in res["by_category"] if r["key"] == "IT기기")
+    assert it["book_value"] == 1200000  # 48개월 중 24개월 경과
+    expected = depreciation.book_values([2400000, 50000000], ["2022-01-15", "2021-06-01"], ["IT기기", "차량"],
+                                        "2024-01-31")
+    assert abs(res["total"]["book_value"] - expected.sum()) <= 1
+    assert [r["key"] for r in res["by_status"]] == ["보관중", "정상"]
+    assert client.get("/assets/valuation", params={"as_of": "2021-05-31"}).json()["total"]["cost"] == 0
+    assert client.get("/assets/valuation", params={"as_of": "2030-01-01"}).json()["total"]["book_value"] == 2500000
+
+    # 소액 자산의 1원 미만 월 상각액도 증감 테이블에 남아야 함 (전체 재계산과 같은 행)
+    client.post("/assets/", json=_asset("ETC-23001", category="기타", purchase_date="2023-05-10", price=10))
+    client.put(f"/assets/{car['id']}", json=_asset("CAR-21001", category="차량", purchase_date="2021-06-01",
+                                                   price=50000000, owner="총무팀"))  # 소유자만 변경
+
+    def table(db):
+        rows = db.query(database.AssetValuation).all()
+        return {(r.category, r.status, r.month): (r.cost, round(r.book_value, 4)) for r in rows}
+
+    with database.SessionLocal() as db:
+        incremental, rows = valuation.read_valuation(db, date(2025, 6, 1)), table(db)
+        assert len([k for k in rows if k[0] == "기타"]) == 61  # 취득월 + 60개월 상각
+        valuation.rebuild(db)
+        db.commit()
+        assert valuation.read_valuation(db, date(2025, 6, 1)) == incremental
+        assert table(db) == rows
+
+    # 소량 변경 경로(pandas 미사용)와 대량 경로의 증감이 같아야 함
+    entries = [("차량", "정상", date(2021, 6, 1), 700), ("IT기기", "정상", "2022-01-15", 10),
+               ("IT기기", "정상", date(2022, 1, 3), -10), ("가구", "폐기", date(2020, 2, 29), 333), (None, None, None, 5)]
+    key = lambda r: (r["category"], r["status"], r["month"])
+    small = sorted(valuation._schedule_rows_small(entries), key=key)
+    large = sorted(valuation._schedule_rows(valuation._frame(entries)), key=key)
+    assert [key(r) for r in small] == [key(r) for r in large]
+    assert all(a["cost"] == b["cost"] and abs(a["book_value"] - b["book_value"]) < 1e-9 for a, b in zip(small, large))
+
+
+def test_treemap_top_n(client):
+    for i in range(6):
+        client.post("/assets/", json=_asset(f"IT-2400{i}", name=f"노트북 {i}", price=1000 * (i + 1)))
+    client.post("/assets/", json=_asset("FUR-24001", category="가구", name="의자", price=500))
+    client.post("/assets/", json=_asset("CAR-24001", category="차량", name="소나타", price=100))
+    client.post("/assets/", json=_asset("ETC-24001", category="기타", name="냉장고", price=50))
+    client.put("/assets/1/status", params={"status": "수리중"})
+
+    tree = client.get("/assets/treemap", params={"top": 2}).json()
+    nodes = {tuple(n["path"]): n for n in tree["nodes"]}
+    assert nodes[()]["value"] == 21000 + 650 and nodes[()]["count"] == 9
+    # 실제 분류 "기타"와 롤업 노드 라벨이 겹치지 않음
+    assert [n["label"] for n in tree["nodes"] if len(n["path"]) == 1] == ["IT기기", "가구", "그 외 2개"]
+    assert nodes[("IT기기", "정상")]["value"] == 20000
+    assert nodes[(None,)]["value"] == 150 and nodes[(None,)]["other"]
+    assert not any(n["path"][:1] == ["차량"] for n in tree["nodes"])  # 롤업으로 합쳐진 분류는 펼치지 않음
+
+    # 드릴다운: IT기기 아래 상태 -> 자산명 (상위 2개 + 롤업)
+    tree = client.get("/assets/treemap", params={"path": ["IT기기"], "top": 2}).json()
+    names = [(n["label"], n["value"]) for n in tree["nodes"] if n["path"][:2] == ["IT기기", "정상"] and len(n["path"]) == 3]
+    assert names == [("노트북 5", 6000), ("노트북 4", 5000), ("그 외 3개", 9000)]
+    for node in tree["nodes"][1:]:
+        parent = next(n for n in tree["nodes"] if n["id"] == node["parent"])
+        assert parent["value"] >= node["value"]
+    assert client.get("/assets/treemap", params={"path": ["IT기기", "정상", "x"]}).status_code == 400
+
+
+def test_sorted_keyset_and_detail(client):
+    from sqlalchemy import update
+    import database
+
+    prices = [300, None, 100, None, 200, None, 500]
+    for i, price in enumerate(prices):
+        client.post("/assets/", json=_asset(f"IT-2400{i}", price=price or 0))
+    client.put("/assets/2", json=_asset("IT-24001", purchase_date="2020-01-01", price=0))
+    client.post("/assets/", json=_asset("IT-24099", status="임시저장", price=999))
+    # 가격이 없는 기존 행 (API 모델은 가격을 요구하므로 DB에 직접 NULL 기록)
+    with database.SessionLocal() as db:
+        nulls = [i + 1 for i, price in enumerate(prices) if price is None]
+        db.execute(update(database.Asset).where(database.Asset.id.in_(nulls)).values(price=None))
+        db.commit()
+
+    # NULL은 오름차순 맨 앞, 내림차순 맨 뒤. limit 3이면 두 정렬 모두 NULL 행에서 페이지가 끊김
+    ascending = sorted(range(1, 8), key=lambda i: (prices[i - 1] is not None, prices[i - 1] or 0, i))
+    descending = sorted(range(1, 8), key=lambda i: (prices[i - 1] is None, -(prices[i - 1] or 0), -i))
+    assert ascending[:3] == [2, 4, 6] and descending[3:6] == [3, 6, 4]
+    for sort, expected in [("price", ascending), ("-price", descending),
+                           ("-purchase_date", [7, 6, 5, 4, 3, 1, 2])]:
+        seen, cursor = [], None
+        while True:
+            params = {"sort": sort, "limit": 3, "exclude_status": "임시저장", **({"cursor": cursor} if cursor else {})}
+            res = client.get("/assets/", params=params)
+            seen += [a["id"] for a in res.json()]
+            cursor = res.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == expected, sort
+
+    assert client.get("/assets/", params={"sort": "name"}).status_code == 400
+    assert client.get("/assets/", params={"sort": "price", "cursor": "!!"}).status_code == 400
+    assert client.get("/assets/3").json()["asset_code"] == "IT-24002"
+    assert client.get("/assets/999").status_code == 404
+    assert client.get("/assets/summary").status_code == 200
+
+
+def test_snapshot_delta_append(client, tmp_path):
+    import os
+    import export_data
+    import snapshot
+
+    path = str(tmp_path / "snap")
+    ids = [client.post("/assets/", json=_asset(f"IT-2400{i}", price=1000 * i)).json()["id"] for i in range(4)]
+    assert export_data.export_snapshot(path) == (4, "base")
+    assert export_data.export_snapshot(path) == (0, "none")
+
+    client.put(f"/assets/{ids[0]}/status", params={"status": "보관중"})
+    client.delete(f"/assets/{ids[1]}")
+    client.post("/assets/", json=_asset("FUR-24001", category="가구", owner="인사팀"))
+    assert export_data.export_snapshot(path) == (2, "delta")
+    assert sorted(os.listdir(path)) == ["000001-base.arrow", "000002-delta.arrow"]
+
+    df, version = snapshot.load_frame(path)
+    current = {a["id"]: a for a in client.get("/assets/", params={"limit": 1000}).json()}
+    assert sorted(df["id"]) == sorted(current) and version == snapshot.read_version(path)
+    row = df.set_index("id").loc[ids[0]]
+    assert row["status"] == "보관중" and row["owner"] == ""  # 결측 소유자는 "" (categorical)
+    assert str(df["status"].dtype) == "category" and str(df["purchase_date"].dtype).startswith("datetime64")
+
+    assert export_data.export_snapshot(path, full=True)[1] == "base"
+    assert sorted(os.listdir(path)) == ["000003-base.arrow"]
+    assert sorted(snapshot.load_frame(path)[0]["id"]) == sorted(current)
+
+
+def test_label_sheets_cache(client, tmp_path, monkeypatch):
+    import io
+    import zipfile
+    import labels
+
+    monkeypatch.setattr(labels, "LABEL_CACHE_DIR", str(tmp_path / "labels"))
+    ids = [client.post("/assets/", json=_asset(f"IT-2400{i}")).json()["id"] for i in range(3)]
+    client.post("/assets/", json=_asset("FUR-24001", category="가구"))
+
+    first = client.get("/assets/labels", params={"category": "IT기기"})
+    assert first.status_code == 200 and first.content.startswith(b"%PDF")
+    assert first.headers["x-label-count"] == "3" and first.headers["x-label-rendered"] == "3"
+    # 다시 찍으면 캐시 재사용, 자산명이 바뀐 라벨만 다시 렌더링
+    assert client.get("/assets/labels", params={"category": "IT기기"}).headers["x-label-rendered"] == "0"
+    client.put(f"/assets/{ids[0]}", json=_asset("IT-24000", name="ThinkPad X1"))
+    assert client.get("/assets/labels", params={"category": "IT기기"}).headers["x-label-rendered"] == "1"
+
+    # small 템플릿은 65칸/페이지 -> 4장이 PNG 1페이지
+    png = client.get("/assets/labels", params={"format": "png", "template": "small"})
+    assert zipfile.ZipFile(io.BytesIO(png.content)).namelist() == ["labels-001.png"]
+    assert client.get("/assets/labels", params={"template": "huge"}).status_code == 400
+    assert client.get("/assets/labels", params={"category": "없음"}).status_code == 404
+
+
+def test_asset_code_allocation(client, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from sqlalchemy.exc import OperationalError
+    import codes
+
+    # 시퀀스 도입 전 코드가 있으면 그 다음 번호부터
+    client.post("/assets/", json=_asset("IT-24007"))
+    auto = {k: v for k, v in _asset(None, purchase_date="2024-05-01").items() if k != "asset_code"}
+    assert client.post("/assets/", json=auto).json()["asset_code"] == "IT-24008"
+
+    # 동시 등록도 중복/실패 없이 연속 번호
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        created = list(pool.map(lambda _: client.post("/assets/", json=auto), range(16)))
+    assert all(r.status_code == 200 for r in created)
+    assert sorted(r.json()["asset_code"] for r in created) == [f"IT-24{n:03d}" for n in range(9, 25)]
+
+    # 대량 등록은 (분류, 연도)별로 블록 하나씩, 직접 지정한 코드 번호는 시퀀스가 건너뜀
+    rows = [dict(auto, name=f"의자 {i}", category="가구") for i in range(3)] + [_asset("IT-24100", purchase_date="2024-01-01")]
+    report = client.post("/assets/bulk", content="\n".join(json.dumps(r) for r in rows)).json()
+    assert report["upserted"] == 4 and report["failed"] == 0
+    furniture = {a["asset_code"] for a in client.get("/assets/", params={"category": "가구"}).json()}
+    assert furniture == {"FUR-24001", "FUR-24002", "FUR-24003"}
+    assert client.post("/assets/", json=auto).json()["asset_code"] == "IT-24101"
+
+    # 수정은 자산코드가 바뀔 때만 시퀀스에 반영
+    calls = []
+    monkeypatch.setattr(codes, "assign_codes", lambda engine, rows: calls.append(rows[0]["asset_code"]) or rows)
+    asset = client.get("/assets/1").json()
+    client.put("/assets/1", json=dict(asset, name="이름만 변경"))
+    client.put("/assets/1", json=dict(asset, asset_code="IT-24200"))
+    assert calls == ["IT-24200"] and client.get("/assets/1").json()["asset_code"] == "IT-24200"
+    monkeypatch.undo()
+
+    # 채번 임대 실패(잠금 대기 초과)는 500이 아니라 청크 행별 오류
+    def locked(*args, **kwargs):
+        raise OperationalError("UPDATE asset_code_sequences", {}, Exception("database is locked"))
+    monkeypatch.setattr(codes, "lease", locked)
+    res = client.post("/assets/bulk", content="\n".join(json.dumps(r) for r in rows[:2]))
+    assert res.status_code == 200 and res.json()["failed"] == 2
+    assert "database is locked" in res.json()["errors"][0]["errors"][0]
+    monkeypatch.undo()
+
+    lease = client.post("/assets/codes", params={"category": "차량", "purchase_date": "2023-02-01", "count": 3}).json()
+    assert lease["codes"] == ["CAR-23001", "CAR-23002", "CAR-23003"]
+    assert client.post("/assets/codes", params={"category": "차량", "purchase_date": "2023-02-01"}).json()["start"] == 4
+
+
+def test_seed_data_appends(client):
+    from sqlalchemy import inspect, select
+    import crud
+    import database
+    import seed_data
+    import summary
+
+    client.post("/assets/", json=_asset("IT-24001", name="기존 노트북"))
+    assert seed_data.seed_database(300, seed=3, chunk_size=120, log=lambda _: None) == 300
+    assert seed_data.seed_database(200, seed=3, chunk_size=120, log=lambda _: None) == 200
+
+    # 기존 데이터는 남고, 자산코드는 시퀀스에서 받아 중복 없음. 같은 seed면 같은 데이터
+    rows = client.get("/assets/", params={"limit": 1000}).json()
+    assert len(rows) == 501 and len({r["asset_code"] for r in rows}) == 501
+    again = [r["name"] for r in sorted(rows, key=lambda r: r["id"])[301:421]]
+    assert again == [r["name"] for r in sorted(rows, key=lambda r: r["id"])[1:121]]
+    assert client.get("/assets/summary").json()["total"]["count"] == 501
+    assert not any(r["owner"] for r in rows if r["status"] in crud.OWNER_CLEARING_STATUSES)
+    # 시드 동안 내렸던 인덱스가 다시 생성됨
+    assert {i["name"] for i in inspect(database.engine).get_indexes("assets")} >= \
+        {i.name for i in database.Asset.__table__.indexes}
+
+    # 청크마다 반영한 집계/감가상각 증감이 전체 재구축과 같아야 함
+    def tables(db):
+        return (sorted(tuple(r) for r in db.execute(select(database.AssetSummary.__table__))),
+                sorted((*r[:4], round(r[4], 4)) for r in db.execute(select(database.AssetValuation.__table__))))
+
+    with database.SessionLocal() as db:
+        incremental = tables(db)
+        summary.rebuild(db)
+        assert tables(db) == incremental
+    code = rows[-1]["asset_code"]
+    assert [r["asset_code"] for r in client.get("/assets/search", params={"q": code}).json()["items"]][:1] == [code]
+
+
+def test_seed_data_parquet(tmp_path):
+    import pyarrow.parquet as pq
+    import export_data
+    import seed_data
+
+    path = tmp_path / "fixture.parquet"
+    assert seed_data.write_parquet(path, 250, seed=3, chunk_size=100, log=lambda _: None) == 250
+    table = pq.read_table(path)
+    assert table.schema == export_data._arrow_schema() and table.num_rows == 250
+    rows = table.to_pylist()
+    assert [r["id"] for r in rows] == list(range(1, 251)) and len({r["asset_code"] for r in rows}) == 250
+    # DB가 정하는 열은 null
+    assert all(r["department_id"] is None and r["person_id"] is None and r["row_version"] is None for r in rows)
+    names = [c["name"] for c in seed_data.generate(100, seed=3)][0]
+    assert [r["name"] for r in rows[:100]] == names.tolist()
+
+
+def test_metrics_endpoint(client, monkeypatch, caplog):
+    import metrics
+
+    def sample(text, name, **labels):
+        prefix = name + ("{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else "")
+        return next((float(line.split()[-1]) for line in text.splitlines() if line.startswith(prefix + " ")), 0.0)
+
+    before = client.get("/metrics").text
+    client.post("/assets/", json=_asset("IT-24001"))
+    client.get("/assets/", params={"limit": 5})
+    client.get("/assets/999999")
+
+    text = client.get("/metrics").text
+    assert text.endswith("\n") and "# TYPE asset_http_request_duration_seconds histogram" in text
+    ok = {"method": "GET", "route": "/assets/", "status": "200"}
+    assert sample(text, "asset_http_requests_total", **ok) == sample(before, "asset_http_requests_total", **ok) + 1
+    assert sample(text, "asset_http_requests_total", method="GET", route="/assets/{asset_id:int}", status="404") >= 1
+    route = {"method": "GET", "route": "/assets/"}
+    assert sample(text, "asset_http_request_duration_seconds_bucket", **route, le="+Inf") == \
+        sample(text, "asset_http_request_duration_seconds_count", **route)
+    # 요청당 쿼리 수/DB 시간은 세션 종류(run_sync/스레드풀)와 무관하게 요청 컨텍스트로 합산
+    assert sample(text, "asset_http_request_queries_sum", method="POST", route="/assets/") > \
+        sample(before, "asset_http_request_queries_sum", method="POST", route="/assets/")
+    assert sample(text, "asset_http_response_size_bytes_sum", **route) > 0
+    assert sample(text, "asset_http_requests_in_flight") == 1  # /metrics 요청 자신
+
+    # 느린 쿼리는 실행 계획과 함께 로그 (요청 처리 중인 쿼리만)
+    monkeypatch.setattr(metrics, "SLOW_QUERY_SECONDS", 0)
+    with caplog.at_level("WARNING", logger="asset_manager.sql"):
+        client.get("/assets/", params={"category": "IT기기", "limit": 5})
+    plans = [r.getMessage() for r in caplog.records if "FROM assets" in r.getMessage()]
+    assert plans and "plan:" in plans[0] and "(unavailable)" not in plans[0]
+
+    # 대량 IN 목록: SQL/파라미터는 앞부분만 로그하고 실행 계획 조회는 생략
+    caplog.clear()
+    ids = list(range(100000, 100000 + 5 * metrics.PLAN_MAX_PARAMS))
+    with caplog.at_level("WARNING", logger="asset_manager.sql"):
+        client.patch("/assets/status", json={"status": "폐기", "ids": ids})
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages and max(map(len, messages)) < metrics.SLOW_QUERY_MAX_CHARS + 2000
+    assert any(" total)" in m and "(skipped: " in m for m in messages)
+
+
+def test_inventory_reconciliation(client):
+    for i in range(6):
+        client.post("/assets/", json=_asset(f"IT-2400{i}"))
+    client.put("/assets/6/status?status=폐기")
+    client.post("/assets/", json=_asset("IT-24009", status="분실"))
+    audit = client.post("/audits", json={"name": "2026 상반기 실사"}).json()
+
+    # 1차: CSV (헤더, 따옴표, 중복, 빈 줄 포함)
+    first = client.post(f"/audits/{audit['id']}/scans",
+                        content='asset_code,scanned_at\n"IT-24000",x\nIT-24001\nIT-24001\n\nIT-24005\nXX-1\n'.encode())
+    report = first.json()
+    assert (report["batch"], report["received"], report["distinct"], report["new"]) == (1, 5, 4, 4)
+    assert report["diff"] == {"found": 2, "wrong_status": 1, "unknown": 1}
+    issues = [(i["asset_code"], i["result"]) for i in report["issues"]]
+    assert issues == [("IT-24005", "wrong_status"), ("XX-1", "unknown")]
+    assert report["summary"]["missing"] == 3 and report["summary"]["expected"] == 5
+
+    # 2차: 이전 세션 스캔은 already_scanned, 새 코드만 diff에 반영
+    report = client.post(f"/audits/{audit['id']}/scans", content=b"IT-24000\nIT-24002\nIT-24009\n").json()
+    assert (report["batch"], report["new"], report["already_scanned"]) == (2, 2, 1)
+    assert report["diff"] == {"found": 1, "wrong_status": 1, "unknown": 0}
+    assert report["summary"] == {"found": 3, "wrong_status": 2, "unknown": 1, "missing": 2, "scanned": 6, "expected": 5}
+    assert client.get(f"/audits/{audit['id']}").json()["batches"] == 2
+
+    page = client.get(f"/audits/{audit['id']}/items", params={"result": "missing", "limit": 1})
+    assert [i["asset_code"] for i in page.json()] == ["IT-24003"]
+    rest = client.get(f"/audits/{audit['id']}/items", params={"after": page.headers["x-next-cursor"]}).json()
+    assert [i["asset_code"] for i in rest] == ["IT-24004"]
+    found = client.get(f"/audits/{audit['id']}/items", params={"result": "found"}).json()
+    assert [(i["asset_code"], i["batch"]) for i in found] == [("IT-24000", 1), ("IT-24001", 1), ("IT-24002", 2)]
+    assert client.post("/audits/999/scans", content=b"IT-24000\n").status_code == 404
+    assert client.get(f"/audits/{audit['id']}/items", params={"result": "lost"}).status_code == 400
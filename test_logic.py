@@ -11,9 +11,91 @@ def test_currency():
     assert format_korean_currency(350000000) == "3.5억", f"Got {format_korean_currency(350000000)}"
     print("✅ Currency Tests Passed")
 
+def test_insights():
+    import pandas as pd
+    import insights
+
+    df = pd.DataFrame({
+        "status": ["정상", "보관중", "보관중", "분실", "정상", "정상"],
+        "owner": ["개발1팀 김민수", "개발1팀 이영희", None, "영업팀 박지성", "인사팀 최유리", "개발1팀 김민수"],
+        "purchase_date": ["2015-01-01", "2016-05-05", "2024-01-01", None, "2025-01-01", "2025-06-01"],
+        "price": [9000000, 100000, 200000, 300000, 400000, 500000],
+    })
+    found = {i.rule: i for i in insights.evaluate(df, today="2026-01-01", money=format_korean_currency)}
+    assert found["issue_ratio"].severity == "warning"  # 비정상 50%
+    assert "1개" in found["high_value"].message and "900만" in found["high_value"].message
+    assert "2개" in found["aging"].message
+    assert "'개발1팀'" in found["dept_concentration"].message  # 소유자 -> 부서로 묶어 95%
+    assert found["idle_storage"].severity == "warning"
+    assert [i.severity for i in found.values()] == sorted((i.severity for i in found.values()),
+                                                          key=insights.SEVERITY_ORDER.get)
+    assert insights.evaluate(df.iloc[:0])[0].rule == "empty"
+    assert insights.evaluate(df[df["status"] == "정상"].assign(price=1000, purchase_date="2025-01-01"), today="2026-01-01")[0].rule == "ok"
+
+def test_import_normalize():
+    import io
+    import json
+    import pandas as pd
+    import import_data
+
+    body = ("자산코드,자산명,분류,소유자,구매일,가격\n"
+            "IT-1,맥북,IT Device,개발팀,2024.3.2,\"1,250,000\"\n"
+            ",의자,가구,,2024-01-01,10\n"
+            "IT-3,x,우주선,,nope,-5\n"
+            "\n"
+            "VH-1,카니발,vehicle,,45000,100원\n")
+    chunks = list(import_data.iter_chunks(io.BytesIO(body.encode()), "buy.csv", chunk_size=3))
+    assert [start for start, _ in chunks] == [2, 5]
+    scan = import_data.scan(import_data.iter_chunks(io.BytesIO(body.encode()), "buy.csv", chunk_size=3))
+    assert (scan["total"], scan["valid"], scan["failed"], scan["missing"]) == (4, 3, 1, [])
+    errors = scan["errors"].set_index("row")["errors"]
+    assert errors[4] == "분류를 인식할 수 없음 (우주선), 구매일 형식 오류, 가격은 0 이상의 정수"  # 행 번호는 스프레드시트 기준 (헤더 = 1행)
+
+    valid = pd.concat(import_data.normalize_chunk(chunk)[0] for _, chunk in chunks)
+    rows = [json.loads(line) for line in import_data.to_ndjson(valid).decode().splitlines()]
+    assert rows[0] == {"asset_code": "IT-1", "name": "맥북", "category": "IT기기", "owner": "개발팀",
+                       "purchase_date": "2024-03-02", "price": 1250000}
+    assert rows[1]["asset_code"] is None  # 자산코드가 비면 서버에서 채번
+    rows.pop(1)
+    assert rows[1]["category"] == "차량" and rows[1]["purchase_date"] == "2023-03-15" and rows[1]["price"] == 100  # 엑셀 일련번호
+    assert import_data.missing_columns(pd.DataFrame(columns=["Name", "Price"])) == ["category", "purchase_date"]
+
+def test_local_labels_without_codes():
+    import pandas as pd
+    import app
+
+    # 오프라인/목업 데이터: 자산코드 열이 없거나 모두 비어 있으면 예외 대신 None (화면에는 경고)
+    template = list(app.labels.TEMPLATES)[0]
+    assert app.local_labels(pd.DataFrame({"name": ["노트북"]}), "pdf", template) is None
+    assert app.local_labels(pd.DataFrame({"name": ["a", "b"], "asset_code": [None, ""]}), "pdf", template) is None
+    pdf = app.local_labels(pd.DataFrame({"name": ["a", "b"], "asset_code": [None, "IT-24001"]}), "pdf", template)
+    assert pdf.startswith(b"%PDF")
+
+def test_local_treemap_rollup():
+    import pandas as pd
+    import app
+
+    # 서버(/assets/treemap)와 같은 hierarchy 규칙: 상위 top개 + "그 외 N개" (실제 "기타" 분류와 구분)
+    df = pd.DataFrame({
+        "category": ["IT기기"] * 3 + ["가구", "차량", "기타"],
+        "status": ["정상", "정상", "수리중", "정상", "정상", "정상"],
+        "name": ["노트북 A", "노트북 B", "노트북 A", "의자", "소나타", "냉장고"],
+        "price": [3000, 2000, 1000, 500, 100, None],
+    })
+    tree = app.local_treemap.__wrapped__(0, None, None, (), df)
+    top = [(n["label"], n["value"], n["count"]) for n in tree["nodes"] if len(n["path"]) == 1]
+    assert top == [("IT기기", 6000, 3), ("가구", 500, 1), ("차량", 100, 1), ("기타", 0, 1)]
+    assert tree["nodes"][0]["count"] == 6  # 가격이 비어 있어도 건수에 포함 (서버 count()와 같음)
+    small = app.hierarchy.build_tree(lambda cols: [((), "A", 5, 1, 1), ((), "B", 3, 1, 1), ((), "C", 3, 2, 1)], top=1)
+    assert [(n["label"], n["value"], n["count"]) for n in small["nodes"][1:]] == [("A", 5, 1), ("그 외 2개", 6, 3)]
+
 if __name__ == "__main__":
     try:
         test_currency()
+        test_insights()
+        test_import_normalize()
+        test_local_labels_without_codes()
+        test_local_treemap_rollup()
         print("🎉 ALL TESTS PASSED")
     except Exception as e:
         print(f"❌ TEST FAILED: {e}")
@@ -0,0 +1,41 @@
+from sqlalchemy import case, func, select
+import database
+import hierarchy
+
+# 트리맵용 계층 집계 (분류 -> 상태 -> 자산명)
+# 그룹 집계와 부모별 상위 top개 선별은 SQL로, 노드 구성/롤업은 대시보드와 같은 hierarchy.py 규칙으로
+
+LEVELS = hierarchy.LEVELS
+TOP_N = hierarchy.TOP_N
+
+
+def _level_rows(db, clauses, cols, top):
+    """cols로 그룹핑 후 부모(cols[:-1])별 상위 top개만 남기고 나머지 키는 None으로 합친 행
+
+    반환값: (부모 키 튜플, 키, 값, 건수, 묶인 그룹 수) 목록 (hierarchy.level_nodes 입력)
+    """
+    Asset = database.Asset
+    keys = [func.coalesce(getattr(Asset, c), "").label(c) for c in cols]
+    grouped = (
+        select(*keys, func.coalesce(func.sum(Asset.price), 0).label("value"), func.count().label("count"))
+        .where(*clauses).group_by(*keys).subquery()
+    )
+    parents = [grouped.c[c] for c in cols[:-1]]
+    order = [grouped.c.value.desc(), grouped.c[cols[-1]]]  # hierarchy.level_nodes와 같은 순위 (동점은 키 순)
+    ranked = select(
+        grouped, func.row_number().over(partition_by=parents or None, order_by=order).label("rn")
+    ).subquery()
+    key = case((ranked.c.rn <= top, ranked.c[cols[-1]]), else_=None).label("key")
+    parents = [ranked.c[c] for c in cols[:-1]]
+    rows = db.execute(
+        select(*parents, key, func.sum(ranked.c.value), func.sum(ranked.c["count"]), func.count())
+        .group_by(*parents, key)
+    ).all()
+    return [(tuple(row[:-4]), *row[-4:]) for row in rows]
+
+
+def build_tree(db, clauses=(), path=(), depth=2, top=TOP_N):
+    """path 노드 아래 depth 레벨까지의 노드 목록 (hierarchy.build_tree 참고)"""
+    Asset = database.Asset
+    clauses = [*clauses, *[func.coalesce(getattr(Asset, c), "") == v for c, v in zip(LEVELS, path)]]
+    return hierarchy.build_tree(lambda cols: _level_rows(db, clauses, cols, top), path, depth, top)
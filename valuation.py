@@ -0,0 +1,159 @@
+from collections import defaultdict
+from datetime import date
+import pandas as pd
+from sqlalchemy import delete, func, select, tuple_
+import database
+import depreciation
+
+# 월별 감가상각 증감 테이블(asset_valuation) 유지 및 조회
+# 상각액은 취득가에 선형이므로 (분류, 상태, 취득월) 그룹 합계 가격만으로 증감을 계산
+
+KEYS = ("category", "status")
+# 감가상각 증감에 영향을 주는 자산 값
+VALUE_FIELDS = ("category", "status", "purchase_date", "price")
+
+# 부동소수 누적 오차로 남은 증감 행 정리 기준 (원). 소액 자산의 월 상각액(1원 미만)은 지우지 않도록 충분히 작게
+EPSILON = 1e-6
+
+# 이 수 이하의 변경(단건 등록/수정/삭제 등)은 pandas 없이 그룹별 상각표를 직접 전개
+SMALL_CHANGES = 32
+
+
+def _schedule_rows(frame):
+    """category/status/month/price(부호 포함) 프레임 -> (분류, 상태, 월)별 증감 행 목록"""
+    # 같은 (분류, 상태, 취득월)은 가격 합계 하나로 묶은 뒤 상각표 전개
+    frame = frame[frame["month"] >= 0].groupby(["category", "status", "month"], as_index=False)["price"].sum()
+    if frame.empty:
+        return []
+    rows, months, cost, book = depreciation.schedule_deltas(
+        frame["category"].to_numpy(), frame["month"].to_numpy(), frame["price"].to_numpy())
+    deltas = pd.DataFrame({
+        "category": frame["category"].to_numpy()[rows], "status": frame["status"].to_numpy()[rows],
+        "month": months, "cost": cost, "book_value": book,
+    }).groupby(["category", "status", "month"], as_index=False).sum()
+    deltas = deltas[(deltas["cost"] != 0) | (deltas["book_value"] != 0)]
+    return [
+        {"category": c, "status": s, "month": int(m), "cost": int(round(co)), "book_value": float(b)}
+        for c, s, m, co, b in deltas.itertuples(index=False)
+    ]
+
+
+def _schedule_rows_small(entries):
+    """_schedule_rows와 같은 결과를 소량 변경 목록에서 바로 계산 (category, status, purchase_date, price)"""
+    groups = defaultdict(float)
+    for category, status, purchase_date, price in entries:
+        month = depreciation.month_of(purchase_date)
+        if month >= 0:
+            groups[(category or "", status or "", month)] += price
+    deltas = defaultdict(lambda: [0.0, 0.0])
+    for (category, status, month), price in groups.items():
+        if not price:
+            continue
+        deltas[(category, status, month)][0] += price
+        for offset, book in zip(*depreciation.asset_schedule(category, price)):
+            if book:
+                deltas[(category, status, month + offset)][1] += book
+    return [
+        {"category": c, "status": s, "month": m, "cost": int(round(co)), "book_value": b}
+        for (c, s, m), (co, b) in deltas.items() if co or b
+    ]
+
+
+def _frame(entries):
+    frame = pd.DataFrame(entries, columns=["category", "status", "purchase_date", "price"])
+    frame["category"] = frame["category"].fillna("")
+    frame["status"] = frame["status"].fillna("")
+    frame["price"] = pd.to_numeric(frame["price"], errors="coerce").fillna(0)
+    frame["month"] = depreciation.month_index(frame["purchase_date"])
+    return frame
+
+
+def _unchanged(old, new):
+    # 분류/상태/취득일/가격이 그대로면 (소유자만 바뀐 경우 등) 감가상각 증감 없음
+    return old is not None and new is not None and all(old.get(k) == new.get(k) for k in VALUE_FIELDS)
+
+
+def apply_changes(db, changes):
+    """summary.apply_changes와 같은 (변경 전, 변경 후) 값 쌍 목록을 월별 증감으로 반영 (커밋은 호출자)
+
+    자산을 쓰는 경로(crud, bulk_upsert)에서 집계 테이블 갱신과 함께 호출
+    """
+    entries = []
+    for old, new in changes:
+        if _unchanged(old, new):
+            continue
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None or not values.get("purchase_date"):
+                continue
+            entries.append((values.get("category"), values.get("status"), values["purchase_date"],
+                            sign * (values.get("price") or 0)))
+    if len(entries) <= SMALL_CHANGES:
+        rows = _schedule_rows_small(entries)
+    else:
+        rows = _schedule_rows(_frame(entries))
+    if not rows:
+        return
+    table = database.AssetValuation.__table__
+    stmt = database.insert_for(db)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.category, table.c.status, table.c.month],
+        set_={"cost": table.c.cost + stmt.excluded.cost,
+              "book_value": table.c.book_value + stmt.excluded.book_value},
+    )
+    db.execute(stmt, rows)
+    # 바뀐 (분류, 상태)의 월 범위에서 취득가와 장부가 증감이 모두 0이 된 행만 정리 (기본키 앞부분으로 탐색)
+    groups = sorted({(r["category"], r["status"]) for r in rows})
+    months = [r["month"] for r in rows]
+    db.execute(delete(table).where(tuple_(table.c.category, table.c.status).in_(groups),
+                                   table.c.month.between(min(months), max(months)),
+                                   table.c.cost == 0, func.abs(table.c.book_value) < EPSILON))
+
+
+def record_change(db, old=None, new=None):
+    apply_changes(db, [(old, new)])
+
+
+def rebuild(db):
+    """assets 전체에서 다시 계산 (커밋은 호출자). 그룹 수는 (분류, 상태, 취득일) 조합 수"""
+    Asset = database.Asset
+    table = database.AssetValuation.__table__
+    group = [Asset.category, Asset.status, Asset.purchase_date]
+    entries = db.execute(select(*group, func.sum(Asset.price)).group_by(*group)).all()
+    db.execute(delete(table))
+    rows = _schedule_rows(_frame(entries)) if entries else []
+    if rows:
+        db.execute(table.insert(), rows)
+
+
+def rebuild_if_empty(db):
+    if db.query(database.AssetValuation).first() is None and db.query(database.Asset).first() is not None:
+        rebuild(db)
+        db.commit()
+
+
+def read_valuation(db, as_of=None, status=None, category=None, exclude_status=None):
+    """as_of 월말 기준 분류/상태별 취득가, 장부가, 감가상각누계액 (현재 보유 자산 기준)"""
+    as_of = as_of or date.today()
+    t = database.AssetValuation.__table__
+    conds = [t.c.month <= int(depreciation.month_index([as_of])[0])]
+    if status:
+        conds.append(t.c.status.in_(status))
+    if category:
+        conds.append(t.c.category.in_(category))
+    if exclude_status:
+        conds.append(t.c.status.notin_(exclude_status))
+
+    result = {"as_of": as_of}
+    for dim in KEYS:
+        rows = db.execute(
+            select(t.c[dim], func.sum(t.c.cost), func.sum(t.c.book_value))
+            .where(*conds).group_by(t.c[dim]).order_by(func.sum(t.c.book_value).desc())
+        ).all()
+        result[f"by_{dim}"] = [
+            {"key": k, "cost": int(c), "book_value": int(round(b)), "depreciation": int(c) - int(round(b))}
+            for k, c, b in rows if c
+        ]
+    cost = sum(r["cost"] for r in result["by_status"])
+    book = sum(r["book_value"] for r in result["by_status"])
+    result["total"] = {"cost": cost, "book_value": book, "depreciation": cost - book}
+    return result